@@ -3,8 +3,15 @@ from flask import Blueprint, g, jsonify, request
 from loguru import logger
 
 from app.decorators import require_jwt_admin
+from app.services.api_key_service import ApiKeyService
 from app.services.currency_service import CurrencyService
+from app.services.providers.circuit_breaker import circuit_breakers
+from app.services.providers.latency import provider_latencies
+from app.services.providers.provider_factory import PROVIDER_CLIENTS
+from app.services.providers.quota import quota_scheduler
+from app.services.rate_change_tracker import rate_change_tracker
 from app.services.user_service import UserService
+from app.utils.exceptions import ServiceOverloadedError
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -29,6 +36,7 @@ def add_currency_pair():
         "base_currency": "USD",
         "target_currency": "ZAR",
         "markup_percentage": 0.05,  # optional, default 0.1
+        "priority": 10,  # optional, default 0; higher refreshes first under quota
     }
     """
     try:
@@ -46,11 +54,16 @@ def add_currency_pair():
             ), 400
 
         markup_percentage = data.get("markup_percentage", 0.1000)
+        priority = data.get("priority", 0)
+
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            return jsonify({"error": "priority must be an integer"}), 400
 
         result = CurrencyService.add_currency_pair(
             base_currency=base_currency,
             target_currency=target_currency,
             markup_percentage=markup_percentage,
+            priority=priority,
         )
 
         if result["success"]:
@@ -99,6 +112,78 @@ def update_all_pairs_markup():
         return jsonify({"error": "Failed to update markup for all pairs"}), 500
 
 
+@admin_bp.route("/rates/write-stats", methods=["GET"])
+@require_jwt_admin
+def get_rate_write_stats():
+    """
+    Counters of rate rows written and skipped by change detection.
+    """
+    try:
+        stats = rate_change_tracker.get_stats()
+        stats["writes_avoided"] = stats.get("quotes_skipped", 0) + stats.get(
+            "aggregated_extended", 0
+        )
+        return jsonify({"write_stats": stats}), 200
+
+    except Exception as e:
+        logger.error(f"Get rate write stats error: {e}")
+        return jsonify({"error": "Failed to get rate write stats"}), 500
+
+
+@admin_bp.route("/providers/health", methods=["GET"])
+@require_jwt_admin
+def get_provider_health():
+    """
+    Circuit breaker state, recent failure rate and latency percentiles
+    (this worker's observations) per provider.
+    """
+    try:
+        return jsonify(
+            {
+                "providers": [
+                    {
+                        **circuit_breakers.status(name),
+                        "latency": provider_latencies.summary(name),
+                    }
+                    for name in PROVIDER_CLIENTS
+                ]
+            }
+        ), 200
+
+    except Exception as e:
+        logger.error(f"Get provider health error: {e}")
+        return jsonify({"error": "Failed to get provider health"}), 500
+
+
+@admin_bp.route("/providers/quota", methods=["GET"])
+@require_jwt_admin
+def get_provider_quota():
+    """
+    Per-minute tokens and monthly usage against each provider's plan quota.
+    """
+    try:
+        return jsonify(
+            {"providers": [quota_scheduler.usage(name) for name in PROVIDER_CLIENTS]}
+        ), 200
+
+    except Exception as e:
+        logger.error(f"Get provider quota error: {e}")
+        return jsonify({"error": "Failed to get provider quota"}), 500
+
+
+@admin_bp.route("/providers/<provider>/circuit/reset", methods=["POST"])
+@require_jwt_admin
+def reset_provider_circuit(provider):
+    """
+    Close a provider's circuit breaker, e.g. after fixing its API key.
+    """
+    if provider not in PROVIDER_CLIENTS:
+        return jsonify({"error": f"Unknown provider: {provider}"}), 404
+
+    circuit_breakers.reset(provider)
+    return jsonify({"provider": circuit_breakers.status(provider)}), 200
+
+
 @admin_bp.route("/users", methods=["POST"])
 @require_jwt_admin
 def create_admin_user():
@@ -140,6 +225,98 @@ def create_admin_user():
         else:
             return jsonify({"error": result["message"]}), 400
 
+    except ServiceOverloadedError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Create admin user error: {e}")
         return jsonify({"error": "Failed to create admin user"}), 500
+
+
+@admin_bp.route("/api-keys", methods=["POST"])
+@require_jwt_admin
+def create_api_key():
+    """
+    Issue an API key for a machine client. The key is only shown in this response.
+    Expected JSON: {
+        "name": "remittance-backend",
+        "scopes": ["rates:read", "rates:stream"],
+        "expires_in_days": 365  # optional, default never
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+
+        scopes = data.get("scopes")
+        if not isinstance(scopes, list):
+            return jsonify({"error": "scopes must be a list"}), 400
+
+        expires_in_days = data.get("expires_in_days")
+        if expires_in_days is not None and (
+            not isinstance(expires_in_days, int)
+            or isinstance(expires_in_days, bool)
+            or expires_in_days <= 0
+        ):
+            return jsonify({"error": "expires_in_days must be a positive integer"}), 400
+
+        result = ApiKeyService.create_api_key(
+            name=data.get("name"),
+            scopes=scopes,
+            created_by_user_id=g.current_user.id,
+            expires_in_days=expires_in_days,
+        )
+
+        if result["success"]:
+            return jsonify(
+                {
+                    "message": result["message"],
+                    "key": result["key"],
+                    "api_key": result["api_key"],
+                }
+            ), 201
+        else:
+            return jsonify({"error": result["message"]}), 400
+
+    except Exception as e:
+        logger.error(f"Create API key error: {e}")
+        return jsonify({"error": "Failed to create API key"}), 500
+
+
+@admin_bp.route("/api-keys", methods=["GET"])
+@require_jwt_admin
+def list_api_keys():
+    """
+    All API keys with their scopes and usage (usage is flushed in batches).
+    """
+    try:
+        return jsonify({"api_keys": ApiKeyService.list_api_keys()}), 200
+
+    except Exception as e:
+        logger.error(f"List API keys error: {e}")
+        return jsonify({"error": "Failed to list API keys"}), 500
+
+
+@admin_bp.route("/api-keys/<int:key_id>", methods=["DELETE"])
+@require_jwt_admin
+def revoke_api_key(key_id):
+    """
+    Revoke an API key; every API process stops accepting it within
+    API_KEY_SYNC_SECONDS (API_KEY_REFRESH_SECONDS without Redis).
+    """
+    try:
+        result = ApiKeyService.revoke_api_key(key_id)
+
+        if result["success"]:
+            return jsonify(
+                {"message": result["message"], "api_key": result["api_key"]}
+            ), 200
+        elif result["message"] == "API key not found":
+            return jsonify({"error": result["message"]}), 404
+        else:
+            return jsonify({"error": result["message"]}), 400
+
+    except Exception as e:
+        logger.error(f"Revoke API key error: {e}")
+        return jsonify({"error": "Failed to revoke API key"}), 500
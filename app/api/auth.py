@@ -1,8 +1,10 @@
 # Auth API
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 from loguru import logger
 
+from app.decorators import require_jwt
 from app.services.auth_service import AuthService
+from app.utils.exceptions import ServiceOverloadedError
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
@@ -48,6 +50,8 @@ def register():
         else:
             return jsonify({"error": registration_result["message"]}), 400
 
+    except ServiceOverloadedError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Registration error: {e}")
         return jsonify({"error": "Registration failed"}), 500
@@ -77,6 +81,29 @@ def login():
         else:
             return jsonify({"error": login_result["message"]}), 401
 
+    except ServiceOverloadedError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Login error: {e}")
         return jsonify({"error": "Login failed"}), 500
+
+
+@auth_bp.route("/logout", methods=["POST"])
+@require_jwt
+def logout():
+    """
+    Log the current user out everywhere.
+    Every token issued to the user so far stops working immediately.
+    """
+    try:
+        auth_service = AuthService()
+        logout_result = auth_service.logout_user(g.current_user.id)
+
+        if logout_result["success"]:
+            return jsonify(logout_result), 200
+        else:
+            return jsonify({"error": logout_result["message"]}), 400
+
+    except Exception as e:
+        logger.error(f"Logout error: {e}")
+        return jsonify({"error": "Logout failed"}), 500
@@ -1,22 +1,234 @@
 # Rates API
+import base64
+import json
 from datetime import datetime, timedelta
 
-from flask import Blueprint, jsonify, request
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 from loguru import logger
+from sqlalchemy import func, tuple_
 
-from app.decorators import require_jwt
+from app.decorators import require_jwt_or_api_key
 from app.extensions import db
-from app.models import AggregatedRate, CurrencyPair
+from app.models import AggregatedRate, AggregatedRateRollup, CurrencyPair
+from app.services.rate_broadcast import pairs_payload, rate_broadcaster
+from app.services.rate_snapshot import rate_snapshot_cache
 
 rates_bp = Blueprint("rates", __name__, url_prefix="/rates")
 
+# Rows fetched per round trip from the server-side cursor when streaming
+HISTORICAL_STREAM_BATCH_SIZE = 1000
+
+
+def _encode_cursor(position_at: datetime, rate_id: int) -> str:
+    """Encode a keyset position (timestamp, id) as an opaque cursor."""
+    raw = json.dumps([position_at.isoformat(), rate_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by _encode_cursor. Raises ValueError if invalid."""
+    try:
+        position_at, rate_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position_at), int(rate_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+
+def _serialize_historical(agg_rate, currency_pair: CurrencyPair) -> dict:
+    rate_dict = agg_rate.to_dict()
+    rate_dict["base_currency"] = currency_pair.base_currency
+    rate_dict["target_currency"] = currency_pair.target_currency
+    return rate_dict
+
+
+def _parse_historical_limit(streaming: bool) -> int | None:
+    """
+    Page size for /historical: 100 by default and capped at 1000 for JSON pages,
+    optional and uncapped when streaming. Raises ValueError with the message.
+    """
+    raw_limit = request.args.get("limit")
+    if raw_limit is None:
+        return None if streaming else 100
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise ValueError("limit must be an integer") from None
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return limit if streaming else min(limit, 1000)  # Max 1000 records per page
+
+
+def _parse_date_range(
+    from_date_str: str | None, to_date_str: str | None
+) -> tuple[datetime, datetime]:
+    """Parse YYYY-MM-DD bounds, defaulting to the last 7 days. Raises ValueError."""
+    try:
+        if from_date_str:
+            from_date = datetime.strptime(from_date_str, "%Y-%m-%d")
+        else:
+            from_date = datetime.now() - timedelta(days=7)  # Default: 7 days ago
+
+        if to_date_str:
+            to_date = datetime.strptime(to_date_str, "%Y-%m-%d")
+            # Add 23:59:59 to include the entire day
+            to_date = to_date.replace(hour=23, minute=59, second=59)
+        else:
+            to_date = datetime.now()  # Default: now
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD") from None
+
+    # Validate date range
+    if from_date > to_date:
+        raise ValueError("from_date cannot be later than to_date")
+    return from_date, to_date
+
+
+def _historical_query(
+    interval: str | None, from_date: datetime, to_date: datetime, source: str = None
+):
+    """
+    Query of (row, CurrencyPair) in the date range: OHLC rollups of the interval,
+    or raw aggregated rates (of one source, if given) without one.
+    Returns (query, model, time column).
+    """
+    if interval:
+        model = AggregatedRateRollup
+        time_column = AggregatedRateRollup.bucket_start
+        query = (
+            db.session.query(model, CurrencyPair)
+            .join(CurrencyPair, model.currency_pair_id == CurrencyPair.id)
+            .filter(model.interval == interval)
+            .filter(time_column >= func.date_trunc(interval, from_date))
+            .filter(time_column <= to_date)
+        )
+    else:
+        model = AggregatedRate
+        time_column = AggregatedRate.aggregated_at
+        query = (
+            db.session.query(model, CurrencyPair)
+            .join(CurrencyPair, model.currency_pair_id == CurrencyPair.id)
+            .filter(time_column >= from_date)
+            .filter(time_column <= to_date)
+        )
+        if source:
+            query = query.filter(model.source == source)
+    return query, model, time_column
+
+
+def _filter_currencies(query, base_currency: str | None, target_currency: str | None):
+    """Restrict to the given base/target currencies. Raises ValueError if unknown."""
+    for label, column, currency in (
+        ("base", CurrencyPair.base_currency, base_currency),
+        ("target", CurrencyPair.target_currency, target_currency),
+    ):
+        if currency:
+            error = CurrencyPair.validate_currency(currency)
+            if error:
+                raise ValueError(f"Invalid {label} currency: {error}")
+            query = query.filter(column == currency)
+    return query
+
+
+def _apply_keyset(query, model, time_column, order: str, cursor: str | None):
+    """Order on (time, id) and resume after the cursor. Raises ValueError."""
+    keyset = tuple_(time_column, model.id)
+    if cursor:
+        cursor_position = tuple_(*_decode_cursor(cursor))
+        if order == "desc":
+            query = query.filter(keyset < cursor_position)
+        else:
+            query = query.filter(keyset > cursor_position)
+
+    # id breaks ties between rows sharing a timestamp
+    if order == "desc":
+        return query.order_by(time_column.desc(), model.id.desc())
+    return query.order_by(time_column.asc(), model.id.asc())
+
+
+def _stream_historical(query, limit: int | None) -> Response:
+    """Every matching row as NDJSON, read through a server-side cursor."""
+    if limit:
+        query = query.limit(limit)
+
+    def generate():
+        # Server-side cursor keeps memory flat regardless of the range size
+        rows = query.execution_options(stream_results=True).yield_per(
+            HISTORICAL_STREAM_BATCH_SIZE
+        )
+        for agg_rate, currency_pair in rows:
+            yield json.dumps(_serialize_historical(agg_rate, currency_pair)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def _historical_page(query, limit: int, time_column) -> tuple[list[dict], str | None]:
+    """One page of serialized rows and the cursor of the next page, if any."""
+    # Fetch one extra row to know whether another page exists
+    results = query.limit(limit + 1).all()
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    historical_rates = [
+        _serialize_historical(agg_rate, currency_pair)
+        for agg_rate, currency_pair in results
+    ]
+
+    next_cursor = None
+    if has_more:
+        last_rate = results[-1][0]
+        next_cursor = _encode_cursor(getattr(last_rate, time_column.key), last_rate.id)
+    return historical_rates, next_cursor
+
+
+def _sse_event(event: str, generation: int, payload: str | None) -> str:
+    return f"event: {event}\nid: {generation}\ndata: {payload or '{}'}\n\n"
+
+
+def _stream_rate_events(snapshot, currencies, resume_from, heartbeat):
+    """Yield rate events for one client, see stream_rates."""
+    generation = resume_from
+    if generation is None:
+        generation = snapshot.generation
+        yield _sse_event(
+            "snapshot",
+            generation,
+            pairs_payload(generation, snapshot.pairs, currencies),
+        )
+
+    while True:
+        updates = rate_broadcaster.updates_since(generation, heartbeat)
+        if updates is None:
+            # Too far behind the kept diffs, start over from the snapshot
+            latest = rate_broadcaster.snapshot
+            generation = latest.generation
+            yield _sse_event(
+                "snapshot",
+                generation,
+                pairs_payload(generation, latest.pairs, currencies),
+            )
+        elif not updates:
+            yield ": keep-alive\n\n"
+
+        for update in updates or []:
+            generation = update.generation
+            payload = update.payload(currencies)
+            if payload:
+                yield _sse_event("rates", generation, payload)
+
 
 @rates_bp.route("", methods=["GET"])
-@require_jwt
+@require_jwt_or_api_key("rates:read")
 def get_rates():
     try:
-        # Fetch all aggregated rates
-        rates = AggregatedRate.get_latest_for_all()
+        # Serve all aggregated rates from the in-memory snapshot
+        rates = rate_snapshot_cache.get().latest_for_all
         response = {
             "success": True,
             "data": rates
@@ -27,17 +239,77 @@ def get_rates():
         return jsonify({"error": "Internal Server Error"}), 500
 
 
+@rates_bp.route("/stream", methods=["GET"])
+@require_jwt_or_api_key("rates:stream")
+def stream_rates():
+    """
+    Server-Sent Events stream of rate changes.
+    Sends a `snapshot` event with the current rates, then a `rates` event with
+    only the changed pairs (and the removed ones, under "removed") whenever a
+    new aggregation generation is published.
+    Event ids are generations; reconnecting with Last-Event-ID resumes from it.
+    Every stream holds a server thread, so at most RATE_STREAM_MAX_SUBSCRIBERS
+    are open per process; beyond that the request gets 503.
+    Query params:
+    - currencies: Comma-separated base currencies to stream (optional, default: all)
+    """
+    try:
+        currencies = None
+        if request.args.get("currencies"):
+            currencies = frozenset(request.args["currencies"].split(","))
+            for currency in currencies:
+                if len(currency) != 3 or currency != currency.upper():
+                    return jsonify(
+                        {"error": f"Invalid currency '{currency}'. Use uppercase 'XXX'"}
+                    ), 400
+
+        last_event_id = request.headers.get("Last-Event-ID")
+        try:
+            resume_from = int(last_event_id) if last_event_id else None
+        except ValueError:
+            resume_from = None
+
+        snapshot = rate_snapshot_cache.get()
+        rate_broadcaster.start(current_app._get_current_object(), snapshot)
+        heartbeat = current_app.config.get("RATE_STREAM_HEARTBEAT_SECONDS", 15)
+        max_subscribers = current_app.config.get("RATE_STREAM_MAX_SUBSCRIBERS", 100)
+    except Exception as e:
+        logger.error(f"Error opening rates stream: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
+    if not rate_broadcaster.subscribe(max_subscribers):
+        logger.warning(f"Rejected rates stream, {max_subscribers} already open")
+        return (
+            jsonify({"error": "Too many open rate streams, retry later"}),
+            503,
+            {"Retry-After": str(int(heartbeat))},
+        )
+
+    # Not wrapped in stream_with_context: the request (and its database
+    # session) ends here, the stream only reads the shared broadcaster
+    response = Response(
+        _stream_rate_events(snapshot, currencies, resume_from, heartbeat),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs when the server closes the response, even if it was never iterated
+    response.call_on_close(rate_broadcaster.unsubscribe)
+    return response
+
+
 @rates_bp.route("/<string:base_or_target>", methods=["GET"])
-@require_jwt
+@require_jwt_or_api_key("rates:read")
 def get_rates_for_currency(base_or_target):
     try:
-        error = CurrencyPair.validate_currency(base_or_target)
-        if error:
-            return jsonify({"error": error}), 400
+        currency = base_or_target.strip().upper()
 
-        # Fetch rates for this currency
-        rates = AggregatedRate.get_latest_for_currency(base_or_target)
+        # Fetch rates for this currency from the in-memory snapshot
+        rates = rate_snapshot_cache.get().for_currency(currency)
         if not rates:
+            # Only unknown currencies need the database validation
+            error = CurrencyPair.validate_currency(currency)
+            if error:
+                return jsonify({"error": error}), 400
             return jsonify({}), 200
 
         return jsonify(rates)
@@ -46,18 +318,73 @@ def get_rates_for_currency(base_or_target):
         return jsonify({"error": "Internal Server Error"}), 500
 
 
+@rates_bp.route("/convert/<string:from_currency>/<string:to_currency>", methods=["GET"])
+@require_jwt_or_api_key("rates:read")
+def convert(from_currency, to_currency):
+    """
+    Get the rate between any two currencies, triangulated through the stored pairs.
+    Query params:
+    - amount: Amount of from_currency to convert (optional)
+    """
+    try:
+        for currency in (from_currency, to_currency):
+            if len(currency) != 3 or currency != currency.upper():
+                return jsonify(
+                    {"error": f"Invalid currency '{currency}'. Use uppercase 'XXX'"}
+                ), 400
+
+        if from_currency == to_currency:
+            return jsonify({"error": "Currencies must be different"}), 400
+
+        amount = request.args.get("amount")
+        try:
+            amount = float(amount) if amount is not None else None
+        except ValueError:
+            return jsonify({"error": "amount must be a number"}), 400
+
+        snapshot = rate_snapshot_cache.get()
+        rate = snapshot.graph.cross_rate(from_currency, to_currency)
+        if not rate:
+            return jsonify(
+                {"error": f"No conversion route for {from_currency}-{to_currency}"}
+            ), 404
+
+        response = {**rate, "generation": snapshot.generation}
+        if amount is not None:
+            response.update(
+                {
+                    "amount": amount,
+                    "converted_buy_amount": amount * rate["final_buy_rate"],
+                    "converted_sell_amount": amount * rate["final_sell_rate"],
+                }
+            )
+
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"Error converting {from_currency}-{to_currency}: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
+
 @rates_bp.route("/historical", methods=["GET"])
-@require_jwt
+@require_jwt_or_api_key("rates:historical")
 def get_historical():
     """
-    Get historical aggregated rates.
+    Get historical aggregated rates, keyset-paginated on (aggregated_at, id).
+    With interval, OHLC rollups are returned instead, keyset-paginated on (bucket_start, id).
     Query params:
     - base: Base currency (optional)
     - target: Target currency (optional)
     - from_date: Start date (YYYY-MM-DD format, optional, default: 7 days ago)
     - to_date: End date (YYYY-MM-DD format, optional, default: today)
-    - limit: Maximum number of records (optional, default: 100, max: 1000)
+    - limit: Maximum number of records per page (optional, default: 100, max: 1000)
     - order: 'asc' or 'desc' (optional, default: 'desc')
+    - cursor: next_cursor from a previous page (optional)
+    - interval: 'hour', 'day' or 'week' to read OHLC rollups (optional)
+    - source: 'refresh' or 'stream' to only return raw rates of that source
+      (optional, rollups only cover refresh rates)
+    - format: 'json' or 'ndjson' (optional, default: 'json').
+      'ndjson' streams every matching row, one JSON object per line; limit is
+      optional and uncapped in this mode.
     """
     try:
         base_currency = (
@@ -68,81 +395,61 @@ def get_historical():
             if request.args.get("target")
             else None
         )
-        from_date_str = request.args.get("from_date")
-        to_date_str = request.args.get("to_date")
-        limit = min(int(request.args.get("limit", 100)), 1000)  # Max 1000 records
         order = request.args.get("order", "desc").lower()
+        response_format = request.args.get("format", "json").lower()
+        interval = request.args.get("interval")
+        interval = interval.lower() if interval else None
+        source = request.args.get("source")
 
         # Validate order parameter
         if order not in ["asc", "desc"]:
             return jsonify({"error": "Order must be 'asc' or 'desc'"}), 400
 
-        # Parse dates
-        try:
-            if from_date_str:
-                from_date = datetime.strptime(from_date_str, "%Y-%m-%d")
-            else:
-                from_date = datetime.now() - timedelta(days=7)  # Default: 7 days ago
-
-            if to_date_str:
-                to_date = datetime.strptime(to_date_str, "%Y-%m-%d")
-                # Add 23:59:59 to include the entire day
-                to_date = to_date.replace(hour=23, minute=59, second=59)
-            else:
-                to_date = datetime.now()  # Default: now
+        if response_format not in ["json", "ndjson"]:
+            return jsonify({"error": "Format must be 'json' or 'ndjson'"}), 400
 
-        except ValueError:
-            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        if interval and interval not in AggregatedRateRollup.INTERVALS:
+            return jsonify({"error": "Interval must be 'hour', 'day' or 'week'"}), 400
 
-        # Validate date range
-        if from_date > to_date:
-            return jsonify({"error": "from_date cannot be later than to_date"}), 400
+        if source and source not in AggregatedRate.SOURCES:
+            return jsonify({"error": "Source must be 'refresh' or 'stream'"}), 400
 
-        # Build query
-        query = (
-            db.session.query(AggregatedRate, CurrencyPair)
-            .join(CurrencyPair, AggregatedRate.currency_pair_id == CurrencyPair.id)
-            .filter(AggregatedRate.aggregated_at >= from_date)
-            .filter(AggregatedRate.aggregated_at <= to_date)
-        )
+        try:
+            limit = _parse_historical_limit(streaming=response_format == "ndjson")
+            from_date, to_date = _parse_date_range(
+                request.args.get("from_date"), request.args.get("to_date")
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Apply currency filters if provided
-        if base_currency:
-            # Validate base currency
-            error = CurrencyPair.validate_currency(base_currency)
-            if error:
-                return jsonify({"error": f"Invalid base currency: {error}"}), 400
-            query = query.filter(CurrencyPair.base_currency == base_currency)
+        # Build query, rollups are read instead of raw rows when an interval is given
+        query, model, time_column = _historical_query(
+            interval, from_date, to_date, source
+        )
 
-        if target_currency:
-            # Validate target currency
-            error = CurrencyPair.validate_currency(target_currency)
-            if error:
-                return jsonify({"error": f"Invalid target currency: {error}"}), 400
-            query = query.filter(CurrencyPair.target_currency == target_currency)
+        try:
+            query = _filter_currencies(query, base_currency, target_currency)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Apply ordering
-        if order == "desc":
-            query = query.order_by(AggregatedRate.aggregated_at.desc())
-        else:
-            query = query.order_by(AggregatedRate.aggregated_at.asc())
+        try:
+            query = _apply_keyset(
+                query, model, time_column, order, request.args.get("cursor")
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
 
-        # Apply limit
-        results = query.limit(limit).all()
+        if response_format == "ndjson":
+            return _stream_historical(query, limit)
 
-        # Serialize results
-        historical_rates = []
-        for agg_rate, currency_pair in results:
-            rate_dict = agg_rate.to_dict()
-            rate_dict["base_currency"] = currency_pair.base_currency
-            rate_dict["target_currency"] = currency_pair.target_currency
-            historical_rates.append(rate_dict)
+        historical_rates, next_cursor = _historical_page(query, limit, time_column)
 
         logger.info(f"Fetched {len(historical_rates)} historical rates")
         return jsonify(
             {
                 "historical_rates": historical_rates,
                 "count": len(historical_rates),
+                "next_cursor": next_cursor,
                 "filters": {
                     "base_currency": base_currency,
                     "target_currency": target_currency,
@@ -150,6 +457,8 @@ def get_historical():
                     "to_date": to_date.strftime("%Y-%m-%d"),
                     "limit": limit,
                     "order": order,
+                    "interval": interval,
+                    "source": source,
                 },
             }
         )
@@ -4,13 +4,29 @@ from functools import wraps
 from flask import g, jsonify, request
 from loguru import logger
 
+from app.services.api_keys import ApiKeyConfigError, api_keys
 from app.services.auth_service import AuthService
+from app.services.principal_cache import principal_cache
+from app.services.token_versions import token_versions
+
+
+def _resolve_principal(token: str):
+    """
+    Cached principal for the token while its token version is current,
+    resolved through AuthService otherwise.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None and token_versions.check(
+        principal.id, principal.token_version
+    ):
+        return principal
+    return AuthService().get_principal_from_token(token)
 
 
 def require_jwt(f):
     """
     Decorator to require valid JWT authentication.
-    Sets g.current_user for use in the endpoint.
+    Sets g.current_user (a cached Principal) for use in the endpoint.
     """
 
     @wraps(f)
@@ -22,8 +38,7 @@ def require_jwt(f):
 
             token = auth_header.split(" ")[1]
 
-            auth_service = AuthService()
-            user = auth_service.get_user_from_token(token)
+            user = _resolve_principal(token)
 
             if not user:
                 return jsonify({"error": "Invalid or expired token"}), 401
@@ -39,6 +54,47 @@ def require_jwt(f):
     return decorated_function
 
 
+def require_jwt_or_api_key(scope: str):
+    """
+    Decorator factory accepting either a JWT (see @require_jwt) or an API key
+    granted `scope`, sent in the X-API-Key header.
+    Sets g.api_key (an ApiKeyPrincipal) for requests authenticated by key.
+    """
+
+    def decorator(f):
+        jwt_protected = require_jwt(f)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = request.headers.get("X-API-Key")
+            if not key:
+                return jwt_protected(*args, **kwargs)
+
+            try:
+                api_key = api_keys.authenticate(key)
+            except ApiKeyConfigError as e:
+                logger.error(f"API key auth is not configured: {e}")
+                return jsonify({"error": "API key authentication is unavailable"}), 503
+            except Exception as e:
+                logger.error(f"API key auth error: {e}")
+                return jsonify({"error": "Authentication failed"}), 401
+
+            if not api_key:
+                return jsonify({"error": "Invalid or expired API key"}), 401
+
+            if scope not in api_key.scopes:
+                return jsonify({"error": f"API key lacks the '{scope}' scope"}), 403
+
+            api_keys.record_use(api_key)
+            g.api_key = api_key
+
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
+
 def require_admin(f):
     """
     Decorator to require admin authentication.
@@ -78,8 +134,7 @@ def require_jwt_admin(f):
 
             token = auth_header.split(" ")[1]
 
-            auth_service = AuthService()
-            user = auth_service.get_user_from_token(token)
+            user = _resolve_principal(token)
 
             if not user:
                 return jsonify({"error": "Invalid or expired token"}), 401
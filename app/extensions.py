@@ -1,3 +1,47 @@
+import time
+
+import redis
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from loguru import logger
 
 db = SQLAlchemy()
+
+# Seconds to wait before retrying an unreachable Redis server
+REDIS_RETRY_SECONDS = 30
+
+_redis_client = None
+_redis_retry_at = 0.0
+
+
+def get_redis():
+    """
+    Get the shared Redis client used for state that spans workers.
+    Returns None when REDIS_URL is not configured or the server is unreachable,
+    so callers can fall back to process-local state.
+    """
+    global _redis_client, _redis_retry_at
+
+    if _redis_client is not None:
+        return _redis_client
+
+    if time.monotonic() < _redis_retry_at:
+        return None
+
+    redis_url = current_app.config.get("REDIS_URL")
+    if not redis_url:
+        _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        return None
+
+    try:
+        client = redis.Redis.from_url(
+            redis_url, decode_responses=True, socket_timeout=2
+        )
+        client.ping()
+    except redis.RedisError as e:
+        logger.warning(f"Redis unavailable at {redis_url}, using local state: {e}")
+        _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        return None
+
+    _redis_client = client
+    return _redis_client
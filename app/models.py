@@ -1,3 +1,6 @@
+from collections import defaultdict
+
+from sqlalchemy import text
 from sqlalchemy.sql import func
 
 from .extensions import db
@@ -23,6 +26,8 @@ class CurrencyPair(db.Model):
     target_currency = db.Column(db.String(3), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     markup_percentage = db.Column(db.Numeric(5, 4), default=0.1000)
+    # Higher priority pairs are refreshed first when provider quota is tight
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, server_default=func.now())
     rates = db.relationship("Rate", backref="currency_pair", lazy=True)
     aggregated_rates = db.relationship(
@@ -43,6 +48,7 @@ class CurrencyPair(db.Model):
             "markup_percentage": float(self.markup_percentage)
             if self.markup_percentage
             else None,
+            "priority": self.priority,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
 
@@ -111,6 +117,10 @@ class Rate(db.Model):
 class AggregatedRate(db.Model):
     __tablename__ = "aggregated_rates"
 
+    # 'refresh': aggregate of every provider, written by the refresh job
+    # 'stream': single-feed rate from the tick stream (provider_count 1)
+    SOURCES = ("refresh", "stream")
+
     id = db.Column(db.Integer, primary_key=True)
     currency_pair_id = db.Column(db.Integer, db.ForeignKey("currency_pairs.id"))
     average_buy_rate = db.Column(db.Numeric(18, 8), nullable=False)
@@ -119,12 +129,17 @@ class AggregatedRate(db.Model):
     final_sell_rate = db.Column(db.Numeric(18, 8), nullable=False)
     markup_percentage = db.Column(db.Numeric(5, 4), nullable=False)
     provider_count = db.Column(db.Integer, nullable=False)
+    source = db.Column(
+        db.String(20), nullable=False, server_default="refresh", default="refresh"
+    )
     aggregated_at = db.Column(db.DateTime, nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, server_default=func.now())
 
     __table_args__ = (
         db.Index("idx_aggregated_pair_time", "currency_pair_id", "aggregated_at"),
+        # Lets the rates snapshot read max(expires_at) as its generation
+        db.Index("idx_aggregated_expires_at", "expires_at"),
     )
 
     @classmethod
@@ -199,79 +214,84 @@ class AggregatedRate(db.Model):
         )
 
     @classmethod
-    def get_latest_for_currency(cls, any_currency: str):
+    def get_latest_with_pairs(cls, currency: str = None):
         """
-        Derive the latest aggregated rate for a specific currency.
-        It can either be a base or target currency.
-        If not base currency, find it in target currencies, invert rates and return results.
-        Returns a list of dictionaries with normalized rates where the specified currency is the base.
+        Get the latest aggregated rate for each active currency pair in a single
+        query. Uses DISTINCT ON so every pair resolves to one row, joined to its
+        CurrencyPair.
+        Optionally restricted to pairs where the currency is either base or target.
+        Returns a list of (AggregatedRate, CurrencyPair) tuples, newest first.
         """
-        any_currency = any_currency.upper()
-        results = []
-
-        # Get rates where the currency is the base currency
-        base_rates = cls.get_latest_for_base(any_currency)
-        for rate in base_rates:
-            rate_dict = rate.to_dict_with_pair()
-            results.append(rate_dict)
-
-        # Get rates where the currency is the target currency (need to invert)
-        subquery = (
-            db.session.query(
-                cls.currency_pair_id,
-                func.max(cls.aggregated_at).label("max_aggregated_at"),
-            )
+        query = (
+            db.session.query(cls, CurrencyPair)
             .join(CurrencyPair, cls.currency_pair_id == CurrencyPair.id)
-            .filter(CurrencyPair.target_currency == any_currency)
-            .group_by(cls.currency_pair_id)
-            .subquery()
+            .filter(CurrencyPair.is_active.is_(True))
+            .distinct(cls.currency_pair_id)
+            .order_by(cls.currency_pair_id, cls.aggregated_at.desc(), cls.id.desc())
         )
 
-        target_rates = (
-            db.session.query(cls, CurrencyPair)
-            .join(CurrencyPair, cls.currency_pair_id == CurrencyPair.id)
-            .join(
-                subquery,
-                (cls.currency_pair_id == subquery.c.currency_pair_id)
-                & (cls.aggregated_at == subquery.c.max_aggregated_at),
+        if currency:
+            currency = currency.upper()
+            query = query.filter(
+                (CurrencyPair.base_currency == currency)
+                | (CurrencyPair.target_currency == currency)
+            )
+
+        rows = query.all()
+        # DISTINCT ON dictates the SQL ordering, restore newest-first in memory
+        rows.sort(key=lambda row: row[0].aggregated_at, reverse=True)
+        return rows
+
+    @classmethod
+    def get_latest_per_source(cls):
+        """
+        Get the latest aggregated rate for each currency pair and source in a
+        single query, so a pair's newest stream rate does not hide its newest
+        refresh rate. Returns a list of AggregatedRate objects.
+        """
+        return (
+            db.session.query(cls)
+            .distinct(cls.currency_pair_id, cls.source)
+            .order_by(
+                cls.currency_pair_id,
+                cls.source,
+                cls.aggregated_at.desc(),
+                cls.id.desc(),
             )
-            .order_by(cls.aggregated_at.desc())
             .all()
         )
 
-        # Invert rates for target currency pairs
-        for rate, pair in target_rates:
-            inverted_dict = {
-                "id": rate.id,
-                "currency_pair_id": rate.currency_pair_id,
-                "base_currency": pair.target_currency,  # Swap: target becomes base
-                "target_currency": pair.base_currency,  # Swap: base becomes target
-                "average_buy_rate": float(1 / rate.average_sell_rate)
-                if rate.average_sell_rate
-                else None,  # Invert sell to buy
-                "average_sell_rate": float(1 / rate.average_buy_rate)
-                if rate.average_buy_rate
-                else None,  # Invert buy to sell
-                "final_buy_rate": float(1 / rate.final_sell_rate)
-                if rate.final_sell_rate
-                else None,
-                "final_sell_rate": float(1 / rate.final_buy_rate)
-                if rate.final_buy_rate
-                else None,
-                "markup_percentage": float(rate.markup_percentage)
-                if rate.markup_percentage
-                else None,
-                "provider_count": rate.provider_count,
-                "aggregated_at": rate.aggregated_at.isoformat()
-                if rate.aggregated_at
-                else None,
-                "expires_at": rate.expires_at.isoformat() if rate.expires_at else None,
-                "created_at": rate.created_at.isoformat() if rate.created_at else None,
-                "inverted": True,  # Flag to indicate this rate was inverted
-            }
-            results.append(inverted_dict)
-
-        return results
+    @staticmethod
+    def group_by_currency(rows) -> dict:
+        """
+        Build the per-currency view from (AggregatedRate, CurrencyPair) rows.
+        Each currency lists the pairs where it is the base first, followed by
+        the inverted pairs where it is the target.
+        Returns a dictionary with currency codes as keys and lists of rate dicts as values.
+        """
+        direct = defaultdict(list)
+        inverted = defaultdict(list)
+
+        for rate, pair in rows:
+            direct[pair.base_currency].append(rate.to_dict_with_pair(pair))
+            inverted[pair.target_currency].append(rate.to_inverted_dict(pair))
+
+        return {
+            currency: direct.get(currency, []) + inverted.get(currency, [])
+            for currency in direct.keys() | inverted.keys()
+        }
+
+    @classmethod
+    def get_latest_for_currency(cls, any_currency: str):
+        """
+        Derive the latest aggregated rate for a specific currency.
+        It can either be a base or target currency.
+        If not base currency, find it in target currencies, invert rates and return results.
+        Returns a list of dictionaries with normalized rates where the specified currency is the base.
+        """
+        any_currency = any_currency.upper()
+        rows = cls.get_latest_with_pairs(any_currency)
+        return cls.group_by_currency(rows).get(any_currency, [])
 
     def to_dict(self):
         """Serialize AggregatedRate to dictionary."""
@@ -294,6 +314,7 @@ class AggregatedRate(db.Model):
             if self.markup_percentage
             else None,
             "provider_count": self.provider_count,
+            "source": self.source,
             "aggregated_at": self.aggregated_at.isoformat()
             if self.aggregated_at
             else None,
@@ -301,6 +322,38 @@ class AggregatedRate(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
 
+    def to_inverted_dict(self, pair: CurrencyPair):
+        """Serialize AggregatedRate with the currency pair swapped and rates inverted."""
+        return {
+            "id": self.id,
+            "currency_pair_id": self.currency_pair_id,
+            "base_currency": pair.target_currency,  # Swap: target becomes base
+            "target_currency": pair.base_currency,  # Swap: base becomes target
+            "average_buy_rate": float(1 / self.average_sell_rate)
+            if self.average_sell_rate
+            else None,  # Invert sell to buy
+            "average_sell_rate": float(1 / self.average_buy_rate)
+            if self.average_buy_rate
+            else None,  # Invert buy to sell
+            "final_buy_rate": float(1 / self.final_sell_rate)
+            if self.final_sell_rate
+            else None,
+            "final_sell_rate": float(1 / self.final_buy_rate)
+            if self.final_buy_rate
+            else None,
+            "markup_percentage": float(self.markup_percentage)
+            if self.markup_percentage
+            else None,
+            "provider_count": self.provider_count,
+            "source": self.source,
+            "aggregated_at": self.aggregated_at.isoformat()
+            if self.aggregated_at
+            else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "inverted": True,  # Flag to indicate this rate was inverted
+        }
+
     @classmethod
     def get_latest_for_all(cls):
         """
@@ -308,39 +361,224 @@ class AggregatedRate(db.Model):
         Each currency will show rates where it's either base or target (with inversion).
         Returns a dictionary with currency codes as keys and their rates as values.
         """
-        currencies_query = (
-            db.session.query(CurrencyPair.base_currency.label("currency"))
-            .union(db.session.query(CurrencyPair.target_currency.label("currency")))
-            .distinct()
-        )
-
-        all_currencies = [row.currency for row in currencies_query]
+        rows = cls.get_latest_with_pairs()
 
-        result = {}
-
-        for currency in all_currencies:
-            currency_rates = cls.get_latest_for_currency(currency)
-            if currency_rates:
-                result[currency] = {
-                    "rates": currency_rates,
-                    "count": len(currency_rates),
-                }
-
-        return result
+        return {
+            currency: {"rates": currency_rates, "count": len(currency_rates)}
+            for currency, currency_rates in cls.group_by_currency(rows).items()
+        }
 
-    def to_dict_with_pair(self):
+    def to_dict_with_pair(self, pair: CurrencyPair = None):
         """Serialize AggregatedRate with currency pair info."""
         data = self.to_dict()
-        if hasattr(self, "currency_pair") and self.currency_pair:
+        pair = pair or getattr(self, "currency_pair", None)
+        if pair:
             data.update(
                 {
-                    "base_currency": self.currency_pair.base_currency,
-                    "target_currency": self.currency_pair.target_currency,
+                    "base_currency": pair.base_currency,
+                    "target_currency": pair.target_currency,
                 }
             )
         return data
 
 
+class AggregatedRateRollup(db.Model):
+    """
+    Open/high/low/close/mean of the final rates per pair and time bucket.
+    Maintained incrementally by RateProcessorService, see refresh_from_aggregated.
+    Only refresh aggregates are rolled up; tick stream rows arrive at a much
+    higher rate from a single feed and would swamp the sample counts and means.
+    """
+
+    __tablename__ = "aggregated_rate_rollups"
+
+    INTERVALS = ("hour", "day", "week")
+
+    id = db.Column(db.Integer, primary_key=True)
+    currency_pair_id = db.Column(
+        db.Integer, db.ForeignKey("currency_pairs.id"), nullable=False
+    )
+    interval = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    open_at = db.Column(db.DateTime, nullable=False)
+    close_at = db.Column(db.DateTime, nullable=False)
+    open_buy_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    high_buy_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    low_buy_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    close_buy_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    mean_buy_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    open_sell_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    high_sell_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    low_sell_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    close_sell_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    mean_sell_rate = db.Column(db.Numeric(18, 8), nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "currency_pair_id",
+            "interval",
+            "bucket_start",
+            name="_pair_interval_bucket_uc",
+        ),
+        db.Index("idx_rollups_interval_bucket", "interval", "bucket_start"),
+    )
+
+    # Rolls aggregated_rates rows up into buckets; on conflict either merges the
+    # new rows into the existing bucket or replaces it (used by the backfill).
+    # Rows are sampled at their aggregated_at, or at now() for rates that were
+    # only extended because their values did not change.
+    _REFRESH_SQL = """
+        INSERT INTO aggregated_rate_rollups AS r (
+            currency_pair_id, interval, bucket_start, open_at, close_at,
+            open_buy_rate, high_buy_rate, low_buy_rate, close_buy_rate, mean_buy_rate,
+            open_sell_rate, high_sell_rate, low_sell_rate, close_sell_rate,
+            mean_sell_rate, sample_count
+        )
+        SELECT
+            a.currency_pair_id,
+            :interval,
+            date_trunc(:interval, {sampled_at}) AS bucket_start,
+            min({sampled_at}),
+            max({sampled_at}),
+            (array_agg(a.final_buy_rate ORDER BY {sampled_at}, a.id))[1],
+            max(a.final_buy_rate),
+            min(a.final_buy_rate),
+            (array_agg(a.final_buy_rate ORDER BY {sampled_at} DESC, a.id DESC))[1],
+            avg(a.final_buy_rate),
+            (array_agg(a.final_sell_rate ORDER BY {sampled_at}, a.id))[1],
+            max(a.final_sell_rate),
+            min(a.final_sell_rate),
+            (array_agg(a.final_sell_rate ORDER BY {sampled_at} DESC, a.id DESC))[1],
+            avg(a.final_sell_rate),
+            count(*)
+        FROM aggregated_rates a
+        WHERE {where}
+        GROUP BY a.currency_pair_id, bucket_start
+        ON CONFLICT (currency_pair_id, interval, bucket_start) DO UPDATE SET {update}
+    """
+
+    _MERGE_SET = """
+        open_buy_rate = CASE WHEN EXCLUDED.open_at < r.open_at
+            THEN EXCLUDED.open_buy_rate ELSE r.open_buy_rate END,
+        open_sell_rate = CASE WHEN EXCLUDED.open_at < r.open_at
+            THEN EXCLUDED.open_sell_rate ELSE r.open_sell_rate END,
+        close_buy_rate = CASE WHEN EXCLUDED.close_at >= r.close_at
+            THEN EXCLUDED.close_buy_rate ELSE r.close_buy_rate END,
+        close_sell_rate = CASE WHEN EXCLUDED.close_at >= r.close_at
+            THEN EXCLUDED.close_sell_rate ELSE r.close_sell_rate END,
+        open_at = LEAST(r.open_at, EXCLUDED.open_at),
+        close_at = GREATEST(r.close_at, EXCLUDED.close_at),
+        high_buy_rate = GREATEST(r.high_buy_rate, EXCLUDED.high_buy_rate),
+        low_buy_rate = LEAST(r.low_buy_rate, EXCLUDED.low_buy_rate),
+        high_sell_rate = GREATEST(r.high_sell_rate, EXCLUDED.high_sell_rate),
+        low_sell_rate = LEAST(r.low_sell_rate, EXCLUDED.low_sell_rate),
+        mean_buy_rate = (r.mean_buy_rate * r.sample_count
+            + EXCLUDED.mean_buy_rate * EXCLUDED.sample_count)
+            / (r.sample_count + EXCLUDED.sample_count),
+        mean_sell_rate = (r.mean_sell_rate * r.sample_count
+            + EXCLUDED.mean_sell_rate * EXCLUDED.sample_count)
+            / (r.sample_count + EXCLUDED.sample_count),
+        sample_count = r.sample_count + EXCLUDED.sample_count,
+        updated_at = now()
+    """
+
+    _REPLACE_SET = """
+        open_at = EXCLUDED.open_at,
+        close_at = EXCLUDED.close_at,
+        open_buy_rate = EXCLUDED.open_buy_rate,
+        high_buy_rate = EXCLUDED.high_buy_rate,
+        low_buy_rate = EXCLUDED.low_buy_rate,
+        close_buy_rate = EXCLUDED.close_buy_rate,
+        mean_buy_rate = EXCLUDED.mean_buy_rate,
+        open_sell_rate = EXCLUDED.open_sell_rate,
+        high_sell_rate = EXCLUDED.high_sell_rate,
+        low_sell_rate = EXCLUDED.low_sell_rate,
+        close_sell_rate = EXCLUDED.close_sell_rate,
+        mean_sell_rate = EXCLUDED.mean_sell_rate,
+        sample_count = EXCLUDED.sample_count,
+        updated_at = now()
+    """
+
+    @classmethod
+    def refresh_from_aggregated(
+        cls, aggregated_rate_ids: list[int] = None, intervals=None
+    ):
+        """
+        Roll aggregated rates up into every interval.
+        With aggregated_rate_ids, the new rows are merged into existing buckets
+        (each id must be applied only once). Without them, every bucket is
+        recomputed from the full aggregated_rates table (backfill).
+        Does not commit.
+        """
+        if aggregated_rate_ids is not None and not aggregated_rate_ids:
+            return
+
+        if aggregated_rate_ids is None:
+            where, update, params = "a.source = 'refresh'", cls._REPLACE_SET, {}
+        else:
+            where = "a.id = ANY(:ids)"
+            update = cls._MERGE_SET
+            params = {"ids": list(aggregated_rate_ids)}
+
+        statement = text(
+            cls._REFRESH_SQL.format(
+                where=where, update=update, sampled_at="a.aggregated_at"
+            )
+        )
+        for interval in intervals or cls.INTERVALS:
+            db.session.execute(statement, {**params, "interval": interval})
+
+    @classmethod
+    def refresh_from_extended(cls, aggregated_rate_ids: list[int], intervals=None):
+        """
+        Count aggregated rates that were carried forward unchanged (their
+        validity extended instead of a new row written) as samples taken now,
+        so the current buckets still see every pair. The backfill only sees
+        stored rows and does not reproduce these samples.
+        Does not commit.
+        """
+        if not aggregated_rate_ids:
+            return
+
+        statement = text(
+            cls._REFRESH_SQL.format(
+                where="a.id = ANY(:ids)",
+                update=cls._MERGE_SET,
+                sampled_at="CAST(now() AS timestamp)",
+            )
+        )
+        for interval in intervals or cls.INTERVALS:
+            db.session.execute(
+                statement, {"ids": list(aggregated_rate_ids), "interval": interval}
+            )
+
+    def to_dict(self):
+        """Serialize AggregatedRateRollup to dictionary."""
+        return {
+            "id": self.id,
+            "currency_pair_id": self.currency_pair_id,
+            "interval": self.interval,
+            "bucket_start": self.bucket_start.isoformat()
+            if self.bucket_start
+            else None,
+            "open_at": self.open_at.isoformat() if self.open_at else None,
+            "close_at": self.close_at.isoformat() if self.close_at else None,
+            "open_buy_rate": float(self.open_buy_rate),
+            "high_buy_rate": float(self.high_buy_rate),
+            "low_buy_rate": float(self.low_buy_rate),
+            "close_buy_rate": float(self.close_buy_rate),
+            "mean_buy_rate": float(self.mean_buy_rate),
+            "open_sell_rate": float(self.open_sell_rate),
+            "high_sell_rate": float(self.high_sell_rate),
+            "low_sell_rate": float(self.low_sell_rate),
+            "close_sell_rate": float(self.close_sell_rate),
+            "mean_sell_rate": float(self.mean_sell_rate),
+            "sample_count": self.sample_count,
+        }
+
+
 class User(db.Model):
     __tablename__ = "users"
 
@@ -352,11 +590,17 @@ class User(db.Model):
     role = db.Column(db.String(50), default="customer")
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
+    # Bumped on logout and on changes to is_active/is_admin/role; tokens
+    # carrying an older version are rejected
+    token_version = db.Column(db.Integer, nullable=False, server_default="0", default=0)
     created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
     created_at = db.Column(db.DateTime, server_default=func.now())
-    updated_at = db.Column(db.DateTime, nullable=True)
+    # Stamped on every ORM update; token_versions syncs from it without Redis
+    updated_at = db.Column(db.DateTime, nullable=True, onupdate=func.now())
     last_login = db.Column(db.DateTime)
 
+    __table_args__ = (db.Index("idx_users_updated_at", "updated_at"),)
+
     creator = db.relationship("User", remote_side=[id], backref="created_users")
 
     def to_dict(self):
@@ -372,3 +616,49 @@ class User(db.Model):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "last_login": self.last_login.isoformat() if self.last_login else None,
         }
+
+
+class ApiKey(db.Model):
+    """
+    Long-lived, scoped credential for machine clients.
+    Only a keyed hash of the key is stored, see app.services.api_keys.
+    """
+
+    __tablename__ = "api_keys"
+
+    SCOPES = ("rates:read", "rates:stream", "rates:historical")
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    # Leading characters of the key, to tell keys apart in listings
+    prefix = db.Column(db.String(16), nullable=False)
+    key_hash = db.Column(db.String(64), unique=True, nullable=False)
+    # Space-separated, e.g. "rates:read rates:stream"
+    scopes = db.Column(db.String(255), nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    created_at = db.Column(db.DateTime, server_default=func.now())
+    expires_at = db.Column(db.DateTime, nullable=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+    # Maintained in batches by the API processes, so slightly behind
+    last_used_at = db.Column(db.DateTime, nullable=True)
+    usage_count = db.Column(
+        db.BigInteger, nullable=False, server_default="0", default=0
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "prefix": self.prefix,
+            "scopes": self.scopes.split(),
+            "is_active": self.is_active,
+            "created_by": self.created_by,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "revoked_at": self.revoked_at.isoformat() if self.revoked_at else None,
+            "last_used_at": self.last_used_at.isoformat()
+            if self.last_used_at
+            else None,
+            "usage_count": self.usage_count,
+        }
@@ -0,0 +1,104 @@
+# API key service for issuing and revoking machine client keys
+from datetime import UTC, datetime, timedelta
+
+from loguru import logger
+
+from app.extensions import db
+from app.models import ApiKey
+from app.services.api_keys import ApiKeyConfigError, api_keys, generate_key, hash_key
+
+
+class ApiKeyService:
+    @staticmethod
+    def create_api_key(
+        name: str,
+        scopes: list[str],
+        created_by_user_id: int = None,
+        expires_in_days: int = None,
+    ) -> dict:
+        """
+        Issue a new API key. The key itself is only returned here; it cannot be
+        recovered later, only revoked and replaced.
+        """
+        try:
+            name = (name or "").strip()
+            if not name:
+                return {"success": False, "message": "name is required"}
+
+            if not scopes:
+                return {"success": False, "message": "At least one scope is required"}
+
+            unknown = sorted(set(scopes) - set(ApiKey.SCOPES))
+            if unknown:
+                return {
+                    "success": False,
+                    "message": f"Unknown scopes: {', '.join(unknown)}. "
+                    f"Available: {', '.join(ApiKey.SCOPES)}",
+                }
+
+            key = generate_key()
+            try:
+                key_hash = hash_key(key)
+            except ApiKeyConfigError as e:
+                logger.error(f"Cannot create API keys: {e}")
+                return {"success": False, "message": str(e)}
+
+            api_key = ApiKey(
+                name=name,
+                prefix=key[:12],
+                key_hash=key_hash,
+                scopes=" ".join(sorted(set(scopes))),
+                is_active=True,
+                created_by=created_by_user_id,
+                expires_at=datetime.now(UTC) + timedelta(days=expires_in_days)
+                if expires_in_days
+                else None,
+            )
+
+            db.session.add(api_key)
+            db.session.commit()
+            api_keys.invalidate()
+
+            logger.info(
+                f"API key {api_key.prefix} ({name}) created by user_id: {created_by_user_id}"
+            )
+            return {
+                "success": True,
+                "message": "API key created successfully",
+                "key": key,
+                "api_key": api_key.to_dict(),
+            }
+
+        except Exception as e:
+            logger.error(f"Error creating API key: {e}")
+            db.session.rollback()
+            return {"success": False, "message": "Failed to create API key"}
+
+    @staticmethod
+    def list_api_keys() -> list[dict]:
+        return [api_key.to_dict() for api_key in ApiKey.query.order_by(ApiKey.id)]
+
+    @staticmethod
+    def revoke_api_key(key_id: int) -> dict:
+        try:
+            api_key = db.session.get(ApiKey, key_id)
+            if api_key is None:
+                return {"success": False, "message": "API key not found"}
+
+            if api_key.is_active:
+                api_key.is_active = False
+                api_key.revoked_at = datetime.now(UTC)
+                db.session.commit()
+                api_keys.invalidate()
+                logger.info(f"API key {api_key.prefix} ({api_key.name}) revoked")
+
+            return {
+                "success": True,
+                "message": "API key revoked",
+                "api_key": api_key.to_dict(),
+            }
+
+        except Exception as e:
+            logger.error(f"Error revoking API key: {e}")
+            db.session.rollback()
+            return {"success": False, "message": "Failed to revoke API key"}
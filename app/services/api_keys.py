@@ -0,0 +1,238 @@
+# API key index
+"""
+Authentication of machine clients by API key.
+
+Keys are random tokens shown once at creation; the database only keeps an
+HMAC-SHA256 of them keyed by API_KEY_HASH_SECRET. The keys are high-entropy,
+so a fast keyed hash is enough, unlike the Argon2 needed for passwords. The
+secret has no default and may not be the JWT secret, so leaking one of them
+does not expose the other.
+
+Every process holds the active keys in a hash -> ApiKeyPrincipal map, so
+authenticating costs one HMAC and a dict lookup. Every API_KEY_SYNC_SECONDS the
+map's epoch is checked and the map reloaded when a key was created or revoked
+anywhere: a Redis counter, or without Redis a one-row summary of the api_keys
+table. Either way the map is also reloaded every API_KEY_REFRESH_SECONDS.
+Uses are counted in memory and added to the api_keys rows by a background
+thread every API_KEY_USAGE_FLUSH_SECONDS, one batched UPDATE per flush.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime
+
+import redis
+from flask import current_app
+from loguru import logger
+from sqlalchemy import bindparam, func
+
+from app.extensions import db, get_redis
+from app.models import ApiKey
+
+KEY_PREFIX = "wrm_"
+EPOCH_KEY = "auth:api_keys:epoch"
+
+
+class ApiKeyConfigError(Exception):
+    """Raised when API keys are used without a usable API_KEY_HASH_SECRET."""
+
+
+def generate_key() -> str:
+    return KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+def hash_key(key: str) -> str:
+    config = current_app.config
+    secret = config.get("API_KEY_HASH_SECRET")
+    if not secret:
+        raise ApiKeyConfigError("API_KEY_HASH_SECRET is not set")
+    if secret == config.get("JWT_SECRET_KEY"):
+        raise ApiKeyConfigError("API_KEY_HASH_SECRET must differ from JWT_SECRET_KEY")
+    return hmac.new(secret.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
+class ApiKeyPrincipal:
+    """Read-only view of an active API key, shared between requests."""
+
+    __slots__ = ("id", "name", "scopes", "expires_at")
+
+    def __init__(self, id: int, name: str, scopes: frozenset, expires_at: float):
+        self.id = id
+        self.name = name
+        self.scopes = scopes
+        self.expires_at = expires_at
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "scopes": sorted(self.scopes)}
+
+
+class ApiKeyIndex:
+    """Process-local map of active key hashes, plus pending usage counts."""
+
+    def __init__(self):
+        self._keys: dict[str, ApiKeyPrincipal] = {}
+        self._epoch = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._usage: Counter = Counter()
+        self._last_used: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def authenticate(self, key: str) -> ApiKeyPrincipal | None:
+        """The active, unexpired key matching `key`, or None."""
+        if not key.startswith(KEY_PREFIX):
+            return None
+        self._sync()
+        principal = self._keys.get(hash_key(key))
+        if principal is None or (
+            principal.expires_at is not None and principal.expires_at <= time.time()
+        ):
+            return None
+        return principal
+
+    def record_use(self, principal: ApiKeyPrincipal):
+        """Count an authorized request; written on the next flush."""
+        with self._lock:
+            self._usage[principal.id] += 1
+            self._last_used[principal.id] = datetime.now(UTC)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    args=(current_app._get_current_object(),),
+                    name="api-key-usage",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def invalidate(self):
+        """Reload here on next use and, through Redis, in every other process."""
+        self._loaded_at = 0.0
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.incr(EPOCH_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish API key change to Redis: {e}")
+
+    def flush(self):
+        """Add the pending usage counts to the api_keys rows."""
+        with self._lock:
+            usage, self._usage = self._usage, Counter()
+            last_used, self._last_used = self._last_used, {}
+        if not usage:
+            return
+
+        table = ApiKey.__table__
+        try:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == bindparam("key_id"))
+                .values(
+                    usage_count=table.c.usage_count + bindparam("uses"),
+                    last_used_at=bindparam("used_at"),
+                ),
+                [
+                    {"key_id": key_id, "uses": uses, "used_at": last_used[key_id]}
+                    for key_id, uses in usage.items()
+                ],
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self._usage.update(usage)
+                for key_id, used_at in last_used.items():
+                    self._last_used.setdefault(key_id, used_at)
+            raise
+        logger.debug(f"Flushed usage of {len(usage)} API keys")
+
+    def _sync(self):
+        now = time.monotonic()
+        config = current_app.config
+        if self._loaded_at and now - self._checked_at < config.get(
+            "API_KEY_SYNC_SECONDS", 1
+        ):
+            return
+        self._checked_at = now
+
+        client = get_redis()
+        if client is not None:
+            try:
+                epoch = client.get(EPOCH_KEY)
+            except redis.RedisError as e:
+                logger.warning(f"Could not sync API keys from Redis: {e}")
+                client = None
+        if client is None:
+            epoch = self._table_epoch()
+
+        if (
+            not self._loaded_at
+            or epoch != self._epoch
+            or now - self._loaded_at >= config.get("API_KEY_REFRESH_SECONDS", 60)
+        ):
+            self._load(epoch)
+
+    @staticmethod
+    def _table_epoch() -> tuple:
+        """
+        Stand-in for the Redis epoch: creating a key moves max(id), revoking or
+        deactivating one moves the active count or max(revoked_at).
+        """
+        return tuple(
+            db.session.query(
+                func.max(ApiKey.id),
+                func.count(ApiKey.id).filter(ApiKey.is_active.is_(True)),
+                func.max(ApiKey.revoked_at),
+            ).one()
+        )
+
+    def _load(self, epoch):
+        rows = db.session.query(
+            ApiKey.id, ApiKey.name, ApiKey.key_hash, ApiKey.scopes, ApiKey.expires_at
+        ).filter(ApiKey.is_active.is_(True))
+        keys = {
+            key_hash: ApiKeyPrincipal(
+                key_id,
+                name,
+                frozenset(scopes.split()),
+                expires_at.replace(tzinfo=expires_at.tzinfo or UTC).timestamp()
+                if expires_at
+                else None,
+            )
+            for key_id, name, key_hash, scopes, expires_at in rows
+        }
+        self._keys = keys
+        self._epoch = epoch
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} active API keys")
+
+    def _run(self, app):
+        interval = app.config.get("API_KEY_USAGE_FLUSH_SECONDS", 10)
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.exception(f"Failed to flush API key usage: {e}")
+
+    def _forget(self):
+        # The flush thread does not survive a fork, and the parent's
+        # pending counts are its own to flush
+        self._thread = None
+        self._usage = Counter()
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+
+api_keys = ApiKeyIndex()
+
+os.register_at_fork(after_in_child=api_keys._forget)
@@ -0,0 +1,131 @@
+# Async fetch engine
+"""
+asyncio building blocks for provider requests.
+
+A single event loop and one aiohttp session can keep hundreds of provider
+requests in flight from one thread. Backoff sleeps yield to the loop instead of
+blocking a worker thread, and a whole batch is bounded by one deadline.
+Circuit breaker and quota state live in Redis, so those checks run in the
+default executor rather than stalling every other request on the loop.
+"""
+
+import asyncio
+
+import aiohttp
+from flask import current_app, has_app_context
+from loguru import logger
+
+from app.services.providers.circuit_breaker import circuit_breakers
+from app.services.providers.latency import provider_latencies
+from app.services.providers.quota import quota_scheduler
+
+
+def exponential_backoff(attempt, base=0.5, factor=2.0, max_backoff=8.0):
+    return min(base * (factor ** (attempt - 1)), max_backoff)
+
+
+def open_http_session(limit: int = None, limit_per_host: int = None):
+    """
+    Create an aiohttp session for one event loop.
+    Must be called (and closed) inside the loop that uses it.
+    """
+    config = current_app.config if has_app_context() else {}
+    limit = limit or config.get("REFRESH_MAX_CONCURRENCY", 16)
+    # Per-provider caps are enforced by the callers, not per host
+    connector = aiohttp.TCPConnector(
+        limit=limit, limit_per_host=limit_per_host or limit
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={"Accept-Encoding": "gzip, deflate"},
+        raise_for_status=True,
+    )
+
+
+def remaining(deadline: float | None) -> float | None:
+    """Seconds left until a loop.time() deadline, or None when unbounded."""
+    if deadline is None:
+        return None
+    return max(deadline - asyncio.get_running_loop().time(), 0.0)
+
+
+async def fetch_with_retry(provider, session, *args, deadline: float = None, **kwargs):
+    """
+    Call provider.get_rates_async with exponential backoff.
+    Gives up early when the next backoff would overrun the deadline, and
+    without calling the provider at all while its circuit breaker is open or
+    its quota is used up. A half-open probe that ends without an outcome, e.g.
+    cancelled by a hedge or the batch deadline, is released.
+    """
+    name = provider.__class__.__name__
+    max_attempts = getattr(provider, "max_retries", 3)
+    for attempt in range(1, max_attempts + 1):
+        half_open = await asyncio.to_thread(
+            circuit_breakers.ensure_available, provider.name
+        )
+        await asyncio.to_thread(quota_scheduler.acquire, provider.name)
+        if half_open:
+            # Not awaited: a cancellation here must not leave the probe claimed
+            circuit_breakers.claim_probe(provider.name)
+        settled = False
+        started = asyncio.get_running_loop().time()
+        try:
+            logger.info(f"Attempt {attempt}: Fetching rates from {name}")
+            result = await provider.get_rates_async(session, *args, **kwargs)
+            provider_latencies.record(
+                provider.name, asyncio.get_running_loop().time() - started
+            )
+            await asyncio.to_thread(circuit_breakers.record_success, provider.name)
+            settled = True
+            return result
+        except Exception as e:
+            logger.warning(f"Attempt {attempt} failed for {name}: {e}")
+            if isinstance(e, TimeoutError):
+                # Stalls count towards the tail; fast failures would skew it down
+                provider_latencies.record(
+                    provider.name, asyncio.get_running_loop().time() - started
+                )
+            await asyncio.to_thread(circuit_breakers.record_failure, provider.name, e)
+            settled = True
+            if attempt == max_attempts or await asyncio.to_thread(
+                circuit_breakers.is_open, provider.name
+            ):
+                raise
+            backoff = exponential_backoff(attempt)
+            left = remaining(deadline)
+            if left is not None and backoff >= left:
+                raise
+            logger.info(f"Backing off for {backoff} seconds before retrying {name}")
+            await asyncio.sleep(backoff)
+        finally:
+            if half_open and not settled:
+                circuit_breakers.release_probe(provider.name)
+
+
+async def gather_with_deadline(aws: dict, timeout: float = None) -> dict:
+    """
+    Run awaitables concurrently and return {key: result or exception}.
+    Anything still running when the timeout expires is cancelled and reported
+    as TimeoutError, so one slow request cannot hold up the batch.
+    """
+    if not aws:
+        return {}
+
+    tasks = {asyncio.ensure_future(aw): key for key, aw in aws.items()}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.warning(f"{len(pending)} provider requests cancelled at the deadline")
+
+    results = {}
+    for task, key in tasks.items():
+        if task in pending:
+            results[key] = TimeoutError(f"Deadline exceeded for {key}")
+        elif task.exception() is not None:
+            results[key] = task.exception()
+        else:
+            results[key] = task.result()
+    return results
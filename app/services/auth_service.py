@@ -2,45 +2,55 @@ import re
 from datetime import UTC, datetime, timedelta
 
 import jwt
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
 from email_validator import EmailNotValidError, validate_email
 from flask import current_app as app
 from loguru import logger
 
 from app.extensions import db
 from app.models import User
+from app.services.email_deliverability import email_deliverability
+from app.services.password_hashing import password_hashing
+from app.services.principal_cache import Principal, principal_cache
+from app.services.token_versions import token_versions
+from app.utils.exceptions import ServiceOverloadedError
 
 
 class AuthService:
     def __init__(self):
-        self.password_hasher = PasswordHasher()
         self.jwt_secret = app.config["JWT_SECRET_KEY"]
         self.jwt_algorithm = "HS256"
         self.jwt_expiration_hours = app.config["JWT_EXPIRATION_HOURS"]
 
     def _hash_password(self, password: str) -> str:
         try:
-            return self.password_hasher.hash(password)
+            return password_hashing.hash(password)
+        except ServiceOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error hashing password: {e}")
             raise
 
-    def _verify_password(self, password: str, hashed_password: str) -> bool:
+    def _verify_password(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, bool]:
+        """Returns (matches, needs_rehash)."""
         try:
-            self.password_hasher.verify(hashed_password, password)
-            return True
-        except VerifyMismatchError:
-            return False
+            return password_hashing.verify(hashed_password, password)
+        except ServiceOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error verifying password: {e}")
-            return False
+            return False, False
 
     def _generate_jwt(self, user: User) -> str:
         try:
             payload = {
                 "user_id": user.id,
                 "email": user.email,
+                "is_active": bool(user.is_active),
+                "is_admin": bool(user.is_admin),
+                "role": user.role,
+                "ver": user.token_version or 0,
                 "iat": datetime.now(UTC),
                 "exp": datetime.now(UTC) + timedelta(hours=self.jwt_expiration_hours),
             }
@@ -69,13 +79,18 @@ class AuthService:
 
     @staticmethod
     def validate_email_address(email: str) -> bool:
-        # Validate email
+        """
+        Syntax-only check inline. The domain is rejected only once a cached DNS
+        check found it undeliverable; unknown domains are checked in the
+        background (see email_deliverability), so signup never waits on DNS.
+        """
         try:
-            valid = validate_email(email)
-            email = valid.email
-            return True
+            valid = validate_email(email, check_deliverability=False)
         except EmailNotValidError:
             return False
+        return (
+            email_deliverability.status(valid.ascii_domain, valid.domain) is not False
+        )
 
     @staticmethod
     def validate_password_strength(password):
@@ -125,6 +140,9 @@ class AuthService:
                 "token": token,
             }
 
+        except ServiceOverloadedError:
+            db.session.rollback()
+            raise
         except Exception as e:
             logger.error(f"Error registering user: {e}")
             db.session.rollback()
@@ -139,9 +157,19 @@ class AuthService:
             if not user.is_active:
                 return {"success": False, "message": "Account is deactivated"}
 
-            if not self._verify_password(password, user.password_hash):
+            matches, needs_rehash = self._verify_password(password, user.password_hash)
+            if not matches:
                 return {"success": False, "message": "Invalid email or password"}
 
+            # Upgrade hashes made with older Argon2 parameters while we have the
+            # password; when hashing is saturated, try again on the next login
+            if needs_rehash:
+                try:
+                    user.password_hash = self._hash_password(password)
+                    logger.info(f"Rehashed password for {email}")
+                except ServiceOverloadedError:
+                    logger.warning(f"Hashing overloaded, not rehashing {email}")
+
             user.last_login = datetime.now(UTC)
             db.session.commit()
 
@@ -156,6 +184,9 @@ class AuthService:
                 "token": token,
             }
 
+        except ServiceOverloadedError:
+            db.session.rollback()
+            raise
         except Exception as e:
             logger.error(f"Error during login: {e}")
             return {"success": False, "message": "Login failed"}
@@ -171,5 +202,59 @@ class AuthService:
         user = User.query.get(payload.get("user_id"))
         if not user or not user.is_active:
             return None
+        if (user.token_version or 0) != payload.get("ver", 0):
+            return None
 
         return user
+
+    def get_principal_from_token(self, token: str) -> Principal | None:
+        """
+        Resolve a JWT to a Principal and cache it in principal_cache, so
+        later requests with the same token skip decoding.
+        Tokens whose version is current are authorized from their claims; the
+        users table is only read for older tokens without a `ver` claim and for
+        versions this process has not seen yet.
+        """
+        payload = self._verify_jwt(token)
+        if not payload:
+            return None
+
+        if "ver" in payload:
+            if not payload.get("is_active"):
+                return None
+            current = token_versions.check(payload["user_id"], payload["ver"])
+            if current is False:
+                return None
+            if current:
+                principal = Principal.from_claims(payload)
+                principal_cache.put(token, principal, payload["exp"])
+                return principal
+
+        user = User.query.get(payload.get("user_id"))
+        if not user or not user.is_active:
+            return None
+        token_versions.observe(user.id, user.token_version or 0)
+        if (user.token_version or 0) != payload.get("ver", 0):
+            return None
+
+        principal = Principal.from_user(user)
+        principal_cache.put(token, principal, payload["exp"])
+        return principal
+
+    def logout_user(self, user_id: int) -> dict:
+        """Revoke every token issued to the user so far."""
+        try:
+            user = User.query.get(user_id)
+            if not user:
+                return {"success": False, "message": "User not found"}
+
+            user.token_version = (user.token_version or 0) + 1
+            db.session.commit()
+
+            logger.info(f"User logged out: {user.email}")
+            return {"success": True, "message": "Logged out"}
+
+        except Exception as e:
+            logger.error(f"Error during logout: {e}")
+            db.session.rollback()
+            return {"success": False, "message": "Logout failed"}
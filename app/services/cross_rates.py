@@ -0,0 +1,150 @@
+# Cross rate service
+"""
+Cross-rate triangulation over the latest aggregated rates.
+
+Every stored pair (and its inversion) is an edge of a currency graph, weighted
+by the spread a customer pays on it (final buy vs final sell, so markup and any
+provider bid/ask spread). A rate for any two connected currencies is derived
+along the route with the tightest combined spread, so only n pairs need to be
+configured and fetched.
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from itertools import pairwise
+
+from loguru import logger
+
+# Small per-hop cost so that equal-spread routes prefer fewer legs
+HOP_PENALTY = 1e-9
+
+# Resolved routes kept per graph, least recently used evicted
+ROUTE_CACHE_SIZE = 4096
+
+
+class CurrencyGraph:
+    """
+    Directed currency graph for one rates generation.
+    Routes are priced from the legs' average (pre-markup) rates, so markup is
+    applied once per route. Resolved routes are memoized in a bounded LRU for
+    the lifetime of the graph.
+    """
+
+    def __init__(
+        self, pairs: dict[tuple[str, str], dict], max_routes: int = ROUTE_CACHE_SIZE
+    ):
+        self.pairs = pairs
+        self.edges: dict[str, list[tuple[str, float]]] = {}
+        self.max_routes = max_routes
+        self._cache: OrderedDict[tuple[str, str], dict | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+        for (base, target), rate in pairs.items():
+            if not rate.get("average_buy_rate") or not rate.get("average_sell_rate"):
+                continue
+            buy = rate.get("final_buy_rate")
+            sell = rate.get("final_sell_rate")
+            if not buy or not sell:
+                continue
+            spread = abs(math.log(buy / sell))
+            self.edges.setdefault(base, []).append((target, spread + HOP_PENALTY))
+
+        self.currencies = frozenset(self.edges) | frozenset(
+            target for edges in self.edges.values() for target, _ in edges
+        )
+
+    def cross_rate(self, from_currency: str, to_currency: str) -> dict | None:
+        """
+        Get the rate for from_currency -> to_currency.
+        Returns None when the currencies are not connected.
+        """
+        # Unknown codes are answered without touching the cache, so arbitrary
+        # input cannot grow it
+        if from_currency not in self.currencies or to_currency not in self.currencies:
+            return None
+
+        key = (from_currency, to_currency)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        rate = self._resolve(from_currency, to_currency)
+        with self._lock:
+            self._cache[key] = rate
+            while len(self._cache) > self.max_routes:
+                self._cache.popitem(last=False)
+        return rate
+
+    def _shortest_path(self, from_currency: str, to_currency: str) -> list[str] | None:
+        """Dijkstra over the spread-weighted edges."""
+        distances = {from_currency: 0.0}
+        previous = {}
+        queue = [(0.0, from_currency)]
+
+        while queue:
+            distance, currency = heapq.heappop(queue)
+            if currency == to_currency:
+                break
+            if distance > distances.get(currency, math.inf):
+                continue
+            for neighbour, weight in self.edges.get(currency, []):
+                candidate = distance + weight
+                if candidate < distances.get(neighbour, math.inf):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = currency
+                    heapq.heappush(queue, (candidate, neighbour))
+
+        if to_currency not in distances:
+            return None
+
+        path = [to_currency]
+        while path[-1] != from_currency:
+            path.append(previous[path[-1]])
+        return path[::-1]
+
+    def _resolve(self, from_currency: str, to_currency: str) -> dict | None:
+        path = self._shortest_path(from_currency, to_currency)
+        if not path:
+            logger.info(f"No conversion route for {from_currency}-{to_currency}")
+            return None
+
+        legs = [self.pairs[(base, target)] for base, target in pairwise(path)]
+
+        if len(legs) == 1:
+            # Direct or inverted stored pair, markup is already applied
+            leg = legs[0]
+            final_buy_rate = leg["final_buy_rate"]
+            final_sell_rate = leg["final_sell_rate"]
+            markup = leg["markup_percentage"] or 0.0
+            average_buy_rate = leg["average_buy_rate"]
+            average_sell_rate = leg["average_sell_rate"]
+        else:
+            average_buy_rate = math.prod(leg["average_buy_rate"] for leg in legs)
+            average_sell_rate = math.prod(leg["average_sell_rate"] for leg in legs)
+            # Apply the widest leg markup once instead of compounding it per leg
+            markup = max(leg["markup_percentage"] or 0.0 for leg in legs)
+            final_buy_rate = average_buy_rate * (1 + markup)
+            final_sell_rate = average_sell_rate * (1 - markup)
+
+        return {
+            "base_currency": from_currency,
+            "target_currency": to_currency,
+            "average_buy_rate": average_buy_rate,
+            "average_sell_rate": average_sell_rate,
+            "final_buy_rate": final_buy_rate,
+            "final_sell_rate": final_sell_rate,
+            "markup_percentage": markup,
+            "path": path,
+            "direct": len(legs) == 1 and not legs[0].get("inverted", False),
+            "aggregated_at": min(
+                (leg["aggregated_at"] for leg in legs if leg["aggregated_at"]),
+                default=None,
+            ),
+            "expires_at": min(
+                (leg["expires_at"] for leg in legs if leg["expires_at"]),
+                default=None,
+            ),
+        }
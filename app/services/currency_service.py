@@ -14,6 +14,7 @@ class CurrencyService:
         target_currency: str,
         markup_percentage: float = 0.1000,
         is_active: bool = True,
+        priority: int = 0,
     ) -> dict:
         try:
             base_currency = base_currency.upper().strip()
@@ -65,6 +66,7 @@ class CurrencyService:
                 target_currency=target_currency,
                 markup_percentage=Decimal(str(markup_percentage)),
                 is_active=is_active,
+                priority=priority,
             )
 
             db.session.add(new_pair)
@@ -0,0 +1,140 @@
+# Email domain deliverability
+"""
+Cached, non-blocking deliverability checks for email domains.
+
+Whether a domain accepts mail (MX, or A/AAAA fallback) is a property of the
+domain, not of the address, and changes rarely. Signup only validates syntax
+inline; the domain's DNS check runs on a small background pool and its result
+is cached per domain, in Redis when available so every worker shares it:
+deliverable domains for EMAIL_DOMAIN_CACHE_TTL_SECONDS, undeliverable ones for
+EMAIL_DOMAIN_NEGATIVE_TTL_SECONDS. Lookups that time out are not cached.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+from email_validator import EmailUndeliverableError
+from email_validator.deliverability import validate_email_deliverability
+from flask import current_app
+from loguru import logger
+
+from app.extensions import get_redis
+
+KEY_PREFIX = "email_domain"
+
+
+class DomainDeliverability:
+    """
+    Domain -> deliverable cache with background refresh.
+    status() never waits on DNS: it answers from the cache, or returns None
+    and schedules a check of the domain.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, bool]] = {}
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def status(self, ascii_domain: str, domain: str = None) -> bool | None:
+        """Cached deliverability of the domain, or None while it is unknown."""
+        cached = self._get(ascii_domain)
+        if cached is None:
+            self.schedule(ascii_domain, domain or ascii_domain)
+        return cached
+
+    def schedule(self, ascii_domain: str, domain: str):
+        with self._lock:
+            if ascii_domain in self._pending:
+                return
+            self._pending.add(ascii_domain)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get("EMAIL_DNS_WORKERS", 2),
+                    thread_name_prefix="email-domain",
+                )
+        app = current_app._get_current_object()
+        self._executor.submit(self._check, app, ascii_domain, domain)
+
+    def _check(self, app, ascii_domain: str, domain: str):
+        try:
+            with app.app_context():
+                timeout = app.config.get("EMAIL_DNS_TIMEOUT_SECONDS", 5)
+                try:
+                    info = validate_email_deliverability(
+                        ascii_domain, domain, timeout=timeout
+                    )
+                except EmailUndeliverableError as e:
+                    logger.info(f"Email domain {ascii_domain} is undeliverable: {e}")
+                    self._set(ascii_domain, False)
+                    return
+
+                if info.get("unknown-deliverability"):
+                    logger.warning(
+                        f"Could not check email domain {ascii_domain}: "
+                        f"{info['unknown-deliverability']}"
+                    )
+                    return
+                self._set(ascii_domain, True)
+        except Exception as e:
+            logger.exception(f"Email domain check failed for {ascii_domain}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(ascii_domain)
+
+    def _forget(self):
+        # Worker threads do not survive a fork
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _get(self, ascii_domain: str) -> bool | None:
+        with self._lock:
+            entry = self._entries.get(ascii_domain)
+            if entry and entry[0] > time.time():
+                return entry[1]
+
+        client = get_redis()
+        if client is None:
+            return None
+        key = f"{KEY_PREFIX}:{ascii_domain}"
+        try:
+            cached = client.get(key)
+            ttl = client.ttl(key) if cached is not None else -2
+        except redis.RedisError as e:
+            logger.warning(f"Could not read email domain cache {key}: {e}")
+            return None
+        if cached is None or ttl <= 0:
+            return None
+
+        deliverable = cached == "1"
+        with self._lock:
+            self._entries[ascii_domain] = (time.time() + ttl, deliverable)
+        return deliverable
+
+    def _set(self, ascii_domain: str, deliverable: bool):
+        ttl = current_app.config.get(
+            "EMAIL_DOMAIN_CACHE_TTL_SECONDS"
+            if deliverable
+            else "EMAIL_DOMAIN_NEGATIVE_TTL_SECONDS",
+            86400 if deliverable else 3600,
+        )
+        with self._lock:
+            self._entries[ascii_domain] = (time.time() + ttl, deliverable)
+
+        client = get_redis()
+        if client is None:
+            return
+        key = f"{KEY_PREFIX}:{ascii_domain}"
+        try:
+            client.set(key, "1" if deliverable else "0", ex=max(int(ttl), 1))
+        except redis.RedisError as e:
+            logger.warning(f"Could not write email domain cache {key}: {e}")
+
+
+email_deliverability = DomainDeliverability()
+
+os.register_at_fork(after_in_child=email_deliverability._forget)
@@ -0,0 +1,92 @@
+# Pair registry
+"""
+Compact index of the currency pairs taking part in one refresh run.
+
+The fetch stage uses it to group targets by base currency (or to derive every
+pair from one provider snapshot) and the save stage to resolve provider quotes
+to pairs in O(1). Later stages work on integer rows and pair ids instead of ORM
+objects.
+"""
+
+import numpy as np
+
+from app.models import CurrencyPair
+
+
+class PairRegistry:
+    """
+    Hash index over a fixed list of CurrencyPair objects.
+    Each pair has a stable row number; `ids` and `markups` are aligned to it.
+    """
+
+    def __init__(self, currency_pairs: list[CurrencyPair]):
+        self.pairs = list(currency_pairs)
+        self.ids = np.array([pair.id for pair in self.pairs], dtype=np.int64)
+        self.markups = np.array(
+            [float(pair.markup_percentage or 0) for pair in self.pairs],
+            dtype=np.float64,
+        )
+        self._rows = {
+            (pair.base_currency, pair.target_currency): row
+            for row, pair in enumerate(self.pairs)
+        }
+
+        self.grouped_by_base: dict[str, list[str]] = {}
+        self.priority_by_base: dict[str, int] = {}
+        for pair in self.pairs:
+            self.grouped_by_base.setdefault(pair.base_currency, []).append(
+                pair.target_currency
+            )
+            self.priority_by_base[pair.base_currency] = max(
+                self.priority_by_base.get(pair.base_currency, 0), pair.priority or 0
+            )
+
+        # Every currency in the registry, and each pair's legs as indexes into it
+        self.currencies = sorted(
+            {pair.base_currency for pair in self.pairs}
+            | {pair.target_currency for pair in self.pairs}
+        )
+        currency_index = {code: i for i, code in enumerate(self.currencies)}
+        self._base_index = np.array(
+            [currency_index[pair.base_currency] for pair in self.pairs],
+            dtype=np.int64,
+        )
+        self._target_index = np.array(
+            [currency_index[pair.target_currency] for pair in self.pairs],
+            dtype=np.int64,
+        )
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __iter__(self):
+        return iter(self.pairs)
+
+    def row_of(self, base_currency: str, target_currency: str) -> int | None:
+        """Row number of the pair, or None if it is not registered."""
+        return self._rows.get((base_currency, target_currency))
+
+    def get(self, base_currency: str, target_currency: str) -> CurrencyPair | None:
+        row = self._rows.get((base_currency, target_currency))
+        return None if row is None else self.pairs[row]
+
+    def cross_from_snapshot(
+        self, conversion_rates: dict[str, float], snapshot_base: str
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Derive every registered pair from one provider snapshot.
+        conversion_rates maps currency -> units per 1 snapshot_base, so
+        base/target is conversion_rates[target] / conversion_rates[base].
+        Returns (rows, rates) for the pairs whose legs are both quoted.
+        """
+        quoted = np.array(
+            [
+                1.0 if code == snapshot_base else conversion_rates.get(code, np.nan)
+                for code in self.currencies
+            ],
+            dtype=np.float64,
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = quoted[self._target_index] / quoted[self._base_index]
+        rows = np.flatnonzero(np.isfinite(rates) & (rates > 0))
+        return rows, rates[rows]
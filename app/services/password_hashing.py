@@ -0,0 +1,149 @@
+# Password hashing pool
+"""
+Argon2 hashing off the request threads.
+
+Argon2 is deliberately CPU and memory hungry, so hashes are computed in a small
+process pool instead of on the web worker threads, where a burst of logins
+would starve every other request. At most PASSWORD_HASH_WORKERS hashes run at
+once and PASSWORD_HASH_QUEUE_SIZE more may wait; beyond that callers get
+ServiceOverloadedError after PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS instead of
+queueing without limit. With PASSWORD_HASH_WORKERS = 0 hashes run inline.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+from flask import current_app
+from loguru import logger
+
+from app.utils.exceptions import ServiceOverloadedError
+
+
+@lru_cache(maxsize=4)
+def _hasher(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHasher:
+    return PasswordHasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+
+
+# Run in the pool processes, so they must stay module-level functions
+
+
+def _hash(password: str, params: tuple) -> str:
+    return _hasher(*params).hash(password)
+
+
+def _verify(hashed_password: str, password: str, params: tuple) -> tuple[bool, bool]:
+    hasher = _hasher(*params)
+    try:
+        hasher.verify(hashed_password, password)
+    except VerifyMismatchError:
+        return False, False
+    return True, hasher.check_needs_rehash(hashed_password)
+
+
+class PasswordHashingPool:
+    """
+    Process pool plus a bounded semaphore admitting workers + queue size callers.
+    Both are created lazily and always replaced together: after reset(), in
+    forked children, and when the configured sizes change.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _params() -> tuple:
+        config = current_app.config
+        return (
+            config.get("ARGON2_TIME_COST", 3),
+            config.get("ARGON2_MEMORY_COST", 65536),
+            config.get("ARGON2_PARALLELISM", 4),
+        )
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self._params())
+
+    def verify(self, hashed_password: str, password: str) -> tuple[bool, bool]:
+        """
+        Returns (matches, needs_rehash); needs_rehash is True when the hash was
+        made with other Argon2 parameters than the configured ones.
+        """
+        return self._run(_verify, hashed_password, password, self._params())
+
+    def _run(self, function, *args):
+        config = current_app.config
+        workers = config.get("PASSWORD_HASH_WORKERS", 2)
+        if workers <= 0:
+            return function(*args)
+
+        executor, slots = self._ensure_pool(
+            workers, config.get("PASSWORD_HASH_QUEUE_SIZE", 8)
+        )
+        if not slots.acquire(
+            timeout=config.get("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 0.1)
+        ):
+            logger.warning("Password hashing pool is full, rejecting request")
+            raise ServiceOverloadedError("Password hashing is busy, retry shortly")
+        try:
+            return executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            logger.error("Password hashing pool broke, starting a new one")
+            self.reset()
+            raise
+        finally:
+            slots.release()
+
+    def _ensure_pool(self, workers: int, queue_size: int):
+        stale = None
+        with self._lock:
+            if self._executor is not None and self._size != (workers, queue_size):
+                logger.info("Password hashing pool size changed, restarting it")
+                stale = self._drop()
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+                self._slots = threading.BoundedSemaphore(workers + queue_size)
+                self._size = (workers, queue_size)
+                logger.info(
+                    f"Started password hashing pool ({workers} processes, "
+                    f"{queue_size} queued)"
+                )
+            executor, slots = self._executor, self._slots
+        if stale is not None:
+            stale.shutdown(wait=False)
+        return executor, slots
+
+    def reset(self):
+        """Drop the pool and its slots; the next call starts fresh ones."""
+        with self._lock:
+            executor = self._drop()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drop(self):
+        # Callers already holding a slot release it on the old semaphore
+        executor = self._executor
+        self._executor = None
+        self._slots = None
+        self._size = None
+        return executor
+
+    def _forget(self):
+        # In a forked child the parent's pool processes are not ours to use
+        self._executor = None
+        self._slots = None
+        self._size = None
+        self._lock = threading.Lock()
+
+
+password_hashing = PasswordHashingPool()
+
+os.register_at_fork(after_in_child=password_hashing._forget)
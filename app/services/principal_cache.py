@@ -0,0 +1,187 @@
+# Principal cache
+"""
+Cache of authenticated principals, keyed by a hash of the bearer token.
+
+Resolving a JWT costs a signature check and a users table lookup, although the
+answer only changes when the user is deactivated or their role changes. Entries
+live for PRINCIPAL_CACHE_TTL_SECONDS, never past the token's own `exp`, and the
+least recently used ones are evicted beyond PRINCIPAL_CACHE_MAX_SIZE. Updating
+or deleting a user drops their entries in this process straight away; other
+processes reject them as soon as they see the bumped token version (see
+token_versions).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from loguru import logger
+from sqlalchemy import event, inspect
+
+from app.extensions import db
+from app.models import User
+
+# Changes to these User columns invalidate the user's cached principals
+AUTHORIZATION_FIELDS = ("is_active", "is_admin", "role", "token_version")
+
+
+class Principal:
+    """
+    Read-only view of an authenticated user, safe to share between requests.
+    Exposes the User attributes the endpoints read from g.current_user.
+    """
+
+    __slots__ = (
+        "id",
+        "email",
+        "is_active",
+        "is_admin",
+        "role",
+        "token_version",
+        "_data",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        is_active: bool,
+        is_admin: bool,
+        role: str = None,
+        token_version: int = 0,
+        data: dict = None,
+    ):
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.is_admin = is_admin
+        self.role = role
+        self.token_version = token_version
+        # None for principals built from token claims, see to_dict
+        self._data = data
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            user.id,
+            user.email,
+            user.is_active,
+            user.is_admin,
+            user.role,
+            user.token_version or 0,
+            user.to_dict(),
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        """Principal described by a token's own claims, without a users lookup."""
+        return cls(
+            payload["user_id"],
+            payload.get("email"),
+            payload["is_active"],
+            payload["is_admin"],
+            payload.get("role"),
+            payload["ver"],
+        )
+
+    def to_dict(self) -> dict:
+        """
+        The user's to_dict(). Principals built from token claims only carry the
+        authorization fields, so the user row is read for them here.
+        """
+        if self._data is None:
+            user = db.session.get(User, self.id)
+            if user is None:
+                return {
+                    "id": self.id,
+                    "email": self.email,
+                    "is_active": self.is_active,
+                    "is_admin": self.is_admin,
+                }
+            return user.to_dict()
+        return dict(self._data)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """Thread-safe LRU of token hash -> (expires at, Principal)."""
+
+    def __init__(self):
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Principal | None:
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, token: str, principal: Principal, expires_at: float):
+        """Cache a principal until the TTL or the token's exp, whichever is first."""
+        ttl = current_app.config.get("PRINCIPAL_CACHE_TTL_SECONDS", 60)
+        max_size = current_app.config.get("PRINCIPAL_CACHE_MAX_SIZE", 10000)
+        expires_at = min(time.time() + ttl, expires_at)
+        if ttl <= 0 or expires_at <= time.time():
+            return
+
+        key = _token_key(token)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (expires_at, principal)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > max_size:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            keys = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+        if keys:
+            logger.info(f"Dropped {len(keys)} cached principals of user {user_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, key: str):
+        """Remove one entry and its user index. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._keys_by_user.get(entry[1].id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry[1].id]
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(_mapper, _connection, user: User):
+    state = inspect(user)
+    if any(state.attrs[field].history.has_changes() for field in AUTHORIZATION_FIELDS):
+        principal_cache.invalidate_user(user.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(_mapper, _connection, user: User):
+    principal_cache.invalidate_user(user.id)
@@ -0,0 +1,112 @@
+# Provider response cache
+"""
+Cache of provider responses, valid until the provider's next declared update.
+
+ExchangeRate API publishes `next_update_utc`; fetching before then returns the
+same data again. Responses are kept in process and, when Redis is available,
+shared across Celery workers, so a refresh only calls providers whose data can
+actually have changed.
+"""
+
+import json
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import redis
+from flask import current_app
+from loguru import logger
+
+from app.extensions import get_redis
+
+CACHE_KEY_PREFIX = "provider_cache"
+
+
+class ProviderResponseCache:
+    """
+    Two-level (memory, then Redis) cache keyed by provider and request kwargs,
+    e.g. ("currency_layer", base, sorted targets).
+    Entries expire at the response's next_update_utc, or after
+    PROVIDER_CACHE_TTL_SECONDS when the provider does not declare one.
+    """
+
+    def __init__(self, default_ttl: float = None):
+        self.default_ttl = default_ttl
+        self._entries: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider: str, kwargs: dict) -> str:
+        normalized = {
+            name: sorted(value) if isinstance(value, list | tuple | set) else value
+            for name, value in kwargs.items()
+        }
+        return f"{CACHE_KEY_PREFIX}:{provider}:{json.dumps(normalized, sort_keys=True)}"
+
+    def get(self, provider: str, kwargs: dict) -> dict | None:
+        key = self.make_key(provider, kwargs)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            self._entries.pop(key, None)
+
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            cached = client.get(key)
+            ttl = client.ttl(key) if cached else -2
+        except redis.RedisError as e:
+            logger.warning(f"Could not read provider cache {key}: {e}")
+            return None
+        if not cached or ttl <= 0:
+            return None
+
+        response = json.loads(cached)
+        with self._lock:
+            self._entries[key] = (now + ttl, response)
+        return response
+
+    def set(self, provider: str, kwargs: dict, response: dict):
+        ttl = self._ttl_for(response)
+        if ttl <= 0:
+            return
+
+        key = self.make_key(provider, kwargs)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, response)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(key, json.dumps(response, default=str), ex=max(int(ttl), 1))
+        except redis.RedisError as e:
+            logger.warning(f"Could not write provider cache {key}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _ttl_for(self, response: dict) -> float:
+        """Seconds until the provider's declared next update, else the default TTL."""
+        default_ttl = (
+            self.default_ttl
+            if self.default_ttl is not None
+            else current_app.config.get("PROVIDER_CACHE_TTL_SECONDS", 300)
+        )
+        next_update = response.get("next_update_utc")
+        if not next_update:
+            return default_ttl
+        try:
+            return parsedate_to_datetime(next_update).timestamp() - time.time()
+        except (TypeError, ValueError):
+            logger.warning(f"Unparseable next_update_utc: {next_update}")
+            return default_ttl
+
+
+# Shared by every refresh run in this process
+provider_response_cache = ProviderResponseCache()
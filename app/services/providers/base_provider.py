@@ -1,7 +1,17 @@
 import abc
+import asyncio
+import os
+import threading
 from typing import Any
+from urllib.parse import urlsplit
 
+import requests
+from flask import current_app, has_app_context
 from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import circuit_breakers
+from .quota import quota_scheduler
 
 
 # TODO: Implement inheritance of the fetch with retry for all provider clients
@@ -13,10 +23,17 @@ class BaseProviderClient(abc.ABC):
     timeout: int = 10
     max_retries: int = 3
 
+    # Shared keep-alive sessions, one per scheme://host, reused by every client
+    # instance and every refresh run in this process
+    _sessions: dict[str, requests.Session] = {}
+    _sessions_lock = threading.Lock()
+
+    # Provider name, as registered in provider_factory.PROVIDER_CLIENTS
+    name: str = None
+
     def __init__(self):
-        self.circuit_open = False
-        self.failure_count = 0
-        self.circuit_breaker_threshold = 3
+        if self.name is None:
+            self.name = self.__class__.__name__
 
     @abc.abstractmethod
     def get_rates(self, *args, **kwargs) -> dict[str, Any]:
@@ -26,27 +43,104 @@ class BaseProviderClient(abc.ABC):
     def health_check(self) -> dict[str, Any]:
         pass
 
+    async def get_rates_async(self, session, *args, **kwargs) -> dict[str, Any]:
+        """
+        Async variant of get_rates used by the async fetch engine.
+        HTTP clients override it to use the aiohttp session; by default the
+        blocking get_rates runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.get_rates, *args, **kwargs)
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled session for this client's BASE_URL host."""
+        return self.get_session(self.BASE_URL)
+
+    @classmethod
+    def get_session(cls, url: str) -> requests.Session:
+        """
+        Get the shared session for the host of url, creating it on first use.
+        Sessions keep connections alive and are safe to share between the
+        refresh worker threads.
+        """
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        session = BaseProviderClient._sessions.get(key)
+        if session is not None:
+            return session
+
+        with BaseProviderClient._sessions_lock:
+            session = BaseProviderClient._sessions.get(key)
+            if session is None:
+                session = cls._build_session(key)
+                BaseProviderClient._sessions[key] = session
+        return session
+
+    @staticmethod
+    def _build_session(prefix: str) -> requests.Session:
+        config = current_app.config if has_app_context() else {}
+        pool_connections = config.get("PROVIDER_HTTP_POOL_CONNECTIONS", 4)
+        pool_maxsize = config.get("PROVIDER_HTTP_POOL_MAXSIZE", 16)
+
+        session = requests.Session()
+        # Retries are handled by request_with_retry / RateFetcherService
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0,
+        )
+        session.mount(prefix, adapter)
+        session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+        logger.info(
+            f"Created HTTP session for {prefix} "
+            f"(pool_connections={pool_connections}, pool_maxsize={pool_maxsize})"
+        )
+        return session
+
+    @classmethod
+    def close_sessions(cls):
+        """Close every pooled session, e.g. on worker shutdown."""
+        with BaseProviderClient._sessions_lock:
+            for session in BaseProviderClient._sessions.values():
+                session.close()
+            BaseProviderClient._sessions.clear()
+
     def request_with_retry(self, func, *args, **kwargs):
         """
-        Retry logic for API requests.
+        Retry logic for API requests, guarded by the provider's shared circuit breaker.
         """
         for attempt in range(1, self.max_retries + 1):
+            half_open = circuit_breakers.ensure_available(self.name)
+            # Spend quota before claiming the probe, so running out cannot hold it
+            quota_scheduler.acquire(self.name)
+            if half_open:
+                circuit_breakers.claim_probe(self.name)
+            settled = False
             try:
-                if self.circuit_open:
-                    logger.error(f"Circuit breaker open for {self.__class__.__name__}")
-                    raise Exception("Circuit breaker is open.")
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except Exception as e:
                 logger.warning(f"Attempt {attempt} failed: {e}")
-                self.failure_count += 1
-                if self.failure_count >= self.circuit_breaker_threshold:
-                    self.circuit_open = True
-                    logger.error(
-                        f"Circuit breaker triggered for {self.__class__.__name__}"
-                    )
-                if attempt == self.max_retries:
+                circuit_breakers.record_failure(self.name, e)
+                settled = True
+                if attempt == self.max_retries or circuit_breakers.is_open(self.name):
                     raise
+            else:
+                circuit_breakers.record_success(self.name)
+                settled = True
+                return result
+            finally:
+                if half_open and not settled:
+                    circuit_breakers.release_probe(self.name)
+
+    @property
+    def circuit_open(self) -> bool:
+        return circuit_breakers.is_open(self.name)
 
     def reset_circuit(self):
-        self.circuit_open = False
-        self.failure_count = 0
+        circuit_breakers.reset(self.name)
+
+
+# Sockets must not be shared with forked (e.g. Celery prefork) children
+os.register_at_fork(after_in_child=BaseProviderClient._sessions.clear)
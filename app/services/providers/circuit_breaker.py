@@ -0,0 +1,262 @@
+# Provider circuit breakers
+"""
+Circuit breaker and health state per provider, shared by every client instance.
+
+State lives in Redis when it is available, so a provider that is down trips the
+breaker for all Celery workers, and in process memory otherwise.
+
+- closed: requests flow; the last CIRCUIT_WINDOW_SIZE outcomes are kept and the
+  breaker opens once their failure rate reaches CIRCUIT_FAILURE_RATE (after at
+  least CIRCUIT_MIN_CALLS outcomes)
+- open: requests are rejected without touching the network for
+  CIRCUIT_COOLDOWN_SECONDS
+- half-open: after the cool-down one caller at a time may probe the provider;
+  success closes the breaker, failure opens it for another cool-down. A caller
+  that claimed the probe but gives up without an outcome (no quota left,
+  cancelled) hands it back with release_probe().
+"""
+
+import threading
+import time
+from collections import deque
+
+import redis
+from flask import current_app, has_app_context
+from loguru import logger
+
+from app.extensions import get_redis
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+KEY_PREFIX = "circuit"
+
+DEFAULTS = {
+    "CIRCUIT_FAILURE_RATE": 0.5,
+    "CIRCUIT_MIN_CALLS": 5,
+    "CIRCUIT_WINDOW_SIZE": 20,
+    "CIRCUIT_COOLDOWN_SECONDS": 60,
+    "CIRCUIT_PROBE_TIMEOUT_SECONDS": 30,
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreakerRegistry:
+    """
+    Breaker and health registry keyed by provider name.
+    """
+
+    def __init__(self):
+        self._local: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name: str):
+        if has_app_context():
+            return current_app.config.get(name, DEFAULTS[name])
+        return DEFAULTS[name]
+
+    def allow_request(self, provider: str) -> bool:
+        """
+        Whether a request to the provider may go out now.
+        In the half-open state only the caller that claims the probe gets True.
+        """
+        state = self._load(provider)
+        if state["state"] == CLOSED:
+            return True
+
+        cooldown = self._setting("CIRCUIT_COOLDOWN_SECONDS")
+        if time.time() - state["opened_at"] < cooldown:
+            return False
+        return self._claim_probe(provider)
+
+    def is_open(self, provider: str) -> bool:
+        """Whether the breaker is open (cool-down included), without probing."""
+        return self._load(provider)["state"] != CLOSED
+
+    def ensure_available(self, provider: str) -> bool:
+        """
+        Raise CircuitOpenError when the provider should not be called.
+        Returns True when the breaker is half-open, in which case the caller
+        must claim_probe() before calling the provider.
+        """
+        state = self._load(provider)
+        if state["state"] == CLOSED:
+            return False
+        if time.time() - state["opened_at"] < self._setting("CIRCUIT_COOLDOWN_SECONDS"):
+            raise CircuitOpenError(f"Circuit breaker open for {provider}")
+        return True
+
+    def claim_probe(self, provider: str):
+        """Raise CircuitOpenError unless this caller gets the half-open probe."""
+        if not self._claim_probe(provider):
+            raise CircuitOpenError(f"Circuit breaker probe in flight for {provider}")
+
+    def record_success(self, provider: str):
+        state = self._load(provider)
+        fields = {"last_success_at": time.time()}
+        if state["state"] != CLOSED:
+            logger.info(f"Circuit breaker closed for {provider}")
+            fields.update(state=CLOSED, opened_at=0)
+            self._reset_outcomes(provider)
+            self.release_probe(provider)
+        self._save(provider, fields, outcome=1)
+
+    def record_failure(self, provider: str, error: Exception | str = None):
+        state = self._load(provider)
+        fields = {"last_failure_at": time.time(), "last_error": str(error or "")}
+        outcomes = [*state["outcomes"], 0][-self._setting("CIRCUIT_WINDOW_SIZE") :]
+
+        if state["state"] != CLOSED:
+            if time.time() - state["opened_at"] >= self._setting(
+                "CIRCUIT_COOLDOWN_SECONDS"
+            ):
+                # The half-open probe failed, start another cool-down
+                fields.update(state=OPEN, opened_at=time.time())
+                self.release_probe(provider)
+                logger.warning(
+                    f"Circuit breaker probe failed for {provider}, reopening"
+                )
+        elif len(outcomes) >= self._setting("CIRCUIT_MIN_CALLS") and (
+            outcomes.count(0) / len(outcomes) >= self._setting("CIRCUIT_FAILURE_RATE")
+        ):
+            fields.update(state=OPEN, opened_at=time.time())
+            logger.error(
+                f"Circuit breaker triggered for {provider} "
+                f"({outcomes.count(0)}/{len(outcomes)} recent calls failed)"
+            )
+        self._save(provider, fields, outcome=0)
+
+    def reset(self, provider: str):
+        self._reset_outcomes(provider)
+        self._save(provider, {"state": CLOSED, "opened_at": 0})
+
+    def status(self, provider: str) -> dict:
+        """Breaker state and health summary for one provider."""
+        state = self._load(provider)
+        outcomes = state["outcomes"]
+        if state["state"] == OPEN and time.time() - state["opened_at"] >= self._setting(
+            "CIRCUIT_COOLDOWN_SECONDS"
+        ):
+            state["state"] = HALF_OPEN
+        return {
+            "provider": provider,
+            "state": state["state"],
+            "opened_at": state["opened_at"] or None,
+            "failure_rate": (outcomes.count(0) / len(outcomes)) if outcomes else 0.0,
+            "recent_calls": len(outcomes),
+            "last_success_at": state["last_success_at"] or None,
+            "last_failure_at": state["last_failure_at"] or None,
+            "last_error": state["last_error"] or None,
+        }
+
+    # Storage: Redis hash + list per provider, or the local dict
+
+    def _load(self, provider: str) -> dict:
+        client = get_redis()
+        if client is not None:
+            key = f"{KEY_PREFIX}:{provider}"
+            try:
+                pipe = client.pipeline()
+                pipe.hgetall(key)
+                pipe.lrange(f"{key}:outcomes", 0, -1)
+                fields, outcomes = pipe.execute()
+                return {
+                    "state": fields.get("state", CLOSED),
+                    "opened_at": float(fields.get("opened_at", 0)),
+                    "last_success_at": float(fields.get("last_success_at", 0)),
+                    "last_failure_at": float(fields.get("last_failure_at", 0)),
+                    "last_error": fields.get("last_error", ""),
+                    "outcomes": [int(outcome) for outcome in outcomes],
+                }
+            except redis.RedisError as e:
+                logger.warning(f"Could not read circuit state for {provider}: {e}")
+
+        with self._lock:
+            local = self._local_state(provider)
+            return {**local, "outcomes": list(local["outcomes"])}
+
+    def _save(self, provider: str, fields: dict, outcome: int = None):
+        window = self._setting("CIRCUIT_WINDOW_SIZE")
+        with self._lock:
+            local = self._local_state(provider)
+            local.update(fields)
+            if outcome is not None:
+                local["outcomes"].append(outcome)
+
+        client = get_redis()
+        if client is None:
+            return
+        key = f"{KEY_PREFIX}:{provider}"
+        try:
+            pipe = client.pipeline()
+            pipe.hset(key, mapping=fields)
+            if outcome is not None:
+                pipe.rpush(f"{key}:outcomes", outcome)
+                pipe.ltrim(f"{key}:outcomes", -window, -1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not store circuit state for {provider}: {e}")
+
+    def _reset_outcomes(self, provider: str):
+        with self._lock:
+            self._local_state(provider)["outcomes"].clear()
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(f"{KEY_PREFIX}:{provider}:outcomes")
+        except redis.RedisError as e:
+            logger.warning(f"Could not reset circuit outcomes for {provider}: {e}")
+
+    def _claim_probe(self, provider: str) -> bool:
+        timeout = self._setting("CIRCUIT_PROBE_TIMEOUT_SECONDS")
+        client = get_redis()
+        if client is not None:
+            try:
+                return bool(
+                    client.set(
+                        f"{KEY_PREFIX}:{provider}:probe", 1, nx=True, ex=int(timeout)
+                    )
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Could not claim circuit probe for {provider}: {e}")
+
+        with self._lock:
+            local = self._local_state(provider)
+            if local["probe_until"] > time.time():
+                return False
+            local["probe_until"] = time.time() + timeout
+            return True
+
+    def release_probe(self, provider: str):
+        """Give back a claimed probe, e.g. when the call never went out."""
+        with self._lock:
+            self._local_state(provider)["probe_until"] = 0.0
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(f"{KEY_PREFIX}:{provider}:probe")
+        except redis.RedisError as e:
+            logger.warning(f"Could not release circuit probe for {provider}: {e}")
+
+    def _local_state(self, provider: str) -> dict:
+        if provider not in self._local:
+            self._local[provider] = {
+                "state": CLOSED,
+                "opened_at": 0.0,
+                "last_success_at": 0.0,
+                "last_failure_at": 0.0,
+                "last_error": "",
+                "probe_until": 0.0,
+                "outcomes": deque(maxlen=self._setting("CIRCUIT_WINDOW_SIZE")),
+            }
+        return self._local[provider]
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -1,5 +1,5 @@
 # Exchange Rate API Client
-import requests
+import aiohttp
 from flask import current_app as app
 from loguru import logger  # Fixed typo
 
@@ -7,9 +7,11 @@ from .base_provider import BaseProviderClient
 
 
 class ExchangeRateClient(BaseProviderClient):
+    name = "exchange_rate"
     BASE_URL = "https://v6.exchangerate-api.com/v6"
 
     def __init__(self):
+        super().__init__()
         self.api_key = app.config["EXCHANGE_RATE_API_KEY"]
 
     def get_rates(self, base_currency: str) -> dict:
@@ -20,27 +22,44 @@ class ExchangeRateClient(BaseProviderClient):
         url = f"{self.BASE_URL}/{self.api_key}/latest/{base_currency}"
         logger.info(f"Requesting ExchangeRate API: {url}")
         try:
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             logger.debug(f"ExchangeRate API raw response: {response.text}")
             response.raise_for_status()
-            data = response.json()
-            if data.get("result") != "success":
-                logger.error(f"ExchangeRate API error: {data}")
-                raise ValueError(f"API error: {data}")
-
-            logger.info(f"ExchangeRate API success for base_currency={base_currency}")
-            response = {
-                "base_code": data["base_code"],
-                "conversion_rates": data["conversion_rates"],
-                "last_update_utc": data["time_last_update_utc"],
-                "next_update_utc": data["time_next_update_utc"],
-            }
-            logger.debug(f"ExchangeRate API processed response:\n {response}")
-            return response
+            return self._parse_rates(response.json(), base_currency)
         except Exception as e:
             logger.exception(f"Error fetching rates from ExchangeRate API: {e}")
             raise e
 
+    async def get_rates_async(self, session, base_currency: str) -> dict:
+        """Async variant of get_rates on an aiohttp session."""
+        url = f"{self.BASE_URL}/{self.api_key}/latest/{base_currency}"
+        logger.info(f"Requesting ExchangeRate API (async) for {base_currency}")
+        try:
+            async with session.get(
+                url, timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                data = await response.json(content_type=None)
+            return self._parse_rates(data, base_currency)
+        except Exception as e:
+            logger.exception(f"Error fetching rates from ExchangeRate API: {e}")
+            raise e
+
+    @staticmethod
+    def _parse_rates(data: dict, base_currency: str) -> dict:
+        if data.get("result") != "success":
+            logger.error(f"ExchangeRate API error: {data}")
+            raise ValueError(f"API error: {data}")
+
+        logger.info(f"ExchangeRate API success for base_currency={base_currency}")
+        response = {
+            "base_code": data["base_code"],
+            "conversion_rates": data["conversion_rates"],
+            "last_update_utc": data["time_last_update_utc"],
+            "next_update_utc": data["time_next_update_utc"],
+        }
+        logger.debug(f"ExchangeRate API processed response:\n {response}")
+        return response
+
     def health_check(self, base_currency: str = "USD") -> dict:
         """
         Health check for ExchangeRate API.
@@ -48,7 +67,7 @@ class ExchangeRateClient(BaseProviderClient):
         """
         url = f"{self.BASE_URL}/{self.api_key}/latest/{base_currency}"
         try:
-            response = requests.get(url, timeout=5)
+            response = self.session.get(url, timeout=5)
             response.raise_for_status()
             data = response.json()
             if data.get("result") == "success":
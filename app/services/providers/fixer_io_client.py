@@ -1,5 +1,5 @@
 # Fixer.io client
-import requests
+import aiohttp
 from flask import current_app as app
 from loguru import logger
 
@@ -7,9 +7,11 @@ from .base_provider import BaseProviderClient
 
 
 class FixerIOClient(BaseProviderClient):
+    name = "fixer"
     BASE_URL = "http://data.fixer.io/api/latest"
 
     def __init__(self):
+        super().__init__()
         self.api_key = app.config["FIXER_API_KEY"]
 
     def get_rates(self) -> dict:
@@ -21,24 +23,41 @@ class FixerIOClient(BaseProviderClient):
         params = {"access_key": self.api_key}
         logger.info(f"Requesting Fixer.io rates with params: {params}")
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
+            response = self.session.get(self.BASE_URL, params=params, timeout=10)
             logger.debug(f"Fixer.io raw response: {response.text}")
             response.raise_for_status()
-            data = response.json()
-            if not data.get("success"):
-                logger.error(f"Fixer.io API error: {data}")
-                raise ValueError(f"API error: {data}")
-            logger.info("Fixer.io API request successful")
-            return {
-                "base_code": data["base"],
-                "date": data["date"],
-                "conversion_rates": data["rates"],
-                "last_update_utc": data["timestamp"],
-            }
+            return self._parse_rates(response.json())
+        except Exception as e:
+            logger.exception(f"Error fetching rates from Fixer.io: {e}")
+            raise e
+
+    async def get_rates_async(self, session) -> dict:
+        """Async variant of get_rates on an aiohttp session."""
+        params = {"access_key": self.api_key}
+        logger.info("Requesting Fixer.io rates (async)")
+        try:
+            async with session.get(
+                self.BASE_URL, params=params, timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                data = await response.json(content_type=None)
+            return self._parse_rates(data)
         except Exception as e:
             logger.exception(f"Error fetching rates from Fixer.io: {e}")
             raise e
 
+    @staticmethod
+    def _parse_rates(data: dict) -> dict:
+        if not data.get("success"):
+            logger.error(f"Fixer.io API error: {data}")
+            raise ValueError(f"API error: {data}")
+        logger.info("Fixer.io API request successful")
+        return {
+            "base_code": data["base"],
+            "date": data["date"],
+            "conversion_rates": data["rates"],
+            "last_update_utc": data["timestamp"],
+        }
+
     def health_check(self) -> dict:
         """
         Health check for Fixer.io API.
@@ -46,7 +65,7 @@ class FixerIOClient(BaseProviderClient):
         """
         params = {"access_key": self.api_key}
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=5)
+            response = self.session.get(self.BASE_URL, params=params, timeout=5)
             response.raise_for_status()
             data = response.json()
             if data.get("success"):
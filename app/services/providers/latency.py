@@ -0,0 +1,64 @@
+# Provider latency histograms
+"""
+Per-provider response time histograms used to decide when to hedge a slow
+request.
+
+Latencies go into fixed, geometrically spaced buckets, so recording is O(1) and
+percentiles are read straight from the cumulative counts. Counts are halved once
+a provider has MAX_SAMPLES observations, so recent behaviour dominates.
+"""
+
+import bisect
+import itertools
+import threading
+
+# Bucket upper bounds in seconds: 10ms growing by 25% up to ~60s
+BUCKET_BOUNDS = tuple(0.01 * 1.25**i for i in range(40))
+MAX_SAMPLES = 1000
+# Observations needed before a provider's percentiles are trusted
+MIN_SAMPLES = 5
+
+
+class LatencyHistograms:
+    """Thread-safe latency histograms keyed by provider name."""
+
+    def __init__(self):
+        self._counts: dict[str, list[int]] = {}
+        self._totals: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float):
+        bucket = min(bisect.bisect_left(BUCKET_BOUNDS, seconds), len(BUCKET_BOUNDS))
+        with self._lock:
+            counts = self._counts.setdefault(provider, [0] * (len(BUCKET_BOUNDS) + 1))
+            counts[bucket] += 1
+            self._totals[provider] = self._totals.get(provider, 0) + 1
+
+            if self._totals[provider] >= MAX_SAMPLES:
+                self._counts[provider] = [count // 2 for count in counts]
+                self._totals[provider] = sum(self._counts[provider])
+
+    def percentile(self, provider: str, quantile: float) -> float | None:
+        """
+        Upper bound of the bucket holding the quantile, or None while the
+        provider has fewer than MIN_SAMPLES observations.
+        """
+        with self._lock:
+            total = self._totals.get(provider, 0)
+            if total < MIN_SAMPLES:
+                return None
+            cumulative = list(itertools.accumulate(self._counts[provider]))
+
+        bucket = bisect.bisect_left(cumulative, quantile * total)
+        return BUCKET_BOUNDS[min(bucket, len(BUCKET_BOUNDS) - 1)]
+
+    def summary(self, provider: str) -> dict:
+        return {
+            "samples": self._totals.get(provider, 0),
+            "p50": self.percentile(provider, 0.5),
+            "p95": self.percentile(provider, 0.95),
+            "p99": self.percentile(provider, 0.99),
+        }
+
+
+provider_latencies = LatencyHistograms()
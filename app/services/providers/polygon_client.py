@@ -1,26 +1,63 @@
 # Polygon API client
+import asyncio
+import json
+import os
+import threading
+import time
+
+import aiohttp
 from flask import current_app as app
 from loguru import logger
 from polygon import RESTClient
 
 from .base_provider import BaseProviderClient
 
+SNAPSHOT_PATH = "/v2/snapshot/locale/global/markets/forex/tickers"
+
 
 class PolygonClient(BaseProviderClient):
+    name = "polygon"
+    # Tickers per snapshot request, keeps the query string well under URL limits
+    SNAPSHOT_CHUNK_SIZE = 50
+
+    # RESTClient owns a urllib3 pool manager, so one is kept per API key
+    _rest_clients: dict[str, RESTClient] = {}
+    _rest_clients_lock = threading.Lock()
+
     def __init__(self):
-        self.client = RESTClient(app.config["POLYGON_API_KEY"])
+        super().__init__()
+        self.client = self._get_rest_client(app.config["POLYGON_API_KEY"])
+
+    @classmethod
+    def _get_rest_client(cls, api_key: str) -> RESTClient:
+        with cls._rest_clients_lock:
+            client = cls._rest_clients.get(api_key)
+            if client is None:
+                client = RESTClient(
+                    api_key,
+                    num_pools=app.config.get("PROVIDER_HTTP_POOL_CONNECTIONS", 4),
+                )
+                cls._rest_clients[api_key] = client
+            return client
 
     def get_rates(
         self,
-        from_currency: str,
-        to_currency: str,
+        from_currency: str = None,
+        to_currency: str = None,
         amount: float = 1.0,
         precision: int = 2,
+        base_currency: str = None,
+        target_currencies: list[str] = None,
     ) -> dict:
         """
         Fetch real-time currency conversion from Polygon.
+        With base_currency and target_currencies, fetch all of the base's pairs
+        from the forex snapshot instead (see get_snapshot_rates).
         Returns a standardized response dict.
         """
+        if target_currencies is not None:
+            return self.get_snapshot_rates(base_currency, target_currencies)
+
         logger.info(
             f"Requesting Polygon conversion: {amount} {from_currency} -> {to_currency} (precision={precision})"
         )
@@ -50,6 +87,99 @@ class PolygonClient(BaseProviderClient):
             logger.exception(f"Error fetching conversion from Polygon: {e}")
             raise e
 
+    def get_snapshot_rates(
+        self, base_currency: str, target_currencies: list[str]
+    ) -> dict:
+        """
+        Fetch the latest quotes for many pairs of one base from the forex
+        snapshot, SNAPSHOT_CHUNK_SIZE tickers per request.
+        Returns the same shape as the other providers' per-base responses.
+        """
+        logger.info(
+            f"Requesting Polygon forex snapshot: {base_currency} -> {target_currencies}"
+        )
+        try:
+            tickers = []
+            for chunk in self._ticker_chunks(base_currency, target_currencies):
+                response = self.client.get_snapshot_all("forex", chunk, raw=True)
+                tickers.extend(json.loads(response.data).get("tickers") or [])
+            return self._parse_snapshot(base_currency, tickers)
+        except Exception as e:
+            logger.exception(f"Error fetching snapshot from Polygon: {e}")
+            raise e
+
+    async def get_rates_async(self, session, *args, **kwargs) -> dict:
+        """
+        Snapshot requests go straight to the REST endpoint on the aiohttp
+        session; single conversions fall back to the SDK in a thread.
+        """
+        if kwargs.get("target_currencies") is None:
+            return await super().get_rates_async(session, *args, **kwargs)
+
+        base_currency = kwargs["base_currency"]
+        logger.info(f"Requesting Polygon forex snapshot (async) for {base_currency}")
+        try:
+            chunks = await asyncio.gather(
+                *(
+                    self._fetch_snapshot_chunk(session, chunk)
+                    for chunk in self._ticker_chunks(
+                        base_currency, kwargs["target_currencies"]
+                    )
+                )
+            )
+            return self._parse_snapshot(
+                base_currency, [ticker for chunk in chunks for ticker in chunk]
+            )
+        except Exception as e:
+            logger.exception(f"Error fetching snapshot from Polygon: {e}")
+            raise e
+
+    async def _fetch_snapshot_chunk(self, session, tickers: list[str]) -> list[dict]:
+        async with session.get(
+            f"{self.client.BASE}{SNAPSHOT_PATH}",
+            params={"tickers": ",".join(tickers)},
+            headers={"Authorization": f"Bearer {self.client.API_KEY}"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            data = await response.json(content_type=None)
+        return data.get("tickers") or []
+
+    def _ticker_chunks(self, base_currency: str, target_currencies: list[str]):
+        tickers = [f"C:{base_currency}{target}" for target in target_currencies]
+        for start in range(0, len(tickers), self.SNAPSHOT_CHUNK_SIZE):
+            yield tickers[start : start + self.SNAPSHOT_CHUNK_SIZE]
+
+    @staticmethod
+    def _parse_snapshot(base_currency: str, tickers: list[dict]) -> dict:
+        """
+        Map snapshot tickers (C:USDZAR) back to target currencies.
+        Ask prices are used as the rate, as with single conversions.
+        """
+        prefix = f"C:{base_currency}"
+        conversion_rates, bid_rates, updated = {}, {}, []
+        for ticker in tickers:
+            symbol = ticker.get("ticker", "")
+            quote = ticker.get("lastQuote") or {}
+            if not symbol.startswith(prefix) or not quote.get("a"):
+                continue
+            target_currency = symbol[len(prefix) :]
+            conversion_rates[target_currency] = quote["a"]
+            bid_rates[target_currency] = quote.get("b")
+            if quote.get("t"):
+                updated.append(quote["t"])
+
+        logger.info(
+            f"Polygon snapshot returned {len(conversion_rates)} rates for {base_currency}"
+        )
+        return {
+            "base_code": base_currency,
+            "conversion_rates": conversion_rates,
+            "bid_rates": bid_rates,
+            # Unix milliseconds of the oldest quote in the snapshot
+            "last_update_utc": min(updated) if updated else int(time.time() * 1000),
+            "provider": "polygon",
+        }
+
     def health_check(self) -> dict:
         """
         Health check for Polygon API.
@@ -64,3 +194,6 @@ class PolygonClient(BaseProviderClient):
         except Exception as e:
             logger.error(f"Polygon API health check failed: {e}")
             return {"status": False, "details": str(e)}
+
+
+os.register_at_fork(after_in_child=PolygonClient._rest_clients.clear)
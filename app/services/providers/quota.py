@@ -0,0 +1,239 @@
+# Provider quota scheduler
+"""
+Token-bucket accounting for provider API quotas.
+
+Every provider call takes a token from the provider's per-minute bucket and
+counts against its monthly allowance. State is shared through Redis, updated by
+one Lua script so concurrent workers cannot overspend, and kept in process
+memory when Redis is unavailable.
+
+Before a refresh is dispatched, plan() ranks the pending requests by pair
+priority and defers what does not fit the remaining budget. When a provider's
+monthly usage runs more than a day ahead of an even spread across the month,
+only requests of at least QUOTA_TIGHT_MIN_PRIORITY are sent.
+"""
+
+import calendar
+import threading
+import time
+from datetime import UTC, datetime
+
+import redis
+from flask import current_app
+from loguru import logger
+
+from app.extensions import get_redis
+
+KEY_PREFIX = "quota"
+
+# Take one token from the minute bucket and count it against the month.
+# KEYS: bucket hash, month counter
+# ARGV: capacity, refill per second, now, monthly limit, month counter ttl
+_ACQUIRE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local monthly = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+if capacity > 0 then
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+end
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+
+local allowed = 1
+if (capacity > 0 and tokens < 1) or (monthly > 0 and used >= monthly) then
+    allowed = 0
+elseif capacity > 0 then
+    tokens = tokens - 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+if allowed == 1 then
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[5]))
+end
+return allowed
+"""
+
+
+class QuotaExceededError(Exception):
+    """Raised instead of calling a provider whose quota is used up."""
+
+
+def _month_progress(now: datetime) -> float:
+    """Fraction of the current calendar month that has elapsed."""
+    days = calendar.monthrange(now.year, now.month)[1]
+    elapsed = (now.day - 1) * 86400 + now.hour * 3600 + now.minute * 60 + now.second
+    return elapsed / (days * 86400)
+
+
+class QuotaScheduler:
+    """
+    Per-provider token buckets (per minute) and monthly counters.
+    Limits come from PROVIDER_QUOTAS; 0 or a missing entry means unlimited.
+    """
+
+    def __init__(self):
+        self._local: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._script = None
+
+    @staticmethod
+    def _limits(provider: str) -> tuple[int, int]:
+        quota = current_app.config.get("PROVIDER_QUOTAS", {}).get(provider, {})
+        return quota.get("per_minute", 0), quota.get("monthly", 0)
+
+    @staticmethod
+    def _keys(provider: str, now: datetime) -> tuple[str, str]:
+        return (
+            f"{KEY_PREFIX}:{provider}:bucket",
+            f"{KEY_PREFIX}:{provider}:month:{now:%Y%m}",
+        )
+
+    def try_acquire(self, provider: str) -> bool:
+        """Take one call from the provider's budget; False when none is left."""
+        per_minute, monthly = self._limits(provider)
+        if not per_minute and not monthly:
+            return True
+
+        now = datetime.now(UTC)
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._script is None:
+                    self._script = client.register_script(_ACQUIRE_SCRIPT)
+                return bool(
+                    self._script(
+                        keys=self._keys(provider, now),
+                        args=[
+                            per_minute,
+                            per_minute / 60,
+                            now.timestamp(),
+                            monthly,
+                            35 * 86400,
+                        ],
+                    )
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Could not update quota for {provider}: {e}")
+
+        with self._lock:
+            state = self._refill_local(provider, per_minute, now)
+            if (per_minute and state["tokens"] < 1) or (
+                monthly and state["used"] >= monthly
+            ):
+                return False
+            if per_minute:
+                state["tokens"] -= 1
+            state["used"] += 1
+            return True
+
+    def acquire(self, provider: str):
+        """Raise QuotaExceededError when the provider has no budget left."""
+        if not self.try_acquire(provider):
+            raise QuotaExceededError(f"Quota exhausted for {provider}")
+
+    def usage(self, provider: str) -> dict:
+        """Current budget of a provider, without consuming any of it."""
+        per_minute, monthly = self._limits(provider)
+        now = datetime.now(UTC)
+        tokens, used = self._peek(provider, per_minute, now)
+        pace = monthly * _month_progress(now) if monthly else None
+        # Allow running a day's worth of calls ahead of an even spread
+        slack = monthly / calendar.monthrange(now.year, now.month)[1]
+        return {
+            "provider": provider,
+            "per_minute_limit": per_minute or None,
+            "minute_tokens": round(tokens, 2) if per_minute else None,
+            "monthly_limit": monthly or None,
+            "monthly_used": used,
+            "monthly_remaining": max(monthly - used, 0) if monthly else None,
+            "monthly_pace": round(pace, 1) if pace is not None else None,
+            "tight": bool(monthly) and used > pace + slack,
+        }
+
+    def plan(self, jobs: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Split jobs into (admitted, deferred).
+        Jobs are ranked by their "priority" (highest first) and admitted while the
+        provider's remaining minute and monthly budget lasts.
+        """
+        min_priority = current_app.config.get("QUOTA_TIGHT_MIN_PRIORITY", 1)
+        budgets = {}
+        admitted, deferred = [], []
+
+        for job in sorted(jobs, key=lambda job: job.get("priority", 0), reverse=True):
+            provider = job["provider"]
+            if provider not in budgets:
+                usage = self.usage(provider)
+                limits = [
+                    int(value)
+                    for value in (usage["minute_tokens"], usage["monthly_remaining"])
+                    if value is not None
+                ]
+                budgets[provider] = {
+                    "left": min(limits) if limits else None,
+                    "tight": usage["tight"],
+                }
+
+            budget = budgets[provider]
+            if budget["tight"] and job.get("priority", 0) < min_priority:
+                deferred.append(job)
+            elif budget["left"] is None:
+                admitted.append(job)
+            elif budget["left"] > 0:
+                budget["left"] -= 1
+                admitted.append(job)
+            else:
+                deferred.append(job)
+
+        if deferred:
+            logger.warning(
+                "Deferred over quota: "
+                + ", ".join(f"{job['provider']}:{job['key']}" for job in deferred)
+            )
+        return admitted, deferred
+
+    def _peek(self, provider: str, per_minute: int, now: datetime) -> tuple[float, int]:
+        client = get_redis()
+        if client is not None:
+            bucket_key, month_key = self._keys(provider, now)
+            try:
+                pipe = client.pipeline()
+                pipe.hmget(bucket_key, "tokens", "ts")
+                pipe.get(month_key)
+                (tokens, ts), used = pipe.execute()
+                tokens = float(tokens) if tokens is not None else per_minute
+                if ts is not None and per_minute:
+                    elapsed = now.timestamp() - float(ts)
+                    tokens = min(per_minute, tokens + elapsed * per_minute / 60)
+                return tokens, int(used or 0)
+            except redis.RedisError as e:
+                logger.warning(f"Could not read quota for {provider}: {e}")
+
+        with self._lock:
+            state = self._refill_local(provider, per_minute, now)
+            return state["tokens"], state["used"]
+
+    def _refill_local(self, provider: str, per_minute: int, now: datetime) -> dict:
+        """Local bucket state, refilled to now. Caller holds the lock."""
+        month = f"{now:%Y%m}"
+        state = self._local.get(provider)
+        if state is None or state["month"] != month:
+            state = self._local[provider] = {
+                "tokens": float(per_minute),
+                "ts": time.time(),
+                "used": 0,
+                "month": month,
+            }
+        elapsed = now.timestamp() - state["ts"]
+        state["tokens"] = min(per_minute, state["tokens"] + elapsed * per_minute / 60)
+        state["ts"] = now.timestamp()
+        return state
+
+
+quota_scheduler = QuotaScheduler()
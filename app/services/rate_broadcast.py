@@ -0,0 +1,200 @@
+# Rate update broadcaster
+"""
+Fan-out of rate changes to streaming clients (GET /rates/stream).
+
+One background thread per API process follows the published rates generation
+through the shared rate snapshot cache, so each generation costs one database
+read per process however many clients are connected. It diffs the new snapshot
+against the previous one and keeps the last RATE_STREAM_HISTORY diffs. Clients
+block on a condition until a newer generation arrives and take the diffs they
+missed; payloads are serialized once per generation and set of currencies.
+Pairs that drop out of the snapshot (deactivated or deleted) are sent as removed.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+from loguru import logger
+
+from app.services.rate_snapshot import RateSnapshot, rate_snapshot_cache
+
+# A pair counts as changed when any of these differ between generations
+PRICE_FIELDS = (
+    "average_buy_rate",
+    "average_sell_rate",
+    "final_buy_rate",
+    "final_sell_rate",
+    "markup_percentage",
+)
+
+
+def _price(rate: dict) -> tuple:
+    return tuple(rate.get(field) for field in PRICE_FIELDS)
+
+
+def pairs_payload(
+    generation: int,
+    pairs: dict[tuple[str, str], dict],
+    currencies: frozenset | None,
+    removed: list[tuple[str, str]] = (),
+) -> str | None:
+    """
+    JSON event data for the pairs whose base currency was requested (all pairs
+    without a filter), grouped by base. Removed pairs are listed as target
+    codes per base under "removed". None when no pair matches.
+    """
+    rates: dict[str, list[dict]] = {}
+    for (base_currency, _target_currency), rate in pairs.items():
+        if currencies is None or base_currency in currencies:
+            rates.setdefault(base_currency, []).append(rate)
+    gone: dict[str, list[str]] = {}
+    for base_currency, target_currency in removed:
+        if currencies is None or base_currency in currencies:
+            gone.setdefault(base_currency, []).append(target_currency)
+    if not rates and not gone:
+        return None
+
+    payload = {"generation": generation, "rates": rates}
+    if gone:
+        payload["removed"] = gone
+    return json.dumps(payload, default=str)
+
+
+class RateUpdate:
+    """Pairs changed or removed between two generations."""
+
+    def __init__(
+        self,
+        previous: int,
+        generation: int,
+        changes: dict,
+        removed: list[tuple[str, str]] = (),
+    ):
+        self.previous = previous
+        self.generation = generation
+        self.changes = changes
+        self.removed = removed
+        self._payloads: dict[frozenset | None, str | None] = {}
+
+    def payload(self, currencies: frozenset | None) -> str | None:
+        # Clients with the same filter share one serialization; a racing
+        # duplicate computation is harmless
+        if currencies not in self._payloads:
+            self._payloads[currencies] = pairs_payload(
+                self.generation, self.changes, currencies, self.removed
+            )
+        return self._payloads[currencies]
+
+
+class RateBroadcaster:
+    """
+    Latest snapshot and recent diffs, shared by every stream in the process.
+    start() launches the polling thread on first use.
+    """
+
+    def __init__(self, history: int = 32):
+        self.history = history
+        self._snapshot: RateSnapshot | None = None
+        self._updates: deque[RateUpdate] = deque(maxlen=history)
+        self._condition = threading.Condition()
+        self._thread = None
+        self.subscribers = 0
+
+    @property
+    def snapshot(self) -> RateSnapshot | None:
+        return self._snapshot
+
+    def subscribe(self, limit: int = None) -> bool:
+        """Count a new stream; False when `limit` streams are already open."""
+        with self._condition:
+            if limit and self.subscribers >= limit:
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def start(self, app, snapshot: RateSnapshot):
+        """Seed with the caller's snapshot and make sure the poller is running."""
+        with self._condition:
+            if self._snapshot is None:
+                self._snapshot = snapshot
+            if self._thread is None or not self._thread.is_alive():
+                self._updates = deque(
+                    maxlen=app.config.get("RATE_STREAM_HISTORY", self.history)
+                )
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name="rate-broadcaster", daemon=True
+                )
+                self._thread.start()
+
+    def publish(self, snapshot: RateSnapshot):
+        """Record the diff to a new snapshot and wake the waiting streams."""
+        previous = self._snapshot
+        if previous is not None and snapshot.generation == previous.generation:
+            return
+
+        changes = {
+            pair: rate
+            for pair, rate in snapshot.pairs.items()
+            if previous is None
+            or pair not in previous.pairs
+            or _price(previous.pairs[pair]) != _price(rate)
+        }
+        removed = (
+            [pair for pair in previous.pairs if pair not in snapshot.pairs]
+            if previous is not None
+            else []
+        )
+        update = RateUpdate(
+            previous.generation if previous else None,
+            snapshot.generation,
+            changes,
+            removed,
+        )
+        with self._condition:
+            self._snapshot = snapshot
+            self._updates.append(update)
+            self._condition.notify_all()
+        logger.info(
+            f"Broadcasting generation {snapshot.generation}: {len(changes)} changed "
+            f"and {len(removed)} removed pairs to {self.subscribers} streams"
+        )
+
+    def updates_since(self, generation: int, timeout: float) -> list[RateUpdate] | None:
+        """
+        Diffs published after `generation`, waiting up to `timeout` seconds for
+        one. Returns [] on timeout, or None when the caller has fallen further
+        behind than the history and must resync from the snapshot.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._snapshot.generation != generation, timeout
+            )
+            if self._snapshot.generation == generation:
+                return []
+            updates = list(self._updates)
+
+        for i, update in enumerate(updates):
+            if update.previous == generation:
+                return updates[i:]
+        return None
+
+    def _run(self, app):
+        interval = app.config.get("RATE_SNAPSHOT_CHECK_SECONDS", 1.0)
+        while True:
+            time.sleep(interval)
+            try:
+                # Fresh app context per check, so no session stays open between them
+                with app.app_context():
+                    snapshot = rate_snapshot_cache.get()
+                self.publish(snapshot)
+            except Exception as e:
+                logger.exception(f"Rate broadcaster failed to check for updates: {e}")
+
+
+rate_broadcaster = RateBroadcaster()
@@ -0,0 +1,230 @@
+# Rate change tracker
+"""
+Change detection for the refresh pipeline.
+
+Providers often return the same values run after run. The tracker remembers the
+last persisted quote per (pair, provider) and the last aggregated rate per pair,
+so only changed values are inserted; unchanged aggregated rates just have their
+validity window extended. The maps live in Redis when it is available, so every
+worker sees the same state. Without Redis the aggregated map is re-read from
+the database on every load, and quotes are not filtered at all: the last quote
+one worker wrote need not be the last one in the database.
+"""
+
+import json
+import threading
+from collections import Counter
+
+import redis
+from loguru import logger
+
+from app.extensions import get_redis
+from app.models import AggregatedRate
+
+LAST_QUOTES_KEY = "rates:last_quotes"
+LAST_AGGREGATED_KEY = "rates:last_aggregated"
+WRITE_STATS_KEY = "rates:write_stats"
+
+# Aggregated values compared between runs, in this order
+AGGREGATED_FIELDS = (
+    "average_buy_rate",
+    "average_sell_rate",
+    "final_buy_rate",
+    "final_sell_rate",
+    "markup_percentage",
+    "provider_count",
+)
+
+# Values are stored as Numeric(18, 8), so compare at that precision
+PRECISION = 8
+
+
+def _quote_field(currency_pair_id: int, provider: str) -> str:
+    return f"{currency_pair_id}:{provider}"
+
+
+def _quote_values(row: dict) -> list:
+    return [round(row["buy_rate"], PRECISION), round(row["sell_rate"], PRECISION)]
+
+
+def _aggregated_field(currency_pair_id: int, source: str) -> str:
+    # Refresh rates keep the bare pair id they have always been stored under
+    if source == "refresh":
+        return str(currency_pair_id)
+    return f"{currency_pair_id}:{source}"
+
+
+def _aggregated_values(row: dict) -> list:
+    return [round(float(row[field]), PRECISION) for field in AGGREGATED_FIELDS]
+
+
+class RateChangeTracker:
+    """
+    Last persisted values per (pair, provider) quote and per aggregated pair.
+    Call load() at the start of a refresh, filter the new rows, and remember()
+    only after the transaction has committed.
+    """
+
+    def __init__(self):
+        self._quotes: dict[str, list] = {}
+        # (pair id, source) field -> [aggregated id, *values]
+        self._aggregated: dict[str, list] = {}
+        # Whether _quotes came from Redis, i.e. covers every worker's writes
+        self._quotes_shared = False
+        self._stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Refresh the maps from Redis. Without Redis the aggregated map is
+        re-seeded from the database on every load, since another process may
+        have written newer aggregated rates than the ones remembered here.
+        """
+        self._quotes_shared = False
+        client = get_redis()
+        if client is not None:
+            try:
+                quotes = client.hgetall(LAST_QUOTES_KEY)
+                aggregated = client.hgetall(LAST_AGGREGATED_KEY)
+            except redis.RedisError as e:
+                logger.warning(f"Could not load rate change state from Redis: {e}")
+            else:
+                with self._lock:
+                    self._quotes = {k: json.loads(v) for k, v in quotes.items()}
+                    self._aggregated = {k: json.loads(v) for k, v in aggregated.items()}
+                self._quotes_shared = True
+                if self._aggregated:
+                    return
+
+        self._seed_aggregated()
+
+    def _seed_aggregated(self):
+        """
+        Seed the aggregated map from the latest row per pair and source. Raw
+        quotes are not seeded since rates rows do not identify their provider
+        yet.
+        """
+        seeded = {
+            _aggregated_field(rate.currency_pair_id, rate.source): [
+                rate.id,
+                *_aggregated_values(
+                    {field: getattr(rate, field) or 0 for field in AGGREGATED_FIELDS}
+                ),
+            ]
+            for rate in AggregatedRate.get_latest_per_source()
+        }
+        with self._lock:
+            self._aggregated = seeded
+        logger.debug(f"Seeded rate change tracker with {len(seeded)} aggregated rates")
+
+    def changed_quotes(self, rows: list[dict]) -> list[dict]:
+        """
+        Quote rows whose buy/sell differ from the last persisted values, or
+        every row when the last values were not loaded from Redis.
+        """
+        if not self._quotes_shared:
+            return rows
+        with self._lock:
+            return [
+                row
+                for row in rows
+                if self._quotes.get(
+                    _quote_field(row["currency_pair_id"], row["provider"])
+                )
+                != _quote_values(row)
+            ]
+
+    def split_aggregated(
+        self, rows: list[dict], source: str = "refresh"
+    ) -> tuple[list[dict], list[int]]:
+        """
+        Split aggregated rows into (changed rows, ids of the unchanged rates
+        whose validity should be extended). Rows are only compared with the
+        last rate of the same source.
+        """
+        changed, unchanged_ids = [], []
+        with self._lock:
+            for row in rows:
+                last = self._aggregated.get(
+                    _aggregated_field(row["currency_pair_id"], source)
+                )
+                if last and last[1:] == _aggregated_values(row):
+                    unchanged_ids.append(last[0])
+                else:
+                    changed.append(row)
+        return changed, unchanged_ids
+
+    def remember(
+        self,
+        quotes: list[dict],
+        aggregated: list[dict],
+        aggregated_ids: list[int],
+        source: str = "refresh",
+    ):
+        """Record committed values as the new baseline."""
+        quote_updates = {
+            _quote_field(row["currency_pair_id"], row["provider"]): _quote_values(row)
+            for row in quotes
+        }
+        aggregated_updates = {
+            _aggregated_field(row["currency_pair_id"], source): [
+                rate_id,
+                *_aggregated_values(row),
+            ]
+            for row, rate_id in zip(aggregated, aggregated_ids, strict=True)
+        }
+
+        with self._lock:
+            self._quotes.update(quote_updates)
+            self._aggregated.update(aggregated_updates)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            if quote_updates:
+                pipe.hset(
+                    LAST_QUOTES_KEY,
+                    mapping={k: json.dumps(v) for k, v in quote_updates.items()},
+                )
+            if aggregated_updates:
+                pipe.hset(
+                    LAST_AGGREGATED_KEY,
+                    mapping={k: json.dumps(v) for k, v in aggregated_updates.items()},
+                )
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not store rate change state in Redis: {e}")
+
+    def record_stats(self, **counts: int):
+        """Add to the write counters, e.g. quotes_skipped=12."""
+        counts = {name: value for name, value in counts.items() if value}
+        with self._lock:
+            self._stats.update(counts)
+
+        client = get_redis()
+        if client is None or not counts:
+            return
+        try:
+            pipe = client.pipeline()
+            for name, value in counts.items():
+                pipe.hincrby(WRITE_STATS_KEY, name, value)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not record write stats in Redis: {e}")
+
+    def get_stats(self) -> dict:
+        """Write counters across all workers (this process only without Redis)."""
+        client = get_redis()
+        if client is not None:
+            try:
+                return {k: int(v) for k, v in client.hgetall(WRITE_STATS_KEY).items()}
+            except redis.RedisError as e:
+                logger.warning(f"Could not read write stats from Redis: {e}")
+        with self._lock:
+            return dict(self._stats)
+
+
+# Shared by every refresh run in this process
+rate_change_tracker = RateChangeTracker()
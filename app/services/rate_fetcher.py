@@ -1,19 +1,19 @@
 
 
-import concurrent.futures
-import time
+import asyncio
 
 from loguru import logger
 
+from app.services.async_fetch import (
+	fetch_with_retry,
+	open_http_session,
+)
 from app.services.providers.provider_factory import (
 	PROVIDER_CLIENTS,
 	get_provider_client,
 )
 
 
-def exponential_backoff(attempt, base=0.5, factor=2.0, max_backoff=8.0):
-	return min(base * (factor ** (attempt - 1)), max_backoff)
-
 class RateFetcherService:
 	def __init__(self, provider_names=None):
 
@@ -25,46 +25,54 @@ class RateFetcherService:
 
 	def fetch_rates(self, *args, **kwargs):
 		"""
-		Fetch rates concurrently from all configured providers with retry, failover, and validation.
+		Fetch rates from all configured providers with retry, failover, and validation.
 		Returns the first successful, validated response or raises an error if all fail.
+		Blocking wrapper around fetch_rates_async for callers outside an event loop.
 		"""
-		errors = []
-		with concurrent.futures.ThreadPoolExecutor() as executor:
-			future_to_provider = {
-				executor.submit(self._fetch_with_retry, provider, *args, **kwargs): provider
-				for provider in self.providers
-			}
+		return asyncio.run(self.fetch_rates_async(*args, **kwargs))
 
-			for future in concurrent.futures.as_completed(future_to_provider):
-				provider = future_to_provider[future]
+	async def fetch_rates_async(self, *args, session=None, deadline=None, **kwargs):
+		"""
+		Race all configured providers on one event loop.
+		The first valid response wins and the remaining requests are cancelled.
+		Args:
+			session: Shared aiohttp session; one is opened for the call when omitted.
+			deadline: loop.time() after which retries are no longer attempted.
+		"""
+		if session is None:
+			async with open_http_session() as session:
+				return await self.fetch_rates_async(
+					*args, session=session, deadline=deadline, **kwargs
+				)
+
+		tasks = {
+			asyncio.ensure_future(
+				fetch_with_retry(provider, session, *args, deadline=deadline, **kwargs)
+			): provider
+			for provider in self.providers
+		}
+		errors = []
+		try:
+			for task in asyncio.as_completed(tasks):
 				try:
-					result = future.result()
-					if result and self._validate_rate_data(result):
-						logger.info(f"Valid rates received from {provider.__class__.__name__}")
-						return result
-					else:
-						logger.warning(f"Invalid or empty rates from {provider.__class__.__name__}")
-						errors.append(f"Invalid/empty rates from {provider.__class__.__name__}")
+					result = await task
 				except Exception as e:
-					logger.error(f"Error fetching rates from {provider.__class__.__name__}: {e}")
+					logger.error(f"Error fetching rates: {e}")
 					errors.append(str(e))
+					continue
+				if result and self._validate_rate_data(result):
+					logger.info(f"Valid rates received for {self.provider_names}")
+					return result
+				logger.warning(f"Invalid or empty rates for {self.provider_names}")
+				errors.append(f"Invalid/empty rates for {self.provider_names}")
+		finally:
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+
 		logger.error(f"All providers failed. Errors: {errors}")
 		raise Exception(f"All providers failed. Errors: {errors}")
 
-	def _fetch_with_retry(self, provider, *args, **kwargs):
-		max_attempts = getattr(provider, 'max_retries', 3)
-		for attempt in range(1, max_attempts + 1):
-			try:
-				logger.info(f"Attempt {attempt}: Fetching rates from {provider.__class__.__name__}")
-				return provider.get_rates(*args, **kwargs)
-			except Exception as e:
-				logger.warning(f"Attempt {attempt} failed for {provider.__class__.__name__}: {e}")
-				if attempt == max_attempts:
-					raise
-				backoff = exponential_backoff(attempt)
-				logger.info(f"Backing off for {backoff} seconds before retrying {provider.__class__.__name__}")
-				time.sleep(backoff)
-
 	def _validate_rate_data(self, data):
 		# Basic validation: check for required keys and non-empty values
 		required_keys = ["base_code", "conversion_rates"]
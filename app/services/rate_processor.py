@@ -3,15 +3,19 @@
 This service is responsible for processing and aggregating forex rates from various providers.
 """
 
-from collections import defaultdict
-from datetime import timedelta
-from decimal import ROUND_HALF_UP, Decimal, getcontext  # added
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 
+from flask import current_app
 from loguru import logger
-from sqlalchemy import func
 
-from app.models import AggregatedRate, CurrencyPair, Rate
-from app.services.rate_fetcher import RateFetcherService
+from app.models import AggregatedRateRollup, CurrencyPair
+from app.services.pair_registry import PairRegistry
+from app.services.rate_aggregator import VectorizedRateAggregator
+from app.services.rate_change_tracker import rate_change_tracker
+from app.services.rate_snapshot import publish_generation
+from app.services.rate_writer import BulkRateWriter
+from app.services.refresh_orchestrator import RefreshOrchestrator
 
 # from app.extenstion import db
 from run import db
@@ -25,27 +29,49 @@ class RateProcessorService:
         """
         Fetch rates for a specific currency pair from providers, clean the results, and save to the database.
         """
-        currencies = self._get_currencies()
+        registry = PairRegistry(self._get_currencies())
+        snapshot_base = self._get_snapshot_base()
 
-        provider_results = []
+        # fetch every (provider, base currency) combination concurrently
+        responses = RefreshOrchestrator().run(
+            self._build_fetch_jobs(registry, snapshot_base)
+        )
 
-        # fetch rate from exchange rates api
-        exchange_rates_api_results = self._process_exchange_rate_client(currencies)
+        if snapshot_base:
+            # one snapshot per provider, every pair derived from it
+            exchange_rates_api_results = self._derive_from_snapshot(
+                registry, responses["exchange_rate"].get(snapshot_base), snapshot_base
+            )
+            currency_layer_results = self._derive_from_snapshot(
+                registry, responses["currency_layer"].get(snapshot_base), snapshot_base
+            )
+            polygon_results = self._derive_from_snapshot(
+                registry, responses["polygon"].get(snapshot_base), snapshot_base
+            )
+        else:
+            # fetch rate from exchange rates api
+            exchange_rates_api_results = self._process_exchange_rate_client(
+                registry, responses["exchange_rate"]
+            )
 
-        # fetch rate from polygon api
-        # polygon_results = self._process_polygon_client(currencies)
+            # fetch rate from currency layer api
+            currency_layer_results = self._process_currency_layer_client(
+                registry, responses["currency_layer"]
+            )
 
-        # fetch rate from currency layer api
-        currency_layer_results = self._process_currency_layer_client(currencies)
+            # fetch rate from polygon api
+            polygon_results = self._process_polygon_client(
+                registry, responses["polygon"]
+            )
 
-        provider_results.append(
+        provider_results = [
             {"source": "exchange_rates_api", "rate_data": exchange_rates_api_results},
             {"source": "currency_layer", "rate_data": currency_layer_results},
-            # {"source": "polygon", "rate_data": polygon_results},
-        )
+            {"source": "polygon", "rate_data": polygon_results},
+        ]
 
         # Clean and save rates to the database
-        self._save_rates(currencies, provider_results)
+        self._save_rates(registry, provider_results)
 
     def _get_currencies(self):
         """
@@ -57,7 +83,7 @@ class RateProcessorService:
         )
         return currency_pairs
 
-    def _group_currency_pairs_by_base(self, currency_pairs):
+    def _group_currency_pairs_by_base(self, registry: PairRegistry):
         """
         Group currency pairs by base currency for rate fetching - [USD, ZAR]
         Returns:
@@ -68,20 +94,117 @@ class RateProcessorService:
         "ZAR": ["GBP"]
         }
         """
-        logger.debug("--- Grouping currency pairs by base currency.")
-        grouped = {}
-
-        for pair in currency_pairs:
-            if pair.base_currency not in grouped:
-                grouped[pair.base_currency] = []
-            grouped[pair.base_currency].append(pair.target_currency)
-
+        grouped = registry.grouped_by_base
         logger.debug(f"---Grouped currency pairs: {grouped}")
         return grouped
 
-    def _process_exchange_rate_client(self, currencies) -> dict:
+    @staticmethod
+    def _get_snapshot_base() -> str | None:
+        """
+        Snapshot base currency when RATE_FETCH_MODE is 'snapshot', else None.
+        """
+        if current_app.config.get("RATE_FETCH_MODE", "per_base") != "snapshot":
+            return None
+        return current_app.config.get("RATE_SNAPSHOT_BASE", "USD")
+
+    def _build_fetch_jobs(
+        self, registry: PairRegistry, snapshot_base: str = None
+    ) -> list[dict]:
+        """
+        Build one RefreshOrchestrator job per provider and base currency, or a
+        single job per provider for snapshot_base in snapshot mode. Jobs carry
+        the highest priority of the pairs they serve.
+        """
+        if snapshot_base:
+            priority = max(registry.priority_by_base.values(), default=0)
+            return [
+                {
+                    "provider": "exchange_rate",
+                    "key": snapshot_base,
+                    "kwargs": {"base_currency": snapshot_base},
+                    "priority": priority,
+                },
+                {
+                    "provider": "currency_layer",
+                    "key": snapshot_base,
+                    "kwargs": {
+                        "source_currency": snapshot_base,
+                        "target_currencies": [
+                            currency
+                            for currency in registry.currencies
+                            if currency != snapshot_base
+                        ],
+                    },
+                    "priority": priority,
+                },
+            ] + self._polygon_jobs(
+                {
+                    snapshot_base: [
+                        currency
+                        for currency in registry.currencies
+                        if currency != snapshot_base
+                    ]
+                },
+                {snapshot_base: priority},
+            )
+
+        jobs = []
+        for base_currency, target_currencies in self._group_currency_pairs_by_base(
+            registry
+        ).items():
+            jobs.append(
+                {
+                    "provider": "exchange_rate",
+                    "key": base_currency,
+                    "kwargs": {"base_currency": base_currency},
+                    "priority": registry.priority_by_base[base_currency],
+                }
+            )
+            jobs.append(
+                {
+                    "provider": "currency_layer",
+                    "key": base_currency,
+                    "kwargs": {
+                        "source_currency": base_currency,
+                        "target_currencies": target_currencies,
+                    },
+                    "priority": registry.priority_by_base[base_currency],
+                }
+            )
+        return jobs + self._polygon_jobs(
+            self._group_currency_pairs_by_base(registry), registry.priority_by_base
+        )
+
+    @staticmethod
+    def _polygon_jobs(
+        targets_by_base: dict[str, list[str]], priority_by_base: dict[str, int]
+    ) -> list[dict]:
+        """
+        One Polygon forex snapshot job per base (chunked by the client), or none
+        when no Polygon API key is configured.
+        """
+        if not current_app.config.get("POLYGON_API_KEY"):
+            return []
+        return [
+            {
+                "provider": "polygon",
+                "key": base_currency,
+                "kwargs": {
+                    "base_currency": base_currency,
+                    "target_currencies": target_currencies,
+                },
+                "priority": priority_by_base.get(base_currency, 0),
+            }
+            for base_currency, target_currencies in targets_by_base.items()
+        ]
+
+    def _process_exchange_rate_client(
+        self, registry: PairRegistry, responses: dict
+    ) -> dict:
         """
         Process rates for Exchange Rate API.
+        Args:
+            responses (dict): Fetched ExchangeRateClient responses by base currency.
 
         result:
         {
@@ -99,14 +222,15 @@ class RateProcessorService:
         }
         """
         logger.debug("------> Processing rates using Exchange Rate API. <------")
-        grouped_currency_pairs = self._group_currency_pairs_by_base(currencies)
+        grouped_currency_pairs = self._group_currency_pairs_by_base(registry)
 
         # process rates for each base currency
         results = {}
         for base_currency, target_currencies in grouped_currency_pairs.items():
-            logger.info(f" ---- Fetching rates for base currency {base_currency}")
-            self.rate_fetcher = RateFetcherService(provider_names=["exchange_rate"])
-            rate_data = self.rate_fetcher.fetch_rates(base_currency=base_currency)
+            rate_data = responses.get(base_currency)
+            if not rate_data:
+                logger.warning(f"No Exchange Rate API rates for {base_currency}")
+                continue
             logger.debug(
                 f"Fetched rates for base currency {base_currency}:\n\n {rate_data}"
             )
@@ -120,6 +244,7 @@ class RateProcessorService:
                             "pair": target_currency,
                             "rate": rate_data["conversion_rates"][target_currency],
                             "fetched_at": rate_data["last_update_utc"],
+                            "cached": rate_data.get("cached", False),
                         }
                     )
                     logger.debug(
@@ -133,21 +258,54 @@ class RateProcessorService:
         logger.debug(f"Processed Exchange Rate API results: {results}")
         return results
 
-    def _process_polygon_client(self, currencies) -> dict:
+    def _derive_from_snapshot(
+        self, registry: PairRegistry, rate_data: dict | None, snapshot_base: str
+    ) -> dict:
+        """
+        Compute every registered pair from one provider snapshot as
+        rate[target] / rate[base], in one vectorized pass.
+        Returns results in the same shape as the per-base processors.
+        """
+        if not rate_data:
+            logger.warning(f"No snapshot rates for base {snapshot_base}")
+            return {}
+
+        rows, rates = registry.cross_from_snapshot(
+            rate_data.get("conversion_rates", {}), snapshot_base
+        )
+        if len(rows) < len(registry):
+            logger.warning(
+                f"Snapshot for {snapshot_base} covers {len(rows)} of {len(registry)} pairs"
+            )
+
+        fetched_at = rate_data.get("last_update_utc")
+        results = {}
+        for row, rate in zip(rows.tolist(), rates.tolist(), strict=True):
+            pair = registry.pairs[row]
+            results.setdefault(pair.base_currency, []).append(
+                {
+                    "pair": pair.target_currency,
+                    "rate": rate,
+                    "fetched_at": fetched_at,
+                    "cached": rate_data.get("cached", False),
+                }
+            )
+
+        logger.debug(f"Derived {len(rows)} pairs from the {snapshot_base} snapshot")
+        return results
+
+    def _process_polygon_client(self, registry: PairRegistry, responses: dict) -> dict:
         """
         Process rates for Polygon API.
+        Args:
+            responses (dict): Fetched PolygonClient forex snapshots by base currency.
 
         result:
         {
             "USD": [
                 {
                     "pair": "ZAR",
-                    "rate": "<rate>",
-                    "fetched_at": "<timestamp_from_provider>"
-                },
-                {
-                    "pair": "GBP",
-                    "rate": "<rate>",
+                    "rate": "<ask>",
                     "fetched_at": "<timestamp_from_provider>"
                 }
             ]
@@ -156,44 +314,41 @@ class RateProcessorService:
         logger.debug("Processing rates using Polygon API.")
         results = {}
 
-        for currency_pair in currencies:
-            base_currency = currency_pair.base_currency
-            target_currency = currency_pair.target_currency
-
-            logger.info(
-                f"Fetching rate for {base_currency}-{target_currency} using PolygonClient"
-            )
-            try:
-                self.rate_fetcher = RateFetcherService(provider_names=["polygon"])
-                rate_data = self.rate_fetcher.fetch_rates(
-                    from_currency=base_currency,
-                    to_currency=target_currency,
-                )
-                logger.debug(
-                    f"Fetched rate for {base_currency}-{target_currency}: {rate_data}"
-                )
-
-                if base_currency not in results:
-                    results[base_currency] = []
+        for base_currency, target_currencies in self._group_currency_pairs_by_base(
+            registry
+        ).items():
+            rate_data = responses.get(base_currency)
+            if not rate_data:
+                logger.warning(f"No Polygon rates for {base_currency}")
+                continue
 
-                results[base_currency].append(
-                    {
-                        "pair": target_currency,
-                        "rate": rate_data["conversion_rate"],
-                        "fetched_at": rate_data["last_update_utc"],
-                    }
-                )
-            except Exception as e:
-                logger.error(
-                    f"Failed to fetch rate for {base_currency}-{target_currency} using PolygonClient: {e}"
+            conversion_rates = rate_data["conversion_rates"]
+            results[base_currency] = [
+                {
+                    "pair": target_currency,
+                    "rate": conversion_rates[target_currency],
+                    "fetched_at": rate_data["last_update_utc"],
+                    "cached": rate_data.get("cached", False),
+                }
+                for target_currency in target_currencies
+                if target_currency in conversion_rates
+            ]
+            missing = set(target_currencies) - conversion_rates.keys()
+            if missing:
+                logger.warning(
+                    f"Polygon snapshot has no rates for {base_currency}-{sorted(missing)}"
                 )
 
         logger.debug(f"Processed Polygon API results: {results}")
         return results
 
-    def _process_currency_layer_client(self, currencies) -> dict:
+    def _process_currency_layer_client(
+        self, registry: PairRegistry, responses: dict
+    ) -> dict:
         """
         Process rates for Currency Layer API.
+        Args:
+            responses (dict): Fetched CurrencyLayerClient responses by base currency.
 
         result:
         {
@@ -214,125 +369,106 @@ class RateProcessorService:
         logger.debug("Processing rates using Currency Layer API.")
         results = {}
 
-        # client is expecting
-        # source and list of currencies
         for base_currency, target_currencies in self._group_currency_pairs_by_base(
-            currencies
+            registry
         ).items():
-            logger.info(
-                f"Fetching rates for base currency {base_currency} using CurrencyLayerClient"
-            )
-            try:
-                self.rate_fetcher = RateFetcherService(
-                    provider_names=["currency_layer"]
-                )
-                rate_data = self.rate_fetcher.fetch_rates(
-                    base_currency=base_currency,
-                    target_currencies=target_currencies,
-                )
-                logger.debug(f"Fetched rates for {base_currency}: {rate_data}")
-
-                conversion_rates = rate_data.get("conversion_rates", {})
-                last_update = rate_data.get("last_update_utc")
-
-                results[base_currency] = []
-                for target_currency in target_currencies:
-                    if target_currency in conversion_rates:
-                        rate_value = conversion_rates[target_currency]
-
-                        results[base_currency].append(
-                            {
-                                "pair": target_currency,
-                                "rate": float(rate_value),
-                                "fetched_at": last_update,
-                            }
-                        )
+            rate_data = responses.get(base_currency)
+            if not rate_data:
+                logger.warning(f"No Currency Layer rates for {base_currency}")
+                continue
+            logger.debug(f"Fetched rates for {base_currency}: {rate_data}")
 
-                        logger.debug(
-                            f"Mapped Currency Layer rate for {base_currency}-{target_currency}: {rate_value}"
-                        )
-                    else:
-                        logger.warning(
-                            f"Rate for {base_currency}-{target_currency} not found in Currency Layer response. "
-                            f"Available rates: {list(conversion_rates.keys())}"
-                        )
-            except Exception as e:
-                logger.error(f"Failed to fetch rates for {base_currency}: {e}")
+            conversion_rates = rate_data.get("conversion_rates", {})
+            last_update = rate_data.get("last_update_utc")
+
+            results[base_currency] = []
+            for target_currency in target_currencies:
+                if target_currency in conversion_rates:
+                    rate_value = conversion_rates[target_currency]
+
+                    results[base_currency].append(
+                        {
+                            "pair": target_currency,
+                            "rate": float(rate_value),
+                            "fetched_at": last_update,
+                            "cached": rate_data.get("cached", False),
+                        }
+                    )
+
+                    logger.debug(
+                        f"Mapped Currency Layer rate for {base_currency}-{target_currency}: {rate_value}"
+                    )
+                else:
+                    logger.warning(
+                        f"Rate for {base_currency}-{target_currency} not found in Currency Layer response. "
+                        f"Available rates: {list(conversion_rates.keys())}"
+                    )
 
         logger.debug(f"Processed Currency Layer API results: {results}")
         return results
 
-    def _save_rates(self, currencies: list[CurrencyPair], provider_results: list[dict]):
+    def _save_rates(self, registry: PairRegistry, provider_results: list[dict]):
         """
         Save cleaned rates to the database.
+        Quotes from every provider are collected first, aggregated once per pair and
+        then written in bulk, so the number of round trips does not grow with pairs.
         Args:
-            currencies (list): List of CurrencyPair objects.
+            registry (PairRegistry): Index of the active CurrencyPair objects.
             provider_results (list): List of provider results containing rate data.
         """
         logger.debug("Saving rates to the database.")
 
         try:
-            for provider_result in provider_results:
-                source = provider_result["source"]
-                rate_data = provider_result["rate_data"]
-
-                grouped_rates_by_pair_id: dict[int, list[Rate]] = defaultdict(list)
-
-                for base_currency, rates in rate_data.items():
-                    for rate in rates:
-                        # Find the corresponding currency pair
-                        currency_pair = next(
-                            (
-                                pair
-                                for pair in currencies
-                                if pair.base_currency == base_currency
-                                and pair.target_currency == rate["pair"]
-                            ),
-                            None,
-                        )
-
-                        if not currency_pair:
-                            logger.warning(
-                                f"Currency pair {base_currency}-{rate['pair']} not found in the database."
-                            )
-                            continue
-
-                        # Create a new Rate object
-                        rate_value = self._to_decimal(rate["rate"])
-
-                        new_rate = Rate(
-                            currency_pair_id=currency_pair.id,
-                            # provider_id=source,  # no provider id at the moment
-                            buy_rate=rate_value,
-                            sell_rate=rate_value,
-                            fetched_at=rate[
-                                "fetched_at"
-                            ],  # TODO use timezone-aware datetime (UTC)
-                            created_at=func.now(),
-                        )
+            rate_rows = self._collect_quotes(registry, provider_results)
+            rate_change_tracker.load()
 
-                        db.session.add(new_rate)
-                        grouped_rates_by_pair_id[currency_pair.id].append(new_rate)
+            # Quotes served from the provider cache were stored by an earlier run,
+            # and quotes equal to the last persisted value are not stored again
+            new_rate_rows = rate_change_tracker.changed_quotes(
+                [row for row in rate_rows if not row["cached"]]
+            )
 
-                        logger.info(
-                            f"Saved rate for {base_currency}-{rate['pair']} from {source}."
-                        )
+            # Aggregate rates per currency pair across all providers in one pass
+            aggregator = VectorizedRateAggregator(
+                strategy=current_app.config.get("RATE_AGGREGATION_STRATEGY", "mean")
+            )
+            aggregated_rows, unchanged_aggregated_ids = (
+                rate_change_tracker.split_aggregated(
+                    aggregator.aggregate(registry, rate_rows)
+                )
+            )
 
-                    db.session.flush()  # Flush to get IDs for the new Rate objects
+            writer = BulkRateWriter()
+            writer.insert_rates(new_rate_rows)
+            aggregated_rate_ids = writer.insert_aggregated_rates(aggregated_rows)
+            # Unchanged aggregated rates only get a longer validity window
+            writer.extend_aggregated_rates(unchanged_aggregated_ids)
 
-                    # Aggregate rates for the currency pair
-                    provider_count = len(provider_results)
-                    for (
-                        currency_pair_id,
-                        rates_for_pair,
-                    ) in grouped_rates_by_pair_id.items():
-                        self._aggregate_rates(
-                            currency_pair_id, rates_for_pair, provider_count
-                        )
+            # Fold the new and the carried-forward rates into the OHLC rollups
+            AggregatedRateRollup.refresh_from_aggregated(aggregated_rate_ids)
+            AggregatedRateRollup.refresh_from_extended(unchanged_aggregated_ids)
 
             db.session.commit()
             logger.debug("Rates successfully saved to the database.")
 
+            rate_change_tracker.remember(
+                new_rate_rows, aggregated_rows, aggregated_rate_ids
+            )
+            rate_change_tracker.record_stats(
+                quotes_written=len(new_rate_rows),
+                quotes_skipped=len(rate_rows) - len(new_rate_rows),
+                aggregated_written=len(aggregated_rate_ids),
+                aggregated_extended=len(unchanged_aggregated_ids),
+            )
+            logger.info(
+                f"Wrote {len(new_rate_rows)}/{len(rate_rows)} quotes and "
+                f"{len(aggregated_rate_ids)} aggregated rates, extended "
+                f"{len(unchanged_aggregated_ids)} unchanged aggregated rates"
+            )
+
+            # Let API workers know a new set of aggregated rates is available
+            publish_generation()
+
         except Exception as e:
             import traceback
 
@@ -340,83 +476,64 @@ class RateProcessorService:
             logger.error(traceback.format_exc())
             db.session.rollback()
 
-    def _aggregate_rates(
-        self, currency_pair_id: int, rates: list[Rate], provider_count: int
-    ):
+    def _collect_quotes(
+        self, registry: PairRegistry, provider_results: list[dict]
+    ) -> list[dict]:
         """
-        Aggregate rates for the currency pair and save to the aggregation table.
+        Resolve provider quotes to registered pairs and normalize them into rate rows.
+        Each row carries the pair's registry row for the aggregation stage.
         """
-        logger.info(
-            f"Aggregating for currency_pair_id={currency_pair_id}; rates={rates}"
-        )
-        if not rates:
-            logger.warning("No rates available for aggregation.")
-            return
-
-        currency_pair = CurrencyPair.query.get(
-            currency_pair_id
-        )  # avoiding pending relations
-        if not currency_pair:
-            logger.error(
-                f"CurrencyPair id={currency_pair_id} not found. Skipping aggregation."
-            )
-            return
-
-        logger.debug(
-            f"Aggregating rates for currency pair {currency_pair.base_currency}-{currency_pair.target_currency}."
-        )
-
-        # Calculate average buy and sell rates
-        buy_values = [self._to_decimal(r.buy_rate) for r in rates]
-        sell_values = [self._to_decimal(r.sell_rate) for r in rates]
+        rate_rows: list[dict] = []
 
-        count_dec = Decimal(len(buy_values))
-        average_buy_rate = sum(buy_values) / count_dec
-        average_sell_rate = sum(sell_values) / count_dec
+        for provider_result in provider_results:
+            source = provider_result["source"]
+            rate_data = provider_result["rate_data"]
+            collected = 0
 
-        markup = self._to_decimal(currency_pair.markup_percentage or 0)
-        one = Decimal("1")
+            for base_currency, rates in rate_data.items():
+                for rate in rates:
+                    pair_row = registry.row_of(base_currency, rate["pair"])
+                    if pair_row is None:
+                        logger.warning(
+                            f"Currency pair {base_currency}-{rate['pair']} not found in the database."
+                        )
+                        continue
 
-        # Optional: set precision and quantize to 8 dp
-        getcontext().prec = 28
-        q = Decimal("0.00000001")
+                    rate_value = float(rate["rate"])
 
-        final_buy_rate = (average_buy_rate * (one + markup)).quantize(
-            q, rounding=ROUND_HALF_UP
-        )
-        final_sell_rate = (average_sell_rate * (one - markup)).quantize(
-            q, rounding=ROUND_HALF_UP
-        )
+                    rate_rows.append(
+                        {
+                            "pair_row": pair_row,
+                            "currency_pair_id": registry.pairs[pair_row].id,
+                            "provider_id": None,  # no provider id at the moment
+                            "provider": source,
+                            "buy_rate": rate_value,
+                            "sell_rate": rate_value,
+                            "fetched_at": self._to_datetime(rate["fetched_at"]),
+                            "cached": rate.get("cached", False),
+                        }
+                    )
+                    collected += 1
 
-        # Create a new AggregatedRate object
-        aggregated_rate = AggregatedRate(
-            currency_pair_id=currency_pair.id,
-            average_buy_rate=average_buy_rate,
-            average_sell_rate=average_sell_rate,
-            final_buy_rate=final_buy_rate,
-            final_sell_rate=final_sell_rate,
-            markup_percentage=currency_pair.markup_percentage,
-            provider_count=provider_count,
-            aggregated_at=func.now(),
-            expires_at=func.now() + timedelta(hours=1),
-            created_at=func.now(),
-        )
+            logger.info(f"Collected {collected} rates from {source}.")
 
-        # Save to the database
-        db.session.add(aggregated_rate)
-        logger.info(
-            f"Aggregated rates saved for currency pair {currency_pair.base_currency}-{currency_pair.target_currency}."
-        )
+        return rate_rows
 
     @staticmethod
-    def _to_decimal(value) -> Decimal:
+    def _to_datetime(value) -> datetime:
         """
-        Safely coerce numbers (float/int/str/Decimal) to Decimal.
+        Normalize provider timestamps (RFC 2822 strings, unix seconds or
+        milliseconds, datetimes) to naive UTC datetimes.
         """
-        if isinstance(value, Decimal):
-            return value
-        if isinstance(value, int | float):  # Updated to use `X | Y` syntax
-            return Decimal(str(value))
-        if isinstance(value, str):
-            return Decimal(value)
-        return Decimal(str(value))
+        if isinstance(value, datetime):
+            parsed = value
+        elif isinstance(value, int | float):
+            # Polygon reports milliseconds, the other providers seconds
+            seconds = value / 1000 if value > 1e11 else value
+            parsed = datetime.fromtimestamp(seconds, UTC)
+        else:
+            parsed = parsedate_to_datetime(value)
+
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(UTC).replace(tzinfo=None)
+        return parsed
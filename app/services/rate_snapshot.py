@@ -0,0 +1,146 @@
+# Latest rates snapshot cache
+"""
+Process-local snapshot of the latest aggregated rates.
+
+The rates only change when the refresh job commits a new aggregation generation,
+so API workers keep an in-memory snapshot and rebuild it only when the published
+generation counter moves.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import cached_property
+
+import redis
+from flask import current_app
+from loguru import logger
+from sqlalchemy import func
+
+from app.extensions import db, get_redis
+from app.models import AggregatedRate
+from app.services.cross_rates import CurrencyGraph
+
+GENERATION_KEY = "rates:generation"
+EPOCH = datetime(1970, 1, 1)
+
+
+class RateSnapshot:
+    """
+    Immutable view of the latest aggregated rates for one generation.
+    Rates are keyed by (base, target) in both directions, inverted pairs included.
+    """
+
+    def __init__(self, generation, rows):
+        self.generation = generation
+        self.pairs = {}
+
+        for rate, pair in rows:
+            inverted_key = (pair.target_currency, pair.base_currency)
+            self.pairs[(pair.base_currency, pair.target_currency)] = (
+                rate.to_dict_with_pair(pair)
+            )
+            # A directly configured pair always wins over an inversion
+            if inverted_key not in self.pairs:
+                self.pairs[inverted_key] = rate.to_inverted_dict(pair)
+
+        self.currencies = AggregatedRate.group_by_currency(rows)
+        self.latest_for_all = {
+            currency: {"rates": currency_rates, "count": len(currency_rates)}
+            for currency, currency_rates in self.currencies.items()
+        }
+
+    def for_currency(self, currency: str) -> list[dict]:
+        """Rates where the currency is the base, inverted where needed."""
+        return self.currencies.get(currency, [])
+
+    def get_pair(self, base_currency: str, target_currency: str) -> dict | None:
+        return self.pairs.get((base_currency, target_currency))
+
+    @cached_property
+    def graph(self) -> CurrencyGraph:
+        """Currency graph for cross rates, built once per generation."""
+        return CurrencyGraph(self.pairs)
+
+
+class RateSnapshotCache:
+    """
+    Holds the current RateSnapshot and swaps it atomically on a new generation.
+    The generation is checked at most once every RATE_SNAPSHOT_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> RateSnapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        check_interval = current_app.config.get("RATE_SNAPSHOT_CHECK_SECONDS", 1.0)
+
+        if snapshot is not None and now - self._checked_at < check_interval:
+            return snapshot
+
+        generation = current_generation()
+        self._checked_at = now
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.generation != generation:
+                rows = AggregatedRate.get_latest_with_pairs()
+                snapshot = RateSnapshot(generation, rows)
+                self._snapshot = snapshot
+                logger.info(
+                    f"Rebuilt rates snapshot for generation {generation} "
+                    f"({len(rows)} pairs)"
+                )
+
+        return snapshot
+
+    def invalidate(self):
+        """Force the next get() to re-check the published generation."""
+        self._checked_at = 0.0
+
+
+rate_snapshot_cache = RateSnapshotCache()
+
+
+def current_generation() -> int:
+    """
+    Get the latest published aggregation generation.
+    Without Redis, the newest aggregated_rates expiry (in microseconds) stands
+    in for the counter; both new rows and unchanged rates carried forward
+    push it.
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            return int(client.get(GENERATION_KEY) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read rates generation from Redis: {e}")
+
+    latest_expiry = db.session.query(func.max(AggregatedRate.expires_at)).scalar()
+    if latest_expiry is None:
+        return 0
+    return (latest_expiry - EPOCH) // timedelta(microseconds=1)
+
+
+def publish_generation() -> int:
+    """
+    Announce that a new aggregation generation has been committed.
+    Must be called after the commit so readers never rebuild from stale rows.
+    """
+    generation = None
+    client = get_redis()
+    if client is not None:
+        try:
+            generation = client.incr(GENERATION_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to publish rates generation to Redis: {e}")
+
+    rate_snapshot_cache.invalidate()
+    logger.info(f"Published rates generation {generation}")
+    return generation
@@ -0,0 +1,185 @@
+# Bulk rate writer
+"""
+Bulk persistence for provider quotes and aggregated rates.
+
+Rows are written as whole batches instead of one ORM object per row, so a
+refresh costs the same number of round trips whether it saves ten pairs or
+ten thousand.
+"""
+
+import io
+from datetime import timedelta
+
+from flask import current_app
+from loguru import logger
+from sqlalchemy import text
+
+from app.extensions import db
+
+# How long a freshly aggregated rate stays valid
+AGGREGATED_RATE_VALIDITY = timedelta(hours=1)
+
+_INSERT_RATES_SQL = text(
+    """
+    INSERT INTO rates (currency_pair_id, provider_id, buy_rate, sell_rate, fetched_at)
+    SELECT * FROM unnest(
+        CAST(:currency_pair_ids AS integer[]),
+        CAST(:provider_ids AS integer[]),
+        CAST(:buy_rates AS numeric[]),
+        CAST(:sell_rates AS numeric[]),
+        CAST(:fetched_ats AS timestamp[])
+    )
+    """
+)
+
+_COPY_RATES_SQL = (
+    "COPY rates (currency_pair_id, provider_id, buy_rate, sell_rate, fetched_at) "
+    "FROM STDIN"
+)
+
+_INSERT_AGGREGATED_RATES_SQL = text(
+    """
+    INSERT INTO aggregated_rates (
+        currency_pair_id, average_buy_rate, average_sell_rate, final_buy_rate,
+        final_sell_rate, markup_percentage, provider_count, source, aggregated_at,
+        expires_at
+    )
+    SELECT
+        pair.currency_pair_id, pair.average_buy_rate, pair.average_sell_rate,
+        pair.final_buy_rate, pair.final_sell_rate, pair.markup_percentage,
+        pair.provider_count, :source, now(), now() + CAST(:validity AS interval)
+    FROM unnest(
+        CAST(:currency_pair_ids AS integer[]),
+        CAST(:average_buy_rates AS numeric[]),
+        CAST(:average_sell_rates AS numeric[]),
+        CAST(:final_buy_rates AS numeric[]),
+        CAST(:final_sell_rates AS numeric[]),
+        CAST(:markup_percentages AS numeric[]),
+        CAST(:provider_counts AS integer[])
+    ) AS pair(
+        currency_pair_id, average_buy_rate, average_sell_rate, final_buy_rate,
+        final_sell_rate, markup_percentage, provider_count
+    )
+    RETURNING currency_pair_id, id
+    """
+)
+
+_EXTEND_AGGREGATED_RATES_SQL = text(
+    """
+    UPDATE aggregated_rates
+    SET expires_at = now() + CAST(:validity AS interval)
+    WHERE id = ANY(CAST(:ids AS integer[]))
+    """
+)
+
+
+class BulkRateWriter:
+    """
+    Writes normalized rate rows in a single statement per table.
+    Rows are plain dicts keyed by column name. Nothing is committed here, the
+    caller owns the transaction.
+
+    RATE_BULK_WRITE_MODE selects how raw quotes are written:
+    - 'insert': one multi-row INSERT built from array parameters (default)
+    - 'copy': Postgres COPY through the psycopg2 connection
+    """
+
+    def __init__(self, mode: str = None):
+        self.mode = mode or current_app.config.get("RATE_BULK_WRITE_MODE", "insert")
+        if self.mode not in ("insert", "copy"):
+            raise ValueError(f"Unknown bulk write mode: {self.mode}")
+
+    def insert_rates(self, rows: list[dict]) -> int:
+        """
+        Write raw provider quotes to the rates table.
+        Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+
+        if self.mode == "copy":
+            self._copy_rates(rows)
+        else:
+            db.session.execute(
+                _INSERT_RATES_SQL,
+                {
+                    "currency_pair_ids": [row["currency_pair_id"] for row in rows],
+                    "provider_ids": [row.get("provider_id") for row in rows],
+                    "buy_rates": [row["buy_rate"] for row in rows],
+                    "sell_rates": [row["sell_rate"] for row in rows],
+                    "fetched_ats": [row["fetched_at"] for row in rows],
+                },
+            )
+
+        logger.info(f"Bulk wrote {len(rows)} rates using {self.mode}")
+        return len(rows)
+
+    def insert_aggregated_rates(
+        self, rows: list[dict], source: str = "refresh"
+    ) -> list[int]:
+        """
+        Write aggregated rates (at most one per pair), stamped with the database
+        time and tagged with their source (see AggregatedRate.SOURCES).
+        Returns the new aggregated_rates ids in the order of `rows`.
+        """
+        if not rows:
+            return []
+
+        result = db.session.execute(
+            _INSERT_AGGREGATED_RATES_SQL,
+            {
+                "currency_pair_ids": [row["currency_pair_id"] for row in rows],
+                "average_buy_rates": [row["average_buy_rate"] for row in rows],
+                "average_sell_rates": [row["average_sell_rate"] for row in rows],
+                "final_buy_rates": [row["final_buy_rate"] for row in rows],
+                "final_sell_rates": [row["final_sell_rate"] for row in rows],
+                "markup_percentages": [row["markup_percentage"] for row in rows],
+                "provider_counts": [row["provider_count"] for row in rows],
+                "source": source,
+                "validity": AGGREGATED_RATE_VALIDITY,
+            },
+        )
+        # RETURNING does not promise input order, so match the ids up by pair
+        id_by_pair = dict(result.tuples())
+        ids = [id_by_pair[row["currency_pair_id"]] for row in rows]
+
+        logger.info(f"Bulk wrote {len(ids)} aggregated rates")
+        return ids
+
+    def extend_aggregated_rates(self, ids: list[int]) -> int:
+        """
+        Push expires_at forward for aggregated rates whose values did not change.
+        Returns the number of rows updated.
+        """
+        if not ids:
+            return 0
+
+        result = db.session.execute(
+            _EXTEND_AGGREGATED_RATES_SQL,
+            {"ids": ids, "validity": AGGREGATED_RATE_VALIDITY},
+        )
+        logger.info(f"Extended validity of {result.rowcount} aggregated rates")
+        return result.rowcount
+
+    def _copy_rates(self, rows: list[dict]):
+        """Stream the rows through COPY on the session's own connection."""
+        buffer = io.StringIO()
+        for row in rows:
+            provider_id = row.get("provider_id")
+            buffer.write(
+                "\t".join(
+                    [
+                        str(row["currency_pair_id"]),
+                        r"\N" if provider_id is None else str(provider_id),
+                        str(row["buy_rate"]),
+                        str(row["sell_rate"]),
+                        row["fetched_at"].isoformat(),
+                    ]
+                )
+                + "\n"
+            )
+        buffer.seek(0)
+
+        dbapi_connection = db.session.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(_COPY_RATES_SQL, buffer)
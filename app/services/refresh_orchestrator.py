@@ -0,0 +1,200 @@
+# Refresh orchestrator
+"""
+Concurrent fan-out of the provider requests that make up one rates refresh.
+
+Every (provider, base currency) request is issued at the same time, bounded by
+a global concurrency limit and a per-provider cap, so a refresh takes roughly
+as long as its slowest request instead of the sum of all of them. All requests
+run on one event loop and share one aiohttp session, bounded by a deadline.
+
+Every provider is needed for the aggregate, so a slow request cannot be handed
+to another provider. Instead, a request still running past the provider's
+observed RATE_HEDGE_QUANTILE latency gets a second copy to the same provider,
+and whichever answers first is used.
+"""
+
+import asyncio
+from collections import defaultdict
+
+from flask import current_app, has_app_context
+from loguru import logger
+
+from app.services.async_fetch import gather_with_deadline, open_http_session
+from app.services.provider_cache import provider_response_cache
+from app.services.providers.latency import provider_latencies
+from app.services.providers.quota import quota_scheduler
+from app.services.rate_fetcher import RateFetcherService
+
+
+class RefreshOrchestrator:
+    """
+    Runs fetch jobs concurrently and groups the responses per provider.
+
+    A job is a dict:
+        {
+            "provider": "exchange_rate",       # provider factory name
+            "key": "USD",                      # identifies the response, e.g. base
+            "kwargs": {"base_currency": "USD"},# passed to the provider's get_rates
+            "priority": 10,                    # optional, ranks jobs under quota
+        }
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        provider_limits: dict = None,
+        deadline_seconds: float = None,
+    ):
+        config = current_app.config
+        self.max_concurrency = max_concurrency or config.get(
+            "REFRESH_MAX_CONCURRENCY", 16
+        )
+        self.provider_limits = (
+            provider_limits
+            if provider_limits is not None
+            else config.get("REFRESH_PROVIDER_CONCURRENCY", {})
+        )
+        self.deadline_seconds = deadline_seconds or config.get(
+            "REFRESH_DEADLINE_SECONDS", 30
+        )
+        self.cache = (
+            provider_response_cache
+            if config.get("PROVIDER_CACHE_ENABLED", True)
+            else None
+        )
+
+    def run(self, jobs: list[dict]) -> dict[str, dict]:
+        """
+        Execute all jobs and return {provider: {key: response}}.
+        Failed jobs and jobs still running at the deadline are logged and left
+        out of the result.
+        Jobs whose response is still valid in the provider cache are not
+        fetched; those responses are returned with "cached": True. Jobs that do
+        not fit the provider quota are deferred to a later run.
+        """
+        results: dict[str, dict] = defaultdict(dict)
+
+        pending = []
+        for job in jobs:
+            cached = (
+                self.cache.get(job["provider"], job["kwargs"]) if self.cache else None
+            )
+            if cached is None:
+                pending.append(job)
+            else:
+                results[job["provider"]][job["key"]] = {**cached, "cached": True}
+        if len(pending) < len(jobs):
+            logger.info(f"Provider cache hits: {len(jobs) - len(pending)}/{len(jobs)}")
+
+        # Highest priority first, deferring whatever the provider quotas cannot cover
+        pending, _deferred = quota_scheduler.plan(pending)
+
+        fetchers = self._build_fetchers({job["provider"] for job in pending})
+        pending = [job for job in pending if job["provider"] in fetchers]
+        if not pending:
+            return results
+
+        fetched = asyncio.run(self.run_async(fetchers, pending))
+        for job in pending:
+            response = fetched.get(job["provider"], {}).get(job["key"])
+            if response is None:
+                continue
+            if self.cache:
+                self.cache.set(job["provider"], job["kwargs"], response)
+            results[job["provider"]][job["key"]] = response
+        return results
+
+    async def run_async(
+        self, fetchers: dict[str, RateFetcherService], jobs: list[dict]
+    ) -> dict[str, dict]:
+        semaphores = {
+            name: asyncio.Semaphore(
+                self.provider_limits.get(name, self.max_concurrency)
+            )
+            for name in fetchers
+        }
+        deadline = asyncio.get_running_loop().time() + self.deadline_seconds
+
+        logger.info(
+            f"Dispatching {len(jobs)} provider requests "
+            f"(max_concurrency={self.max_concurrency}, limits={self.provider_limits}, "
+            f"deadline={self.deadline_seconds}s)"
+        )
+        async with open_http_session(limit=self.max_concurrency) as session:
+
+            async def fetch(job):
+                async with semaphores[job["provider"]]:
+                    return await self._hedged(
+                        job["provider"],
+                        lambda: fetchers[job["provider"]].fetch_rates_async(
+                            session=session, deadline=deadline, **job["kwargs"]
+                        ),
+                    )
+
+            outcomes = await gather_with_deadline(
+                {(job["provider"], job["key"]): fetch(job) for job in jobs},
+                timeout=self.deadline_seconds,
+            )
+
+        results: dict[str, dict] = defaultdict(dict)
+        for (provider, key), outcome in outcomes.items():
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to fetch {provider} rates for {key}: {outcome}")
+            else:
+                results[provider][key] = outcome
+        return results
+
+    async def _hedged(self, provider: str, request) -> dict:
+        """
+        Await request(), sending it a second time if the first call runs past
+        the provider's hedge delay; the first successful response wins.
+        Provider requests are idempotent reads and only the tail gets a second
+        copy, which still has to pass the circuit breaker and quota.
+        """
+        first = asyncio.ensure_future(request())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(provider))
+            if not done:
+                logger.info(f"{provider} request exceeded its hedge delay, hedging")
+                tasks.add(asyncio.ensure_future(request()))
+
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        return task.result()
+            # Both copies failed, report the original error
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _hedge_delay(provider: str) -> float:
+        """Seconds to wait on a provider before hedging: its observed p95."""
+        config = current_app.config if has_app_context() else {}
+        observed = provider_latencies.percentile(
+            provider, config.get("RATE_HEDGE_QUANTILE", 0.95)
+        )
+        if observed is None:
+            return config.get("RATE_HEDGE_DEFAULT_DELAY_SECONDS", 2.0)
+        return observed
+
+    @staticmethod
+    def _build_fetchers(provider_names: set[str]) -> dict[str, RateFetcherService]:
+        """
+        One fetcher (and provider client) per provider for the whole run.
+        Clients read app config, so they are built here on the calling thread.
+        """
+        fetchers = {}
+        for name in provider_names:
+            try:
+                fetchers[name] = RateFetcherService(provider_names=[name])
+            except Exception as e:
+                logger.error(f"Failed to initialise provider {name}: {e}")
+        return fetchers
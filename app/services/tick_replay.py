@@ -0,0 +1,137 @@
+# Tick replay server
+"""
+Local stand-in for the forex quote feed.
+
+Replays recorded feed messages (one JSON array of events per line, as written by
+`stream_rates.py --record`) behind the same connect/auth/subscribe handshake, so
+the ingestion service can be tested and benchmarked without a live feed or API
+key. Quotes are paced by their recorded timestamps divided by `speed`; a speed
+of 0 sends them as fast as the client reads them.
+"""
+
+import asyncio
+import json
+import random
+
+from loguru import logger
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from app.services.tick_stream import QUOTE_EVENT
+
+
+def load_messages(path: str) -> list[list[dict]]:
+    with open(path) as recording:
+        return [json.loads(line) for line in recording if line.strip()]
+
+
+def synthetic_messages(
+    pairs: list[tuple[str, str]], count: int, batch_size: int = 10, seed: int = 0
+) -> list[list[dict]]:
+    """
+    `count` random-walk quotes spread over `pairs`, batch_size events per
+    message, at 1ms intervals.
+    """
+    rng = random.Random(seed)
+    mids = {pair: rng.uniform(0.5, 20) for pair in pairs}
+    timestamp = 1_700_000_000_000
+    events = []
+    for _ in range(count):
+        pair = rng.choice(pairs)
+        mids[pair] *= 1 + rng.gauss(0, 0.0001)
+        spread = mids[pair] * 0.0002
+        timestamp += 1
+        events.append(
+            {
+                "ev": QUOTE_EVENT,
+                "p": f"{pair[0]}/{pair[1]}",
+                "x": 48,
+                "a": round(mids[pair] + spread, 6),
+                "b": round(mids[pair] - spread, 6),
+                "t": timestamp,
+            }
+        )
+    return [events[i : i + batch_size] for i in range(0, len(events), batch_size)]
+
+
+class TickReplayServer:
+    """Serves one replay of the messages to every client that connects."""
+
+    def __init__(self, messages: list[list[dict]], speed: float = 1.0, loop=False):
+        self.messages = messages
+        self.speed = speed
+        self.loop = loop
+
+    async def serve_forever(self, host: str = "localhost", port: int = 8765):
+        async with serve(self.handler, host, port) as server:
+            logger.info(
+                f"Replaying {len(self.messages)} messages on ws://{host}:{port} "
+                f"(speed={self.speed or 'max'})"
+            )
+            await server.serve_forever()
+
+    async def handler(self, websocket):
+        await websocket.send(
+            json.dumps(
+                [{"ev": "status", "status": "connected", "message": "Connected"}]
+            )
+        )
+        await websocket.recv()  # any API key is accepted
+        await websocket.send(
+            json.dumps(
+                [{"ev": "status", "status": "auth_success", "message": "authenticated"}]
+            )
+        )
+
+        subscriptions: set[str] = set()
+        subscribed = asyncio.Event()
+        control = asyncio.create_task(
+            self._read_control(websocket, subscriptions, subscribed)
+        )
+        try:
+            await subscribed.wait()
+            await self._replay(websocket, subscriptions)
+        except ConnectionClosed:
+            pass
+        finally:
+            control.cancel()
+
+    @staticmethod
+    async def _read_control(websocket, subscriptions: set[str], subscribed):
+        """Apply subscribe/unsubscribe actions for the rest of the connection."""
+        async for message in websocket:
+            action = json.loads(message)
+            params = set(action.get("params", "").split(","))
+            if action.get("action") == "subscribe":
+                subscriptions |= params
+                subscribed.set()
+            elif action.get("action") == "unsubscribe":
+                subscriptions -= params
+
+    async def _replay(self, websocket, subscriptions: set[str]):
+        previous = None
+        while True:
+            for events in self.messages:
+                wildcard = f"{QUOTE_EVENT}.*" in subscriptions
+                events = [
+                    event
+                    for event in events
+                    if wildcard
+                    or f"{event.get('ev')}.{event.get('p')}" in subscriptions
+                ]
+                if not events:
+                    continue
+
+                if self.speed and previous is not None:
+                    delay = (events[0]["t"] - previous) / 1000 / self.speed
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                previous = events[-1]["t"]
+                await websocket.send(json.dumps(events))
+
+            if not self.loop:
+                break
+            previous = None
+
+        # Keep the connection open like the live feed does
+        await websocket.wait_closed()
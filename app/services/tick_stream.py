@@ -0,0 +1,307 @@
+# Streaming tick ingestion
+"""
+Real-time rates from a streaming forex quote feed.
+
+The ingestion service keeps one websocket subscription to Polygon's forex quote
+feed (or the local replay stand-in, see tick_replay) for every active pair.
+Ticks only update the in-memory RateBook, which keeps the latest bid/ask per pair
+and ignores ticks that repeat it. Every TICK_FLUSH_INTERVAL_SECONDS the pairs
+that changed since the last flush are aggregated and written as one batch of
+AggregatedRate rows, so database writes are bounded by the number of pairs and
+the cadence, not by the tick rate.
+
+The rows come from a single feed, so they are tagged with source 'stream' to
+keep them apart from the multi-provider refresh aggregates, and they are left
+out of the OHLC rollups.
+"""
+
+import asyncio
+import json
+import time
+
+from loguru import logger
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from app.extensions import db
+from app.models import CurrencyPair
+from app.services.pair_registry import PairRegistry
+from app.services.rate_aggregator import VectorizedRateAggregator
+from app.services.rate_change_tracker import rate_change_tracker
+from app.services.rate_snapshot import publish_generation
+from app.services.rate_writer import BulkRateWriter
+
+# Provider name the streamed quotes are aggregated under
+PROVIDER = "polygon_stream"
+# AggregatedRate.source of the rows written here
+SOURCE = "stream"
+QUOTE_EVENT = "C"
+
+
+class TickStreamAuthError(Exception):
+    """Raised when the feed rejects the API key."""
+
+
+def subscription_for(base_currency: str, target_currency: str) -> str:
+    """Feed subscription for one pair's quotes, e.g. C.USD/ZAR."""
+    return f"{QUOTE_EVENT}.{base_currency}/{target_currency}"
+
+
+class RateBook:
+    """
+    Latest quote per (base, target) pair and the pairs changed since the last
+    drain(). Ticks equal to the pair's current bid and ask are ignored.
+    Only used from the ingestion event loop, so it needs no locking.
+    """
+
+    def __init__(self):
+        self._quotes: dict[tuple[str, str], dict] = {}
+        self._changed: set[tuple[str, str]] = set()
+        self.ticks = 0
+        self.unchanged = 0
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def update(self, pair: tuple[str, str], bid: float, ask: float, timestamp: int):
+        """Apply a tick; returns whether it changed the pair's quote."""
+        self.ticks += 1
+        quote = self._quotes.get(pair)
+        if quote is not None and quote["bid"] == bid and quote["ask"] == ask:
+            self.unchanged += 1
+            return False
+        self._quotes[pair] = {"bid": bid, "ask": ask, "timestamp": timestamp}
+        self._changed.add(pair)
+        return True
+
+    def get(self, pair: tuple[str, str]) -> dict | None:
+        return self._quotes.get(pair)
+
+    def drain(self) -> dict[tuple[str, str], dict]:
+        """Latest quotes of the pairs changed since the last drain."""
+        changed = {pair: self._quotes[pair] for pair in self._changed}
+        self._changed.clear()
+        return changed
+
+    def mark_changed(self, pairs):
+        """Flag pairs for the next drain again, e.g. after a failed write."""
+        self._changed.update(pair for pair in pairs if pair in self._quotes)
+
+
+class TickIngestionService:
+    """
+    Long-running consumer of the forex quote feed.
+    Reconnects on dropped connections, follows changes to the active pairs every
+    TICK_PAIRS_REFRESH_SECONDS and writes the RateBook on the flush cadence.
+    """
+
+    def __init__(
+        self,
+        app,
+        url: str = None,
+        api_key: str = None,
+        flush_interval: float = None,
+        record_path: str = None,
+    ):
+        self.app = app
+        self.url = url or app.config.get("TICK_STREAM_URL")
+        self.api_key = api_key or app.config.get("POLYGON_API_KEY")
+        self.flush_interval = flush_interval or app.config.get(
+            "TICK_FLUSH_INTERVAL_SECONDS", 5
+        )
+        self.pairs_refresh = app.config.get("TICK_PAIRS_REFRESH_SECONDS", 60)
+        self.record_path = record_path
+
+        self.book = RateBook()
+        self.registry: PairRegistry | None = None
+        self.flushes = 0
+        self.pairs_written = 0
+        self._subscriptions: set[str] = set()
+        self._websocket = None
+        self._recorder = None
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self, duration: float = None):
+        """
+        Ingest until stop() is called, the feed rejects the API key, or
+        `duration` seconds have passed. Pending changes are flushed on the way out.
+        """
+        self.registry = await asyncio.to_thread(self._load_registry)
+        if self.record_path:
+            self._recorder = open(self.record_path, "a")
+
+        tasks = [
+            asyncio.create_task(self._consume()),
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._stopping.wait()),
+        ]
+        try:
+            done, _ = await asyncio.wait(
+                tasks, timeout=duration, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._flush()
+            if self._recorder:
+                self._recorder.close()
+            logger.info(
+                f"Tick ingestion stopped: {self.book.ticks} ticks "
+                f"({self.book.unchanged} unchanged), {self.pairs_written} pair "
+                f"writes in {self.flushes} flushes"
+            )
+
+    async def _consume(self):
+        logger.info(f"Connecting to tick stream {self.url}")
+        # connect() retries failed connection attempts with its own backoff
+        async for websocket in connect(self.url, close_timeout=1):
+            try:
+                await self._authenticate(websocket)
+                self._websocket = websocket
+                self._subscriptions = set()
+                await self._sync_subscriptions()
+
+                async for message in websocket:
+                    self._handle(message)
+            except ConnectionClosed as e:
+                logger.warning(f"Tick stream connection closed ({e}), reconnecting")
+            finally:
+                self._websocket = None
+
+    async def _authenticate(self, websocket):
+        await websocket.recv()  # connected status
+        await websocket.send(json.dumps({"action": "auth", "params": self.api_key}))
+        status = json.loads(await websocket.recv())[0]
+        if status.get("status") == "auth_failed":
+            raise TickStreamAuthError(status.get("message", "Authentication failed"))
+        logger.info("Authenticated with tick stream")
+
+    async def _sync_subscriptions(self):
+        """Subscribe to new active pairs and drop the deactivated ones."""
+        wanted = {
+            subscription_for(pair.base_currency, pair.target_currency)
+            for pair in self.registry
+        }
+        removed = self._subscriptions - wanted
+        added = wanted - self._subscriptions
+        if removed:
+            await self._websocket.send(
+                json.dumps({"action": "unsubscribe", "params": ",".join(removed)})
+            )
+        if added:
+            await self._websocket.send(
+                json.dumps({"action": "subscribe", "params": ",".join(sorted(added))})
+            )
+        if added or removed:
+            logger.info(f"Tick stream subscriptions: +{len(added)} -{len(removed)}")
+        self._subscriptions = wanted
+
+    def _handle(self, message: str | bytes):
+        if self._recorder:
+            self._recorder.write(
+                (message.decode() if isinstance(message, bytes) else message) + "\n"
+            )
+
+        registry, book = self.registry, self.book
+        for event in json.loads(message):
+            if event.get("ev") != QUOTE_EVENT:
+                if event.get("ev") == "status":
+                    logger.debug(f"Tick stream status: {event.get('message')}")
+                continue
+
+            base_currency, _, target_currency = event["p"].partition("/")
+            if registry.row_of(base_currency, target_currency) is None:
+                continue
+            book.update(
+                (base_currency, target_currency), event["b"], event["a"], event["t"]
+            )
+
+    async def _flush_loop(self):
+        refreshed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+            if time.monotonic() - refreshed_at >= self.pairs_refresh:
+                self.registry = await asyncio.to_thread(self._load_registry)
+                if self._websocket is not None:
+                    await self._sync_subscriptions()
+                refreshed_at = time.monotonic()
+
+    async def _flush(self):
+        """Write the pairs changed since the last flush."""
+        changed = self.book.drain()
+        if not changed:
+            return
+
+        registry = self.registry
+        # Customers buy at the ask and sell at the bid
+        quotes = [
+            {
+                "pair_row": row,
+                "provider": PROVIDER,
+                "buy_rate": quote["ask"],
+                "sell_rate": quote["bid"],
+            }
+            for pair, quote in changed.items()
+            if (row := registry.row_of(*pair)) is not None
+        ]
+        try:
+            await asyncio.to_thread(self._write, registry, quotes)
+        except Exception as e:
+            logger.exception(f"Failed to write streamed rates: {e}")
+            self.book.mark_changed(changed)
+            return
+
+        self.flushes += 1
+        self.pairs_written += len(quotes)
+
+    def _load_registry(self) -> PairRegistry:
+        with self.app.app_context():
+            registry = PairRegistry(CurrencyPair.query.filter_by(is_active=True).all())
+            # Detach the pairs so they stay readable outside this app context
+            db.session.expunge_all()
+        logger.info(f"Streaming rates for {len(registry)} currency pairs")
+        return registry
+
+    def _write(self, registry: PairRegistry, quotes: list[dict]):
+        """Aggregate and persist one flush; runs in a worker thread."""
+        with self.app.app_context():
+            rate_change_tracker.load()
+            aggregator = VectorizedRateAggregator(
+                strategy=self.app.config.get("RATE_AGGREGATION_STRATEGY", "mean")
+            )
+            aggregated_rows, unchanged_ids = rate_change_tracker.split_aggregated(
+                aggregator.aggregate(registry, quotes), source=SOURCE
+            )
+
+            try:
+                writer = BulkRateWriter()
+                aggregated_rate_ids = writer.insert_aggregated_rates(
+                    aggregated_rows, source=SOURCE
+                )
+                writer.extend_aggregated_rates(unchanged_ids)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            rate_change_tracker.remember(
+                [], aggregated_rows, aggregated_rate_ids, source=SOURCE
+            )
+            rate_change_tracker.record_stats(
+                aggregated_written=len(aggregated_rate_ids),
+                aggregated_extended=len(unchanged_ids),
+            )
+            logger.info(
+                f"Flushed {len(aggregated_rate_ids)} streamed rates, extended "
+                f"{len(unchanged_ids)} unchanged"
+            )
+            publish_generation()
@@ -0,0 +1,173 @@
+# Token version registry
+"""
+Per-user token versions for stateless JWT revocation.
+
+Tokens carry the user's `token_version` (claim `ver`) along with `is_active`
+and `is_admin`, so a request can be authorized from the token alone as long as
+its version is still the current one. Versions only ever grow: logout bumps it
+explicitly, and changing is_active, is_admin or role bumps it automatically
+when the user is flushed.
+
+Every process keeps a compact user_id -> version map. It is seeded from the
+users that have a non-zero version and then follows bumps published after
+commit: through a Redis hash plus an epoch counter when Redis is available
+(one GET per TOKEN_VERSION_SYNC_SECONDS), otherwise by reading the users updated
+since the last sync on the same cadence. The database stays authoritative: with
+Redis the users updated since the last read are still read every
+TOKEN_VERSION_REFRESH_SECONDS, so a bump whose publish failed, or that was lost
+with the Redis data, is picked up all the same.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import redis
+from flask import current_app
+from loguru import logger
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db, get_redis
+from app.models import User
+
+VERSIONS_KEY = "auth:token_versions"
+EPOCH_KEY = "auth:token_versions:epoch"
+
+# updated_at is the updating transaction's start time, so a bump can commit
+# after rows stamped later; incremental reads look back this far past them
+SYNC_OVERLAP = timedelta(minutes=1)
+# Lower bound while no user has been updated yet
+NEVER_UPDATED = datetime(1970, 1, 1)
+
+# Changes to these User columns revoke the user's existing tokens
+AUTHORIZATION_FIELDS = ("is_active", "is_admin", "role")
+
+
+class TokenVersionRegistry:
+    """Process-local map of current token versions, mirrored through Redis."""
+
+    def __init__(self):
+        self._versions: dict[int, int] = {}
+        self._epoch = None
+        self._synced_at = 0.0
+        self._loaded_at = 0.0
+        self._loaded = False
+        self._updated_since = None  # newest users.updated_at read so far
+        self._lock = threading.Lock()
+
+    def check(self, user_id: int, version: int) -> bool | None:
+        """
+        True if `version` is the user's current token version, False if it
+        has been revoked, or None when the token is newer than this process
+        knows (confirm against the database, then call observe()).
+        """
+        self._sync()
+        current = self._versions.get(user_id, 0)
+        if version == current:
+            return True
+        return None if version > current else False
+
+    def observe(self, user_id: int, version: int):
+        """Record a version read from the database."""
+        with self._lock:
+            if version > self._versions.get(user_id, 0):
+                self._versions[user_id] = version
+
+    def publish(self, versions: dict[int, int]):
+        """Make committed bumps visible here and, through Redis, everywhere."""
+        for user_id, version in versions.items():
+            self.observe(user_id, version)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            pipe.hset(VERSIONS_KEY, mapping=versions)
+            pipe.incr(EPOCH_KEY)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish token versions to Redis: {e}")
+
+    def _sync(self):
+        interval = current_app.config.get("TOKEN_VERSION_SYNC_SECONDS", 1)
+        now = time.monotonic()
+        if self._loaded and now - self._synced_at < interval:
+            return
+        self._synced_at = now
+
+        client = get_redis()
+        if client is not None:
+            try:
+                epoch = client.get(EPOCH_KEY)
+                mirrored = (
+                    {}
+                    if self._loaded and epoch == self._epoch
+                    else client.hgetall(VERSIONS_KEY)
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Could not sync token versions from Redis: {e}")
+            else:
+                for user_id, version in mirrored.items():
+                    self.observe(int(user_id), int(version))
+                self._epoch = epoch
+                refresh = current_app.config.get("TOKEN_VERSION_REFRESH_SECONDS", 60)
+                if self._loaded and now - self._loaded_at < refresh:
+                    return
+
+        self._load_from_db()
+
+    def _load_from_db(self):
+        """
+        Read every non-zero version on the first load, and afterwards only the
+        users updated since the newest update already read.
+        """
+        query = db.session.query(User.id, User.token_version, User.updated_at)
+        if self._updated_since is None:
+            newest = (
+                db.session.query(func.max(User.updated_at)).scalar() or NEVER_UPDATED
+            )
+            query = query.filter(User.token_version > 0)
+        else:
+            newest = self._updated_since
+            query = query.filter(User.updated_at >= newest - SYNC_OVERLAP)
+
+        for user_id, version, updated_at in query:
+            self.observe(user_id, version)
+            if updated_at is not None and updated_at > newest:
+                newest = updated_at
+        self._updated_since = newest
+        self._loaded_at = time.monotonic()
+        self._loaded = True
+
+
+token_versions = TokenVersionRegistry()
+
+
+@event.listens_for(User, "before_update")
+def _bump_on_authorization_change(_mapper, _connection, user: User):
+    state = inspect(user)
+    if state.attrs.token_version.history.has_changes():
+        return
+    if any(state.attrs[field].history.has_changes() for field in AUTHORIZATION_FIELDS):
+        user.token_version = (user.token_version or 0) + 1
+
+
+@event.listens_for(User, "after_update")
+def _queue_version_change(_mapper, _connection, user: User):
+    if inspect(user).attrs.token_version.history.has_changes():
+        session = object_session(user)
+        session.info.setdefault("token_versions", {})[user.id] = user.token_version
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_versions(session: Session):
+    versions = session.info.pop("token_versions", None)
+    if versions:
+        token_versions.publish(versions)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_versions(session: Session):
+    session.info.pop("token_versions", None)
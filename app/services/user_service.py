@@ -5,6 +5,7 @@ from loguru import logger
 from app.extensions import db
 from app.models import User
 from app.services.auth_service import AuthService
+from app.utils.exceptions import ServiceOverloadedError
 
 
 class UserService:
@@ -42,6 +43,8 @@ class UserService:
             auth_service = AuthService()
             try:
                 hashed_password = auth_service._hash_password(password)
+            except ServiceOverloadedError:
+                raise
             except Exception as e:
                 logger.error(f"Failed to hash admin password: {e}")
                 return {"success": False, "message": "Failed to hash password!"}
@@ -70,6 +73,8 @@ class UserService:
                 "user": new_user.to_dict(),
             }
 
+        except ServiceOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error creating admin user: {e}")
             db.session.rollback()
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.services.rate_snapshot import rate_snapshot_cache
+from config import Config
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """
+    Application on an in-memory SQLite database (TEST_DATABASE_URL to use
+    another one, e.g. Postgres for DISTINCT ON), without Redis.
+    """
+    monkeypatch.setattr(
+        Config,
+        "SQLALCHEMY_DATABASE_URI",
+        os.getenv("TEST_DATABASE_URL", "sqlite://"),
+    )
+    monkeypatch.setattr(Config, "REDIS_URL", None)
+    monkeypatch.setattr(Config, "TOKEN_VERSION_SYNC_SECONDS", 3600)
+
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        db.create_all()
+        rate_snapshot_cache._snapshot = None
+        rate_snapshot_cache.invalidate()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,98 @@
+import redis
+
+from app.extensions import db
+from app.models import User
+from app.services.auth_service import AuthService
+from app.services.token_versions import TokenVersionRegistry
+
+
+def test_admin_greeting_returns_the_full_user(client):
+    admin = User(
+        email="admin@example.io",
+        password_hash="unused",
+        first_name="Ada",
+        last_name="Admin",
+        is_admin=True,
+    )
+    db.session.add(admin)
+    db.session.commit()
+    headers = {"Authorization": f"Bearer {AuthService()._generate_jwt(admin)}"}
+
+    # The second request is served from the cached claims-based principal
+    for _ in range(2):
+        response = client.get("/api/v1.0/admin/", headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()["user"] == admin.to_dict()
+
+
+def test_token_versions_sync_only_reads_updated_users(app, monkeypatch):
+    app.config["TOKEN_VERSION_SYNC_SECONDS"] = 0
+    # Keep this test's logout out of the process-wide registry
+    monkeypatch.setattr(
+        "app.services.token_versions.token_versions", TokenVersionRegistry()
+    )
+    users = [
+        User(
+            email=f"user{i}@example.io",
+            password_hash="unused",
+            first_name="Token",
+            last_name="Holder",
+            token_version=1,
+        )
+        for i in range(3)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+
+    # A second process, which does not see this one's published bumps
+    registry = TokenVersionRegistry()
+    assert registry.check(users[0].id, 1) is True
+
+    observed = []
+    observe = registry.observe
+    registry.observe = lambda user_id, version: (
+        observed.append(user_id),
+        observe(user_id, version),
+    )
+
+    AuthService().logout_user(users[0].id)
+    assert registry.check(users[0].id, 1) is False
+    assert registry.check(users[0].id, 2) is True
+    assert set(observed) == {users[0].id}
+
+
+class _StaleRedis:
+    """A Redis that can be read but no bump ever reaches."""
+
+    def pipeline(self):
+        raise redis.ConnectionError("publish lost")
+
+    def get(self, _key):
+        return b"1"
+
+    def hgetall(self, _key):
+        return {}
+
+
+def test_token_versions_read_the_database_despite_redis(app, monkeypatch):
+    app.config["TOKEN_VERSION_SYNC_SECONDS"] = 0
+    app.config["TOKEN_VERSION_REFRESH_SECONDS"] = 0
+    monkeypatch.setattr(
+        "app.services.token_versions.token_versions", TokenVersionRegistry()
+    )
+    monkeypatch.setattr("app.services.token_versions.get_redis", _StaleRedis)
+    user = User(
+        email="holder@example.io",
+        password_hash="unused",
+        first_name="Token",
+        last_name="Holder",
+        token_version=1,
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    registry = TokenVersionRegistry()
+    assert registry.check(user.id, 1) is True
+
+    AuthService().logout_user(user.id)
+    assert registry.check(user.id, 1) is False
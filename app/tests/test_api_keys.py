@@ -0,0 +1,49 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import ApiKey
+from app.services.api_key_service import ApiKeyService
+
+
+@pytest.fixture
+def hash_secret(app):
+    app.config["API_KEY_HASH_SECRET"] = "api-key-test-secret"
+    app.config["API_KEY_USAGE_FLUSH_SECONDS"] = 3600
+
+
+@pytest.mark.parametrize("secret", [None, "same-as-jwt"])
+def test_keys_require_a_separate_hash_secret(app, client, secret):
+    app.config["JWT_SECRET_KEY"] = "same-as-jwt"
+    app.config["API_KEY_HASH_SECRET"] = secret
+
+    result = ApiKeyService.create_api_key("backend", ["rates:read"])
+    response = client.get("/api/v1.0/rates", headers={"X-API-Key": "wrm_anything"})
+
+    assert result["success"] is False
+    assert "API_KEY_HASH_SECRET" in result["message"]
+    assert response.status_code == 503
+
+
+def test_key_scopes_are_enforced(app, client, hash_secret):
+    key = ApiKeyService.create_api_key("backend", ["rates:read"])["key"]
+
+    assert client.get("/api/v1.0/rates", headers={"X-API-Key": key}).status_code == 200
+    historical = client.get("/api/v1.0/rates/historical", headers={"X-API-Key": key})
+    assert historical.status_code == 403
+
+
+def test_revocation_is_seen_by_other_processes_without_redis(app, client, hash_secret):
+    app.config["API_KEY_SYNC_SECONDS"] = 0
+    created = ApiKeyService.create_api_key("backend", ["rates:read"])
+    headers = {"X-API-Key": created["key"]}
+    assert client.get("/api/v1.0/rates", headers=headers).status_code == 200
+
+    # Revoked by another process: nothing invalidates this process's index
+    api_key = db.session.get(ApiKey, created["api_key"]["id"])
+    api_key.is_active = False
+    api_key.revoked_at = datetime.now(UTC)
+    db.session.commit()
+
+    assert client.get("/api/v1.0/rates", headers=headers).status_code == 401
@@ -0,0 +1,193 @@
+import asyncio
+
+import pytest
+
+from app.services import async_fetch
+from app.services.providers import base_provider, circuit_breaker
+from app.services.providers.base_provider import BaseProviderClient
+from app.services.providers.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+)
+from app.services.providers.quota import QuotaExceededError, QuotaScheduler
+
+
+class StubProvider(BaseProviderClient):
+    name = "stub"
+    max_retries = 1
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+
+    def get_rates(self, *args, **kwargs):
+        return {"rates": {}}
+
+    async def get_rates_async(self, session, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return {"rates": {}}
+
+    def health_check(self):
+        return {"healthy": True}
+
+
+@pytest.fixture
+def breakers(app, monkeypatch):
+    app.config.update(CIRCUIT_MIN_CALLS=2, CIRCUIT_COOLDOWN_SECONDS=0)
+    registry = CircuitBreakerRegistry()
+    monkeypatch.setattr(base_provider, "circuit_breakers", registry)
+    monkeypatch.setattr(async_fetch, "circuit_breakers", registry)
+    return registry
+
+
+@pytest.fixture
+def quotas(app, monkeypatch):
+    scheduler = QuotaScheduler()
+    monkeypatch.setattr(base_provider, "quota_scheduler", scheduler)
+    monkeypatch.setattr(async_fetch, "quota_scheduler", scheduler)
+    return scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def _trip(breakers, provider="stub"):
+    for _ in range(2):
+        breakers.record_failure(provider, "down")
+    assert breakers.is_open(provider)
+
+
+def test_exhausted_quota_does_not_hold_the_probe(app, breakers, quotas):
+    _trip(breakers)
+    app.config["PROVIDER_QUOTAS"] = {"stub": {"per_minute": 0, "monthly": 1}}
+    quotas.acquire("stub")
+
+    provider = StubProvider()
+    with pytest.raises(QuotaExceededError):
+        provider.request_with_retry(provider.get_rates)
+
+    # Nothing went out, so the next caller may still probe
+    assert breakers.allow_request("stub") is True
+
+
+def test_cancelled_probe_is_released(app, breakers, quotas):
+    _trip(breakers)
+    app.config["PROVIDER_QUOTAS"] = {}
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(
+            async_fetch.fetch_with_retry(StubProvider(delay=5.0), None)
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel_probe())
+
+    assert breakers.is_open("stub")
+    assert breakers.allow_request("stub") is True
+
+
+def test_only_one_caller_probes(breakers):
+    _trip(breakers)
+
+    assert breakers.ensure_available("stub") is True
+    breakers.claim_probe("stub")
+    with pytest.raises(CircuitOpenError):
+        breakers.claim_probe("stub")
+
+
+def test_breaker_opens_once_the_failure_rate_is_reached(app, breakers):
+    app.config.update(
+        CIRCUIT_MIN_CALLS=4, CIRCUIT_FAILURE_RATE=0.5, CIRCUIT_COOLDOWN_SECONDS=60
+    )
+
+    for _ in range(3):
+        breakers.record_failure("stub", "down")
+    # Not enough calls yet to judge the provider
+    assert breakers.status("stub")["state"] == CLOSED
+
+    breakers.record_success("stub")
+    breakers.record_failure("stub", "down")
+    assert breakers.status("stub")["state"] == OPEN
+    assert breakers.status("stub")["failure_rate"] == 0.8
+
+
+def test_breaker_stays_closed_below_the_failure_rate(app, breakers):
+    app.config.update(CIRCUIT_MIN_CALLS=4, CIRCUIT_FAILURE_RATE=0.5)
+
+    for _ in range(3):
+        breakers.record_success("stub")
+    breakers.record_failure("stub", "down")
+
+    assert breakers.ensure_available("stub") is False
+    assert breakers.status("stub")["recent_calls"] == 4
+
+
+def test_open_breaker_rejects_until_the_cool_down_ends(app, breakers, clock):
+    app.config["CIRCUIT_COOLDOWN_SECONDS"] = 60
+    _trip(breakers)
+
+    clock.now += 59
+    with pytest.raises(CircuitOpenError):
+        breakers.ensure_available("stub")
+    assert breakers.allow_request("stub") is False
+
+    clock.now += 1
+    assert breakers.status("stub")["state"] == HALF_OPEN
+    assert breakers.ensure_available("stub") is True
+
+
+def test_successful_probe_closes_the_breaker(app, breakers, clock):
+    app.config["CIRCUIT_COOLDOWN_SECONDS"] = 60
+    _trip(breakers)
+    clock.now += 60
+
+    assert breakers.allow_request("stub") is True
+    breakers.record_success("stub")
+
+    status = breakers.status("stub")
+    assert status["state"] == CLOSED
+    assert status["recent_calls"] == 1
+    assert breakers.allow_request("stub") is True
+
+
+def test_failed_probe_starts_another_cool_down(app, breakers, clock):
+    app.config["CIRCUIT_COOLDOWN_SECONDS"] = 60
+    _trip(breakers)
+    clock.now += 60
+
+    assert breakers.allow_request("stub") is True
+    breakers.record_failure("stub", "still down")
+
+    assert breakers.status("stub")["state"] == OPEN
+    assert breakers.allow_request("stub") is False
+    clock.now += 60
+    # The failed probe gave its claim back
+    assert breakers.allow_request("stub") is True
+
+
+def test_reset_closes_the_breaker(breakers):
+    _trip(breakers)
+
+    breakers.reset("stub")
+
+    status = breakers.status("stub")
+    assert status["state"] == CLOSED
+    assert status["recent_calls"] == 0
+    assert breakers.allow_request("stub") is True
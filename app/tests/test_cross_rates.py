@@ -0,0 +1,75 @@
+from app.services.cross_rates import CurrencyGraph
+
+
+def _rate(base, target, average, markup):
+    return {
+        "base_currency": base,
+        "target_currency": target,
+        "average_buy_rate": average,
+        "average_sell_rate": average,
+        "final_buy_rate": average * (1 + markup),
+        "final_sell_rate": average * (1 - markup),
+        "markup_percentage": markup,
+        "aggregated_at": "2026-10-16T12:00:00",
+        "expires_at": "2026-10-16T13:00:00",
+    }
+
+
+def _graph(rates, **kwargs):
+    pairs = {}
+    for rate in rates:
+        base, target = rate["base_currency"], rate["target_currency"]
+        pairs[(base, target)] = rate
+        pairs[(target, base)] = {
+            **_rate(target, base, 1 / rate["average_buy_rate"], rate["markup_percentage"]),
+            "inverted": True,
+        }
+    return CurrencyGraph(pairs, **kwargs)
+
+
+def test_two_cheap_legs_beat_an_expensive_direct_pair():
+    graph = _graph(
+        [
+            _rate("USD", "ZAR", 18.0, 0.10),
+            _rate("USD", "EUR", 0.9, 0.01),
+            _rate("EUR", "ZAR", 20.0, 0.01),
+        ]
+    )
+
+    rate = graph.cross_rate("USD", "ZAR")
+
+    assert rate["path"] == ["USD", "EUR", "ZAR"]
+    assert rate["markup_percentage"] == 0.01
+    assert rate["final_buy_rate"] < 18.0 * 1.10
+
+
+def test_equal_spreads_prefer_fewer_legs():
+    graph = _graph(
+        [
+            _rate("USD", "ZAR", 18.0, 0.01),
+            _rate("USD", "EUR", 0.9, 0.01),
+            _rate("EUR", "ZAR", 20.0, 0.0),
+        ]
+    )
+
+    assert graph.cross_rate("USD", "ZAR")["path"] == ["USD", "ZAR"]
+
+
+def test_unknown_currencies_are_not_cached():
+    graph = _graph([_rate("USD", "ZAR", 18.0, 0.01)])
+
+    assert graph.cross_rate("AAA", "BBB") is None
+    assert graph.cross_rate("USD", "BBB") is None
+    assert len(graph._cache) == 0
+
+
+def test_route_cache_is_bounded():
+    graph = _graph(
+        [_rate("USD", target, 2.0, 0.01) for target in ("EUR", "GBP", "ZAR", "JPY")],
+        max_routes=3,
+    )
+
+    for target in ("EUR", "GBP", "ZAR", "JPY"):
+        assert graph.cross_rate("USD", target) is not None
+
+    assert list(graph._cache) == [("USD", "GBP"), ("USD", "ZAR"), ("USD", "JPY")]
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+from email_validator import EmailUndeliverableError
+
+from app.services import email_deliverability as module
+from app.services.email_deliverability import DomainDeliverability
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class StubDns:
+    """validate_email_deliverability answering from a domain -> outcome map."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.lookups = []
+        self.answer = threading.Event()
+        self.answer.set()
+
+    def __call__(self, ascii_domain, domain, timeout=None):
+        self.lookups.append(ascii_domain)
+        self.answer.wait()
+        outcome = self.outcomes[ascii_domain]
+        if outcome is False:
+            raise EmailUndeliverableError(f"{ascii_domain} has no MX")
+        if outcome is None:
+            return {"unknown-deliverability": "timeout"}
+        return {"mx": [(10, f"mx.{ascii_domain}")]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    dns = StubDns({"good.io": True, "bad.io": False, "slow.io": None})
+    monkeypatch.setattr(module, "validate_email_deliverability", dns)
+    return dns
+
+
+@pytest.fixture
+def cache(app):
+    app.config.update(
+        EMAIL_DOMAIN_CACHE_TTL_SECONDS=86400, EMAIL_DOMAIN_NEGATIVE_TTL_SECONDS=3600
+    )
+    return DomainDeliverability()
+
+
+def test_deliverable_domain_is_cached_for_the_positive_ttl(app, cache, dns, clock):
+    cache._check(app, "good.io", "good.io")
+
+    clock.now += 86399
+    assert cache.status("good.io") is True
+    clock.now += 1
+    assert cache._get("good.io") is None
+    assert dns.lookups == ["good.io"]
+
+
+def test_undeliverable_domain_is_cached_for_the_negative_ttl(app, cache, dns, clock):
+    cache._check(app, "bad.io", "bad.io")
+
+    clock.now += 3599
+    assert cache.status("bad.io") is False
+    clock.now += 1
+    assert cache._get("bad.io") is None
+
+
+def test_timed_out_lookup_is_not_cached(app, cache, dns, clock):
+    cache._check(app, "slow.io", "slow.io")
+
+    assert cache._get("slow.io") is None
+    assert cache._pending == set()
+
+
+def test_unknown_domain_is_checked_once_in_the_background(app, cache, dns, clock):
+    dns.answer.clear()
+    assert cache.status("good.io") is None
+    assert cache.status("good.io") is None
+
+    dns.answer.set()
+    cache._executor.shutdown(wait=True)
+
+    assert dns.lookups == ["good.io"]
+    assert cache.status("good.io") is True
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.models import AggregatedRate, CurrencyPair, User
+from app.services.auth_service import AuthService
+
+
+@pytest.fixture
+def auth_headers(app):
+    user = User(
+        email="history@example.io",
+        password_hash="unused",
+        first_name="Rate",
+        last_name="Historian",
+    )
+    db.session.add(user)
+    db.session.commit()
+    return {"Authorization": f"Bearer {AuthService()._generate_jwt(user)}"}
+
+
+@pytest.fixture
+def rates(app):
+    pair = CurrencyPair(base_currency="USD", target_currency="ZAR")
+    db.session.add(pair)
+    db.session.flush()
+    now = datetime.now()
+    for minutes in range(5):
+        db.session.add(
+            AggregatedRate(
+                currency_pair_id=pair.id,
+                average_buy_rate=Decimal("18"),
+                average_sell_rate=Decimal("18"),
+                final_buy_rate=Decimal("19"),
+                final_sell_rate=Decimal("17"),
+                markup_percentage=Decimal("0.05"),
+                provider_count=1 if minutes == 0 else 2,
+                source="stream" if minutes == 0 else "refresh",
+                aggregated_at=now - timedelta(minutes=minutes),
+                expires_at=now + timedelta(hours=1),
+            )
+        )
+    db.session.commit()
+
+
+@pytest.mark.parametrize("response_format", ["json", "ndjson"])
+@pytest.mark.parametrize("limit", ["abc", "0", "-3"])
+def test_invalid_limit_is_rejected_in_both_formats(
+    client, auth_headers, response_format, limit
+):
+    response = client.get(
+        f"/api/v1.0/rates/historical?format={response_format}&limit={limit}",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert "limit" in response.get_json()["error"]
+
+
+def test_pages_follow_the_cursor(client, auth_headers, rates):
+    seen = []
+    url = "/api/v1.0/rates/historical?limit=2"
+    while url:
+        page = client.get(url, headers=auth_headers).get_json()
+        seen.extend(rate["id"] for rate in page["historical_rates"])
+        cursor = page["next_cursor"]
+        url = f"/api/v1.0/rates/historical?limit=2&cursor={cursor}" if cursor else None
+
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def test_ndjson_streams_every_row(client, auth_headers, rates):
+    response = client.get(
+        "/api/v1.0/rates/historical?format=ndjson", headers=auth_headers
+    )
+
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.mimetype == "application/x-ndjson"
+    assert len(lines) == 5
+    assert json.loads(lines[0])["base_currency"] == "USD"
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = client.get(
+        "/api/v1.0/rates/historical?cursor=not-a-cursor", headers=auth_headers
+    )
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+@pytest.mark.parametrize("source, count", [("refresh", 4), ("stream", 1)])
+def test_source_filter(client, auth_headers, rates, source, count):
+    page = client.get(
+        f"/api/v1.0/rates/historical?source={source}", headers=auth_headers
+    ).get_json()
+
+    assert page["count"] == count
+    assert {rate["source"] for rate in page["historical_rates"]} == {source}
+
+
+def test_unknown_source_is_rejected(client, auth_headers):
+    response = client.get(
+        "/api/v1.0/rates/historical?source=feed", headers=auth_headers
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,232 @@
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import AggregatedRate, CurrencyPair, User
+from app.services.auth_service import AuthService
+from app.services.rate_change_tracker import AGGREGATED_FIELDS, rate_change_tracker
+from app.services.rate_snapshot import publish_generation, rate_snapshot_cache
+
+
+def _target_codes(count):
+    return [f"X{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(count)]
+
+
+def _seed_pairs(count):
+    """Replace the currency pairs with `count` USD pairs, one rate each."""
+    AggregatedRate.query.delete()
+    CurrencyPair.query.delete()
+    now = datetime.now(UTC)
+    for target in _target_codes(count):
+        pair = CurrencyPair(
+            base_currency="USD",
+            target_currency=target,
+            markup_percentage=Decimal("0.1"),
+        )
+        db.session.add(pair)
+        db.session.flush()
+        db.session.add(
+            AggregatedRate(
+                currency_pair_id=pair.id,
+                average_buy_rate=Decimal("2.0"),
+                average_sell_rate=Decimal("2.0"),
+                final_buy_rate=Decimal("2.0"),
+                final_sell_rate=Decimal("2.0"),
+                markup_percentage=Decimal("0.1"),
+                provider_count=2,
+                aggregated_at=now,
+                expires_at=now + timedelta(hours=1),
+            )
+        )
+    db.session.commit()
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *_args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *_exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def auth_headers(app):
+    user = User(
+        email="reader@example.io",
+        password_hash="unused",
+        first_name="Rate",
+        last_name="Reader",
+    )
+    db.session.add(user)
+    db.session.commit()
+    return {"Authorization": f"Bearer {AuthService()._generate_jwt(user)}"}
+
+
+@pytest.mark.parametrize("pair_count", [2, 40])
+def test_get_latest_for_all_runs_one_query(app, pair_count):
+    _seed_pairs(pair_count)
+    db.session.expire_all()
+
+    with QueryCounter(db.engine) as queries:
+        latest = AggregatedRate.get_latest_for_all()
+
+    assert queries.count == 1
+    assert latest["USD"]["count"] == pair_count
+    assert {rate["final_buy_rate"] for rate in latest["USD"]["rates"]} == {2.0}
+    for target in _target_codes(pair_count):
+        assert latest[target]["rates"][0]["inverted"] is True
+
+
+def test_get_latest_for_all_returns_newest_rate_per_pair(app, client, auth_headers):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("SQLite ignores DISTINCT ON, set TEST_DATABASE_URL")
+    _seed_pairs(3)
+    now = datetime.now(UTC)
+    for newest in AggregatedRate.query.all():
+        # Inserted after the newest row, so neither id nor insertion order wins
+        older = {
+            column: getattr(newest, column)
+            for column in AGGREGATED_FIELDS + ("currency_pair_id",)
+        }
+        older["final_buy_rate"] = Decimal("1.0")
+        db.session.add(
+            AggregatedRate(
+                **older,
+                aggregated_at=now - timedelta(minutes=10),
+                expires_at=now + timedelta(minutes=50),
+            )
+        )
+    db.session.commit()
+    db.session.expire_all()
+    expected = {rate.id for rate in AggregatedRate.get_all_latest()}
+
+    with QueryCounter(db.engine) as queries:
+        latest = AggregatedRate.get_latest_for_all()
+
+    assert queries.count == 1
+    assert latest["USD"]["count"] == 3
+    assert {rate["id"] for rate in latest["USD"]["rates"]} == expected
+    assert {rate["final_buy_rate"] for rate in latest["USD"]["rates"]} == {2.0}
+
+    response = client.get("/api/v1.0/rates", headers=auth_headers)
+    assert response.get_json()["data"] == latest
+
+
+def test_rates_endpoint_query_count_is_constant(app, client, auth_headers):
+    # Warm up authentication state so only the rates lookup is counted
+    assert client.get("/api/v1.0/rates", headers=auth_headers).status_code == 200
+
+    counts = {}
+    for pair_count in (2, 40):
+        _seed_pairs(pair_count)
+        db.session.expire_all()
+        rate_snapshot_cache._snapshot = None
+        rate_snapshot_cache.invalidate()
+
+        with QueryCounter(db.engine) as queries:
+            response = client.get("/api/v1.0/rates", headers=auth_headers)
+
+        assert response.status_code == 200
+        counts[pair_count] = queries.count
+
+    assert counts[2] == counts[40]
+
+
+def test_rates_for_currency_normalizes_case(app, client, auth_headers):
+    _seed_pairs(2)
+
+    upper = client.get("/api/v1.0/rates/USD", headers=auth_headers)
+    lower = client.get("/api/v1.0/rates/usd", headers=auth_headers)
+
+    assert upper.status_code == lower.status_code == 200
+    assert lower.get_json() == upper.get_json()
+    assert len(upper.get_json()) == 2
+    assert client.get("/api/v1.0/rates/QQQ", headers=auth_headers).status_code == 400
+
+
+def test_deactivated_pairs_leave_the_snapshot(app):
+    _seed_pairs(2)
+    pair = CurrencyPair.query.first()
+    pair.is_active = False
+    db.session.commit()
+
+    rows = AggregatedRate.get_latest_with_pairs()
+
+    assert len(rows) == 1
+    assert rows[0][1].id != pair.id
+
+
+def test_snapshot_follows_extended_rates_without_redis(app):
+    _seed_pairs(2)
+    snapshot = rate_snapshot_cache.get()
+
+    # What extend_aggregated_rates does for an unchanged rate
+    rate = AggregatedRate.query.first()
+    rate.expires_at += timedelta(hours=1)
+    db.session.commit()
+    publish_generation()
+
+    rebuilt = rate_snapshot_cache.get()
+    assert rebuilt.generation != snapshot.generation
+    pair = db.session.get(CurrencyPair, rate.currency_pair_id)
+    assert rebuilt.get_pair("USD", pair.target_currency)["expires_at"] == (
+        rate.expires_at.isoformat()
+    )
+
+
+def test_change_tracker_reseeds_without_redis(app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("seeding relies on DISTINCT ON, set TEST_DATABASE_URL")
+    _seed_pairs(1)
+    rate_change_tracker.load()
+    (pair_id,) = rate_change_tracker._aggregated
+
+    # Another process writes a newer rate for the pair
+    latest = AggregatedRate.query.one()
+    newer = AggregatedRate(
+        **{
+            column: getattr(latest, column)
+            for column in AGGREGATED_FIELDS + ("currency_pair_id", "expires_at")
+        },
+        aggregated_at=latest.aggregated_at + timedelta(minutes=1),
+    )
+    db.session.add(newer)
+    db.session.commit()
+
+    rate_change_tracker.load()
+    assert rate_change_tracker._aggregated[pair_id][0] == newer.id
+
+
+def test_change_tracker_seeds_every_source(app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("seeding relies on DISTINCT ON, set TEST_DATABASE_URL")
+    _seed_pairs(1)
+    refreshed = AggregatedRate.query.one()
+
+    # The tick stream writes a newer rate for the same pair
+    streamed = AggregatedRate(
+        **{
+            column: getattr(refreshed, column)
+            for column in AGGREGATED_FIELDS + ("currency_pair_id", "expires_at")
+        },
+        source="stream",
+        aggregated_at=refreshed.aggregated_at + timedelta(minutes=1),
+    )
+    db.session.add(streamed)
+    db.session.commit()
+
+    rate_change_tracker.load()
+    pair_id = refreshed.currency_pair_id
+    assert rate_change_tracker._aggregated[str(pair_id)][0] == refreshed.id
+    assert rate_change_tracker._aggregated[f"{pair_id}:stream"][0] == streamed.id
@@ -0,0 +1,61 @@
+from app.extensions import db
+from app.models import User
+from app.services.auth_service import AuthService
+from app.services.password_hashing import PasswordHashingPool, password_hashing
+from app.utils.exceptions import ServiceOverloadedError
+
+
+def _capacity(slots):
+    taken = 0
+    while slots.acquire(blocking=False):
+        taken += 1
+    return taken
+
+
+def test_reset_replaces_executor_and_slots(app):
+    pool = PasswordHashingPool()
+    executor, slots = pool._ensure_pool(1, 1)
+    slots.acquire()
+
+    pool.reset()
+    new_executor, new_slots = pool._ensure_pool(1, 1)
+
+    assert new_executor is not executor
+    assert _capacity(new_slots) == 2
+    new_executor.shutdown()
+
+
+def test_size_change_restarts_the_pool(app):
+    pool = PasswordHashingPool()
+    executor, _slots = pool._ensure_pool(1, 1)
+
+    new_executor, new_slots = pool._ensure_pool(2, 3)
+
+    assert new_executor is not executor
+    assert _capacity(new_slots) == 5
+    assert pool._ensure_pool(2, 3) == (new_executor, new_slots)
+    new_executor.shutdown()
+
+
+def test_overloaded_rehash_does_not_fail_the_login(app, monkeypatch):
+    user = User(
+        email="legacy@example.io",
+        password_hash="old-parameters",
+        first_name="Legacy",
+        last_name="Hash",
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    def overloaded(_password):
+        raise ServiceOverloadedError("busy")
+
+    monkeypatch.setattr(password_hashing, "verify", lambda *_args: (True, True))
+    monkeypatch.setattr(password_hashing, "hash", overloaded)
+
+    result = AuthService().login_user("legacy@example.io", "secret")
+
+    assert result["success"] is True
+    db.session.refresh(user)
+    assert user.last_login is not None
+    assert user.password_hash == "old-parameters"
@@ -0,0 +1,93 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.services.providers import quota
+from app.services.providers.quota import QuotaExceededError, QuotaScheduler
+
+
+class Clock:
+    """Stands in for both datetime and time in the quota module."""
+
+    def __init__(self, now):
+        self.current = now
+
+    def now(self, tz=None):
+        return self.current
+
+    def time(self):
+        return self.current.timestamp()
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(datetime(2026, 10, 2, tzinfo=UTC))
+    monkeypatch.setattr(quota, "datetime", clock)
+    monkeypatch.setattr(quota, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def scheduler(app):
+    app.config["PROVIDER_QUOTAS"] = {
+        "minute": {"per_minute": 2, "monthly": 0},
+        "month": {"per_minute": 0, "monthly": 310},
+    }
+    app.config["QUOTA_TIGHT_MIN_PRIORITY"] = 1
+    return QuotaScheduler()
+
+
+def _jobs(provider, *priorities):
+    return [
+        {"provider": provider, "key": f"{provider}-{i}", "priority": priority}
+        for i, priority in enumerate(priorities)
+    ]
+
+
+def test_minute_bucket_refills_over_time(scheduler, clock):
+    scheduler.acquire("minute")
+    scheduler.acquire("minute")
+    with pytest.raises(QuotaExceededError):
+        scheduler.acquire("minute")
+
+    # Two tokens per minute: one is back after 30 seconds
+    clock.advance(30)
+    scheduler.acquire("minute")
+    assert scheduler.try_acquire("minute") is False
+
+
+def test_unlimited_provider_is_never_throttled(scheduler, clock):
+    assert all(scheduler.try_acquire("unlisted") for _ in range(100))
+    assert scheduler.usage("unlisted")["monthly_used"] == 0
+
+
+def test_plan_admits_the_highest_priorities_within_budget(scheduler, clock):
+    admitted, deferred = scheduler.plan(_jobs("minute", 0, 5, 2))
+
+    assert [job["priority"] for job in admitted] == [5, 2]
+    assert [job["priority"] for job in deferred] == [0]
+
+
+def test_tight_month_defers_low_priority_requests(scheduler, clock):
+    # A day into October the even pace is 10 calls, plus a day's slack
+    for _ in range(21):
+        scheduler.acquire("month")
+    assert scheduler.usage("month")["tight"] is True
+
+    admitted, deferred = scheduler.plan(_jobs("month", 0, 1))
+
+    assert [job["priority"] for job in admitted] == [1]
+    assert [job["priority"] for job in deferred] == [0]
+
+
+def test_month_on_pace_is_not_tight(scheduler, clock):
+    for _ in range(20):
+        scheduler.acquire("month")
+
+    usage = scheduler.usage("month")
+    assert usage["tight"] is False
+    assert usage["monthly_remaining"] == 290
+    assert scheduler.plan(_jobs("month", 0))[1] == []
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from app.models import CurrencyPair
+from app.services.pair_registry import PairRegistry
+from app.services.rate_aggregator import VectorizedRateAggregator
+
+
+def _registry(markup):
+    pair = CurrencyPair(
+        id=1,
+        base_currency="USD",
+        target_currency="EUR",
+        markup_percentage=Decimal(markup),
+    )
+    return PairRegistry([pair])
+
+
+def _quotes(*rates):
+    return [
+        {"pair_row": 0, "provider": f"p{i}", "buy_rate": rate, "sell_rate": rate}
+        for i, rate in enumerate(rates)
+    ]
+
+
+def test_rates_are_rounded_half_up():
+    (row,) = VectorizedRateAggregator().aggregate(
+        _registry("0"), _quotes(2.000000025, 2.000000025)
+    )
+
+    # np.round would give 2.00000002 (half to even)
+    assert row["average_buy_rate"] == 2.00000003
+    assert row["final_buy_rate"] == 2.00000003
+
+
+def test_markup_is_applied_before_rounding():
+    (row,) = VectorizedRateAggregator().aggregate(_registry("0.01"), _quotes(1.1, 1.3))
+
+    assert row["provider_count"] == 2
+    assert row["final_buy_rate"] == 1.212
+    assert row["final_sell_rate"] == 1.188
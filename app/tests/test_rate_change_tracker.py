@@ -0,0 +1,22 @@
+from app.services.rate_change_tracker import RateChangeTracker
+
+
+def _quote(pair_id, provider, rate):
+    return {
+        "currency_pair_id": pair_id,
+        "provider": provider,
+        "buy_rate": rate,
+        "sell_rate": rate,
+    }
+
+
+def test_quotes_are_not_filtered_without_redis(app):
+    tracker = RateChangeTracker()
+    tracker.load()
+    written = [_quote(1, "fixer", 1.1), _quote(2, "fixer", 0.9)]
+    tracker.remember(written, [], [])
+
+    # Another worker may have written a different quote since, so repeating
+    # this worker's last one must still be inserted
+    tracker.load()
+    assert tracker.changed_quotes(written) == written
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from app.extensions import db
+from app.models import User
+from app.services.auth_service import AuthService
+from app.services.rate_broadcast import RateBroadcaster, RateUpdate, rate_broadcaster
+from app.services.rate_snapshot import RateSnapshot
+
+
+@pytest.fixture
+def auth_headers(app):
+    user = User(
+        email="streamer@example.io",
+        password_hash="unused",
+        first_name="Rate",
+        last_name="Streamer",
+    )
+    db.session.add(user)
+    db.session.commit()
+    return {"Authorization": f"Bearer {AuthService()._generate_jwt(user)}"}
+
+
+def _snapshot(generation, pairs):
+    snapshot = RateSnapshot(generation, [])
+    snapshot.pairs = {pair: {"final_buy_rate": rate} for pair, rate in pairs.items()}
+    return snapshot
+
+
+def test_removed_pairs_are_broadcast():
+    broadcaster = RateBroadcaster()
+    broadcaster.publish(_snapshot(1, {("USD", "ZAR"): 18.0, ("USD", "EUR"): 0.9}))
+    broadcaster.publish(_snapshot(2, {("USD", "EUR"): 0.9}))
+
+    (update,) = broadcaster.updates_since(1, timeout=0)
+    payload = json.loads(update.payload(None))
+
+    assert payload["rates"] == {}
+    assert payload["removed"] == {"USD": ["ZAR"]}
+    assert update.payload(frozenset({"EUR"})) is None
+
+
+def test_unchanged_pairs_send_no_removed_key():
+    update = RateUpdate(1, 2, {("USD", "EUR"): {"final_buy_rate": 0.9}})
+
+    assert "removed" not in json.loads(update.payload(None))
+
+
+def test_streams_are_capped_and_released(app, client, auth_headers):
+    app.config["RATE_STREAM_MAX_SUBSCRIBERS"] = 1
+
+    first = client.get("/api/v1.0/rates/stream", headers=auth_headers, buffered=False)
+    rejected = client.get("/api/v1.0/rates/stream", headers=auth_headers)
+
+    assert first.status_code == 200
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"]
+
+    first.close()
+    assert rate_broadcaster.subscribers == 0
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.services.refresh_orchestrator import RefreshOrchestrator
+
+
+class StubRequests:
+    """request() factory answering each call after the next scripted delay."""
+
+    def __init__(self, *delays, error=None):
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self._respond(self.calls, self.delays.pop(0))
+
+    async def _respond(self, call, delay):
+        await asyncio.sleep(delay)
+        if self.error:
+            raise self.error
+        return {"call": call}
+
+
+@pytest.fixture
+def orchestrator(app):
+    app.config["RATE_HEDGE_DEFAULT_DELAY_SECONDS"] = 0.05
+    return RefreshOrchestrator()
+
+
+def test_slow_request_is_hedged(orchestrator):
+    requests = StubRequests(5.0, 0.01)
+
+    result = asyncio.run(orchestrator._hedged("stub", requests))
+
+    assert result == {"call": 2}
+    assert requests.calls == 2
+
+
+def test_fast_request_is_not_hedged(orchestrator):
+    requests = StubRequests(0.01, 0.01)
+
+    assert asyncio.run(orchestrator._hedged("stub", requests)) == {"call": 1}
+    assert requests.calls == 1
+
+
+def test_failed_request_is_not_hedged(orchestrator):
+    requests = StubRequests(0.01, 0.01, error=ValueError("boom"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(orchestrator._hedged("stub", requests))
+    assert requests.calls == 1
@@ -1 +1,8 @@
 # Exceptions
+
+
+class ServiceOverloadedError(Exception):
+    """
+    Raised when a bounded worker pool cannot take more work right now.
+    API routes answer it with 503 and a Retry-After header.
+    """
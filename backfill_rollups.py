@@ -0,0 +1,32 @@
+import argparse
+
+from app import create_app
+from app.extensions import db
+from app.models import AggregatedRateRollup
+
+
+def backfill_rollups(intervals):
+    """Rebuild the OHLC rollup tables from the existing aggregated rates."""
+    app = create_app()
+    with app.app_context():
+        try:
+            for interval in intervals:
+                print(f"Backfilling {interval} rollups...")
+                AggregatedRateRollup.refresh_from_aggregated(intervals=[interval])
+                db.session.commit()
+            print("Rollups backfilled.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error backfilling rollups: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=backfill_rollups.__doc__)
+    parser.add_argument(
+        "--interval",
+        choices=AggregatedRateRollup.INTERVALS,
+        action="append",
+        help="Interval to rebuild, repeatable (default: all)",
+    )
+    args = parser.parse_args()
+    backfill_rollups(args.interval or AggregatedRateRollup.INTERVALS)
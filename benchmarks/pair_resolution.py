@@ -0,0 +1,81 @@
+# Pair resolution benchmark
+"""
+Resolving provider quotes to pairs in the save step: the former linear
+next(...) scan over the pair list against the PairRegistry hash index.
+
+    python -m benchmarks.pair_resolution --pairs 100 1000 10000 50000
+
+The linear scan is O(quotes x pairs); above --scan-sample quotes it is timed
+on an evenly spaced sample and scaled up to the full quote count.
+"""
+
+import argparse
+import time
+
+from app.services.pair_registry import PairRegistry
+from app.services.rate_processor import RateProcessorService
+from benchmarks.fixtures import best_of, make_pairs, make_quotes, quiet
+
+
+def linear_resolve(pairs, quotes: list[tuple[str, str]]) -> list:
+    """The former lookup: one scan of the pair list per quote."""
+    return [
+        next(
+            (
+                pair
+                for pair in pairs
+                if pair.base_currency == base_currency
+                and pair.target_currency == target_currency
+            ),
+            None,
+        )
+        for base_currency, target_currency in quotes
+    ]
+
+
+def run(pair_counts: list[int], scan_sample: int, repeat: int):
+    quiet()
+    # Only _collect_quotes is exercised, which needs no application state
+    processor = RateProcessorService.__new__(RateProcessorService)
+    print(
+        f"{'pairs':>8} {'linear scan':>13} {'registry build':>15} "
+        f"{'collect_quotes':>15} {'speedup':>8}"
+    )
+    for count in pair_counts:
+        pairs = make_pairs(count)
+        rate_data = make_quotes(pairs, providers=("exchange_rate",))["exchange_rate"]
+        quotes = [
+            (base_currency, rate["pair"])
+            for base_currency, rates in rate_data.items()
+            for rate in rates
+        ]
+
+        sample = quotes[:: max(len(quotes) // scan_sample, 1)]
+        started = time.perf_counter()
+        linear_resolve(pairs, sample)
+        linear_seconds = (time.perf_counter() - started) * len(quotes) / len(sample)
+        estimated = "~" if len(sample) < len(quotes) else " "
+
+        build_seconds = best_of(repeat, PairRegistry, pairs)
+        registry = PairRegistry(pairs)
+        provider_results = [{"source": "exchange_rate", "rate_data": rate_data}]
+        collect_seconds = best_of(
+            repeat, processor._collect_quotes, registry, provider_results
+        )
+        indexed_seconds = build_seconds + collect_seconds
+        print(
+            f"{count:>8} {estimated}{linear_seconds * 1000:>10.1f}ms "
+            f"{build_seconds * 1000:>13.1f}ms {collect_seconds * 1000:>13.1f}ms "
+            f"{linear_seconds / indexed_seconds:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--pairs", type=int, nargs="+", default=[100, 1000, 10000, 50000]
+    )
+    parser.add_argument("--scan-sample", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.pairs, args.scan_sample, args.repeat)
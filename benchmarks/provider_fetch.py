@@ -0,0 +1,133 @@
+# Provider fetch benchmark
+"""
+Throughput of provider requests against a local stub HTTP server: the former
+thread-pool fetch (blocking get_rates per worker thread) against the asyncio
+engine (get_rates_async through fetch_with_retry on one event loop).
+
+    python -m benchmarks.provider_fetch --requests 500 --latency 0.05
+
+The stub answers in the ExchangeRate API format after --latency seconds, so
+wall time is dominated by how many requests each engine keeps in flight.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from app import create_app
+from app.services.async_fetch import (
+    fetch_with_retry,
+    gather_with_deadline,
+    open_http_session,
+)
+from app.services.providers.exchange_rate_client import ExchangeRateClient
+from benchmarks.fixtures import quiet
+from config import Config
+
+
+class StubProviderServer:
+    """ExchangeRate API stand-in on localhost, run on its own event loop thread."""
+
+    def __init__(self, latency: float, port: int = 8766):
+        self.latency = latency
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+
+    async def _latest(self, request):
+        await asyncio.sleep(self.latency)
+        return web.json_response(
+            {
+                "result": "success",
+                "base_code": request.match_info["base"],
+                "conversion_rates": {"USD": 1.0, "ZAR": 18.2, "EUR": 0.92},
+                "time_last_update_utc": "Fri, 16 Oct 2026 12:00:00 +0000",
+                "time_next_update_utc": "Sat, 17 Oct 2026 12:00:00 +0000",
+            }
+        )
+
+    def start(self) -> str:
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._started.wait()
+        return f"http://127.0.0.1:{self.port}/v6"
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+        application = web.Application()
+        application.router.add_get("/v6/{key}/latest/{base}", self._latest)
+        runner = web.AppRunner(application, access_log=None)
+        self._loop.run_until_complete(runner.setup())
+        self._loop.run_until_complete(
+            web.TCPSite(runner, "127.0.0.1", self.port, backlog=1024).start()
+        )
+        self._started.set()
+        self._loop.run_forever()
+
+
+def fetch_with_threads(app, client, bases: list[str], workers: int):
+    """One blocking request per worker thread, as the thread-pool fetcher did."""
+
+    def fetch(base_currency):
+        with app.app_context():
+            return client.get_rates(base_currency)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch, bases))
+
+
+async def fetch_with_asyncio(client, bases: list[str], concurrency: int):
+    """All requests on one event loop, at most `concurrency` in flight."""
+    async with open_http_session(limit=concurrency) as session:
+        return await gather_with_deadline(
+            {
+                (base_currency, i): fetch_with_retry(client, session, base_currency)
+                for i, base_currency in enumerate(bases)
+            }
+        )
+
+
+def run(requests: int, latency: float, concurrency: list[int]):
+    quiet()
+    Config.REDIS_URL = None
+    Config.EXCHANGE_RATE_API_KEY = "benchmark"
+    app = create_app()
+    app.config["PROVIDER_QUOTAS"] = {}
+
+    base_url = StubProviderServer(latency).start()
+    bases = [f"B{i % 100:02d}" for i in range(requests)]
+
+    print(f"{requests} requests, {latency * 1000:.0f}ms stub latency")
+    print(f"{'in flight':>10} {'threads':>14} {'asyncio':>14}")
+    with app.app_context():
+        client = ExchangeRateClient()
+        client.BASE_URL = base_url
+
+        for limit in concurrency:
+            started = time.perf_counter()
+            fetch_with_threads(app, client, bases, limit)
+            thread_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            results = asyncio.run(fetch_with_asyncio(client, bases, limit))
+            async_seconds = time.perf_counter() - started
+            failed = sum(isinstance(result, Exception) for result in results.values())
+            if failed:
+                print(f"  {failed} asyncio requests failed")
+
+            print(
+                f"{limit:>10} {requests / thread_seconds:>10.0f} r/s "
+                f"{requests / async_seconds:>10.0f} r/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+    run(args.requests, args.latency, args.concurrency)
@@ -28,10 +28,149 @@ class Config:
     POLYGON_API_KEY = os.environ.get("POLYGON_API_KEY")
     CURRENCY_LAYER_API_KEY = os.environ.get("CURRENCY_LAYER_API_KEY")
 
+    # Refresh fan-out: total in-flight provider requests and per-provider caps
+    REFRESH_MAX_CONCURRENCY = int(os.getenv("REFRESH_MAX_CONCURRENCY", "16"))
+    REFRESH_PROVIDER_CONCURRENCY = {
+        "exchange_rate": int(os.getenv("EXCHANGE_RATE_MAX_CONCURRENCY", "4")),
+        "currency_layer": int(os.getenv("CURRENCY_LAYER_MAX_CONCURRENCY", "4")),
+        "fixer": int(os.getenv("FIXER_MAX_CONCURRENCY", "2")),
+        "polygon": int(os.getenv("POLYGON_MAX_CONCURRENCY", "4")),
+    }
+    # 'per_base' fetches one provider snapshot per base currency, 'snapshot'
+    # fetches RATE_SNAPSHOT_BASE once per provider and derives every pair from it
+    RATE_FETCH_MODE = os.getenv("RATE_FETCH_MODE", "per_base")
+    RATE_SNAPSHOT_BASE = os.getenv("RATE_SNAPSHOT_BASE", "USD")
+    # Requests still in flight after this many seconds are cancelled
+    REFRESH_DEADLINE_SECONDS = float(os.getenv("REFRESH_DEADLINE_SECONDS", "30"))
+
+    # Pooled keep-alive HTTP sessions shared by the provider clients (per host)
+    PROVIDER_HTTP_POOL_CONNECTIONS = int(
+        os.getenv("PROVIDER_HTTP_POOL_CONNECTIONS", "4")
+    )
+    PROVIDER_HTTP_POOL_MAXSIZE = int(os.getenv("PROVIDER_HTTP_POOL_MAXSIZE", "16"))
+
+    # Provider responses are reused until their next_update_utc, or this TTL
+    PROVIDER_CACHE_ENABLED = (
+        os.getenv("PROVIDER_CACHE_ENABLED", "true").lower() == "true"
+    )
+    PROVIDER_CACHE_TTL_SECONDS = int(os.getenv("PROVIDER_CACHE_TTL_SECONDS", "300"))
+
+    # Provider circuit breakers: open when at least half of the recent calls
+    # failed, reject calls during the cool-down, then let one probe through
+    CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+    CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+    CIRCUIT_WINDOW_SIZE = int(os.getenv("CIRCUIT_WINDOW_SIZE", "20"))
+    CIRCUIT_COOLDOWN_SECONDS = int(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "60"))
+    CIRCUIT_PROBE_TIMEOUT_SECONDS = int(
+        os.getenv("CIRCUIT_PROBE_TIMEOUT_SECONDS", "30")
+    )
+
+    # Hedged fetches: repeat a provider request once it passes this latency
+    # quantile, or after the default delay while the provider has no history
+    RATE_HEDGE_QUANTILE = float(os.getenv("RATE_HEDGE_QUANTILE", "0.95"))
+    RATE_HEDGE_DEFAULT_DELAY_SECONDS = float(
+        os.getenv("RATE_HEDGE_DEFAULT_DELAY_SECONDS", "2")
+    )
+
+    # Provider plan quotas (0 = unlimited), shared across workers through Redis
+    PROVIDER_QUOTAS = {
+        "exchange_rate": {
+            "per_minute": int(os.getenv("EXCHANGE_RATE_QUOTA_PER_MINUTE", "0")),
+            "monthly": int(os.getenv("EXCHANGE_RATE_QUOTA_MONTHLY", "1500")),
+        },
+        "currency_layer": {
+            "per_minute": int(os.getenv("CURRENCY_LAYER_QUOTA_PER_MINUTE", "0")),
+            "monthly": int(os.getenv("CURRENCY_LAYER_QUOTA_MONTHLY", "100")),
+        },
+        "fixer": {
+            "per_minute": int(os.getenv("FIXER_QUOTA_PER_MINUTE", "0")),
+            "monthly": int(os.getenv("FIXER_QUOTA_MONTHLY", "100")),
+        },
+        "polygon": {
+            "per_minute": int(os.getenv("POLYGON_QUOTA_PER_MINUTE", "5")),
+            "monthly": int(os.getenv("POLYGON_QUOTA_MONTHLY", "0")),
+        },
+    }
+    # Once monthly usage runs ahead of pace, only pairs with at least this
+    # priority are refreshed from that provider
+    QUOTA_TIGHT_MIN_PRIORITY = int(os.getenv("QUOTA_TIGHT_MIN_PRIORITY", "1"))
+
     # CELERY CONFIGS
     CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL")
     CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND")
 
+    # Redis (shared state across API and Celery workers)
+    REDIS_URL = os.environ.get("REDIS_URL", os.environ.get("CELERY_BROKER_URL"))
+
+    # Rate persistence: "insert" (multi-row INSERT) or "copy" (Postgres COPY)
+    RATE_BULK_WRITE_MODE = os.getenv("RATE_BULK_WRITE_MODE", "insert")
+
+    # Rate aggregation across providers: "mean" or "median"
+    RATE_AGGREGATION_STRATEGY = os.getenv("RATE_AGGREGATION_STRATEGY", "mean")
+
+    # Streaming tick ingestion (stream_rates.py)
+    TICK_STREAM_URL = os.getenv("TICK_STREAM_URL", "wss://socket.polygon.io/forex")
+    TICK_FLUSH_INTERVAL_SECONDS = float(os.getenv("TICK_FLUSH_INTERVAL_SECONDS", "5"))
+    TICK_PAIRS_REFRESH_SECONDS = float(os.getenv("TICK_PAIRS_REFRESH_SECONDS", "60"))
+
+    # Latest rates snapshot
+    RATE_SNAPSHOT_CHECK_SECONDS = float(os.getenv("RATE_SNAPSHOT_CHECK_SECONDS", "1"))
+
+    # Rate streams (GET /rates/stream): keep-alive interval and how many
+    # generation diffs are kept for clients that fall behind
+    RATE_STREAM_HEARTBEAT_SECONDS = float(
+        os.getenv("RATE_STREAM_HEARTBEAT_SECONDS", "15")
+    )
+    RATE_STREAM_HISTORY = int(os.getenv("RATE_STREAM_HISTORY", "32"))
+    # Open streams per API process (each holds a server thread), 0 for no cap
+    RATE_STREAM_MAX_SUBSCRIBERS = int(os.getenv("RATE_STREAM_MAX_SUBSCRIBERS", "100"))
+
     # JWT Config
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-    JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS"))
\ No newline at end of file
+    JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS"))
+
+    # API keys for machine clients: HMAC secret for the stored key hashes
+    # (required to use API keys, must differ from JWT_SECRET_KEY, changing it
+    # invalidates every key), how often each process checks for created or
+    # revoked keys (through Redis, or a small api_keys query without it), the
+    # full reload interval, and how often usage counts are written
+    API_KEY_HASH_SECRET = os.getenv("API_KEY_HASH_SECRET")
+    API_KEY_SYNC_SECONDS = float(os.getenv("API_KEY_SYNC_SECONDS", "1"))
+    API_KEY_REFRESH_SECONDS = float(os.getenv("API_KEY_REFRESH_SECONDS", "60"))
+    API_KEY_USAGE_FLUSH_SECONDS = float(os.getenv("API_KEY_USAGE_FLUSH_SECONDS", "10"))
+
+    # Resolved JWT principals, cached per token (never past the token's exp)
+    PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+    # How often each process picks up token version bumps (logout, role or
+    # status changes) made elsewhere, and with Redis how often the users table
+    # is still read in case a bump never reached Redis
+    TOKEN_VERSION_SYNC_SECONDS = float(os.getenv("TOKEN_VERSION_SYNC_SECONDS", "1"))
+    TOKEN_VERSION_REFRESH_SECONDS = float(
+        os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "60")
+    )
+
+    # Argon2 password hashing; hashes made with other parameters are upgraded
+    # on the next successful login
+    ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+    # Hashing process pool: concurrent hashes, callers allowed to wait, and how
+    # long a caller waits for a slot before getting a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "8"))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(
+        os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "0.1")
+    )
+
+    # Email domain deliverability (DNS MX) checks, run in the background and
+    # cached per domain; undeliverable domains are cached for a shorter time
+    EMAIL_DOMAIN_CACHE_TTL_SECONDS = int(
+        os.getenv("EMAIL_DOMAIN_CACHE_TTL_SECONDS", "86400")
+    )
+    EMAIL_DOMAIN_NEGATIVE_TTL_SECONDS = int(
+        os.getenv("EMAIL_DOMAIN_NEGATIVE_TTL_SECONDS", "3600")
+    )
+    EMAIL_DNS_TIMEOUT_SECONDS = int(os.getenv("EMAIL_DNS_TIMEOUT_SECONDS", "5"))
+    EMAIL_DNS_WORKERS = int(os.getenv("EMAIL_DNS_WORKERS", "2"))
\ No newline at end of file
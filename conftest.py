@@ -0,0 +1,6 @@
+import os
+
+# config.py reads these at import time, and importing app/tests (a package)
+# imports app and config before app/tests/conftest.py runs
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_EXPIRATION_HOURS", "1")
@@ -0,0 +1,66 @@
+"""aggregated rate rollups
+
+Revision ID: 3b8f1c2d9e47
+Revises: 99f969739450
+Create Date: 2026-10-16 09:12:41.318204
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b8f1c2d9e47"
+down_revision = "99f969739450"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "aggregated_rate_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("currency_pair_id", sa.Integer(), nullable=False),
+        sa.Column("interval", sa.String(length=10), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("open_at", sa.DateTime(), nullable=False),
+        sa.Column("close_at", sa.DateTime(), nullable=False),
+        sa.Column("open_buy_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("high_buy_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("low_buy_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("close_buy_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("mean_buy_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("open_sell_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("high_sell_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("low_sell_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column(
+            "close_sell_rate", sa.Numeric(precision=18, scale=8), nullable=False
+        ),
+        sa.Column("mean_sell_rate", sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True
+        ),
+        sa.ForeignKeyConstraint(
+            ["currency_pair_id"],
+            ["currency_pairs.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "currency_pair_id",
+            "interval",
+            "bucket_start",
+            name="_pair_interval_bucket_uc",
+        ),
+    )
+    with op.batch_alter_table("aggregated_rate_rollups", schema=None) as batch_op:
+        batch_op.create_index(
+            "idx_rollups_interval_bucket", ["interval", "bucket_start"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("aggregated_rate_rollups", schema=None) as batch_op:
+        batch_op.drop_index("idx_rollups_interval_bucket")
+
+    op.drop_table("aggregated_rate_rollups")
@@ -0,0 +1,28 @@
+"""currency pair priority
+
+Revision ID: 5d21a7c4e8f3
+Revises: 3b8f1c2d9e47
+Create Date: 2026-10-16 14:05:17.402913
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d21a7c4e8f3"
+down_revision = "3b8f1c2d9e47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("currency_pairs", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("priority", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("currency_pairs", schema=None) as batch_op:
+        batch_op.drop_column("priority")
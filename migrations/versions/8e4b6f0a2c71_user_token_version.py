@@ -0,0 +1,28 @@
+"""user token version
+
+Revision ID: 8e4b6f0a2c71
+Revises: 5d21a7c4e8f3
+Create Date: 2026-10-16 18:42:09.118254
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8e4b6f0a2c71"
+down_revision = "5d21a7c4e8f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("token_version", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_column("token_version")
@@ -0,0 +1,25 @@
+"""users updated_at index
+
+Revision ID: a2c6e4f81d57
+Revises: f3b90d6a4c18
+Create Date: 2026-10-17 11:20:08.604317
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a2c6e4f81d57"
+down_revision = "f3b90d6a4c18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.create_index("idx_users_updated_at", ["updated_at"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_index("idx_users_updated_at")
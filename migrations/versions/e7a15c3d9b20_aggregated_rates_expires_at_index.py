@@ -0,0 +1,25 @@
+"""aggregated rates expires_at index
+
+Revision ID: e7a15c3d9b20
+Revises: c4d82e9b1f06
+Create Date: 2026-10-17 09:12:44.318205
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e7a15c3d9b20"
+down_revision = "c4d82e9b1f06"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("aggregated_rates", schema=None) as batch_op:
+        batch_op.create_index("idx_aggregated_expires_at", ["expires_at"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("aggregated_rates", schema=None) as batch_op:
+        batch_op.drop_index("idx_aggregated_expires_at")
@@ -0,0 +1,30 @@
+"""aggregated rates source
+
+Revision ID: f3b90d6a4c18
+Revises: e7a15c3d9b20
+Create Date: 2026-10-17 10:03:27.951460
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f3b90d6a4c18"
+down_revision = "e7a15c3d9b20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("aggregated_rates", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "source", sa.String(length=20), server_default="refresh", nullable=False
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("aggregated_rates", schema=None) as batch_op:
+        batch_op.drop_column("source")
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+
+from app.services.tick_replay import (
+    TickReplayServer,
+    load_messages,
+    synthetic_messages,
+)
+
+
+def replay_ticks(path, synthetic, pairs, host, port, speed, loop):
+    """Serve recorded (or synthetic) forex quotes as a local tick stream."""
+    if path:
+        messages = load_messages(path)
+    else:
+        messages = synthetic_messages(
+            [tuple(pair.split("/")) for pair in pairs], synthetic
+        )
+    try:
+        asyncio.run(
+            TickReplayServer(messages, speed=speed, loop=loop).serve_forever(host, port)
+        )
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=replay_ticks.__doc__)
+    parser.add_argument(
+        "path", nargs="?", help="Recording from stream_rates.py --record"
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=100_000,
+        help="Number of random quotes to serve when no recording is given",
+    )
+    parser.add_argument(
+        "--pair",
+        action="append",
+        dest="pairs",
+        help="Pair for synthetic quotes, e.g. USD/ZAR, repeatable (default: USD/ZAR, EUR/USD)",
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed, 0 for as fast as possible",
+    )
+    parser.add_argument("--loop", action="store_true", help="Replay forever")
+    args = parser.parse_args()
+    replay_ticks(
+        args.path,
+        args.synthetic,
+        args.pairs or ["USD/ZAR", "EUR/USD"],
+        args.host,
+        args.port,
+        args.speed,
+        args.loop,
+    )
@@ -0,0 +1,31 @@
+import argparse
+import asyncio
+
+from app import create_app
+from app.services.tick_stream import TickIngestionService
+
+
+def stream_rates(url, flush_interval, record, duration):
+    """Ingest streaming forex quotes and write coalesced aggregated rates."""
+    app = create_app()
+    service = TickIngestionService(
+        app, url=url, flush_interval=flush_interval, record_path=record
+    )
+    try:
+        asyncio.run(service.run(duration=duration))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=stream_rates.__doc__)
+    parser.add_argument("--url", help="Feed URL (default: TICK_STREAM_URL)")
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        help="Seconds between writes (default: TICK_FLUSH_INTERVAL_SECONDS)",
+    )
+    parser.add_argument("--record", help="Append every feed message to this file")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    args = parser.parse_args()
+    stream_rates(args.url, args.flush_interval, args.record, args.duration)